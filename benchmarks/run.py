@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""Time the API, generate_spreadsheet.py and the workbook updaters.
+
+Each size is ``SYMBOLSxYEARS`` of synthetic Fidelity history (see
+synthetic.py). Results go to a JSON file that ``--compare`` can diff against
+an earlier run:
+
+    python benchmarks/run.py --sizes 10x1 100x3 --output bench.json
+    python benchmarks/run.py --compare baseline.json bench.json
+
+The API runs in-process against DATABASE_URL, a SQLite file in a temporary
+directory by default. Its tables are dropped and recreated for every size, so
+only point it at a scratch database. The response cache is off so reads
+measure the query and serialization; set CACHE_ENABLED=true to time cache hits.
+"""
+import argparse
+import contextlib
+import datetime as dt
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "divitrek"))
+sys.path.insert(0, str(ROOT / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic import (  # noqa: E402
+    synthetic_history,
+    synthetic_positions,
+    synthetic_prices,
+    synthetic_ticker,
+    synthetic_transactions_sheet,
+)
+
+GROUPS = ["api", "scripts"]
+DEFAULT_SIZES = ["10x1", "50x2", "200x3"]
+REGRESSION_RATIO = 1.2  # --compare flags medians that grew by more than this
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    symbols, _, years = text.lower().partition("x")
+    return int(symbols), int(years or 1)
+
+
+class Recorder:
+    def __init__(self, repeat: int) -> None:
+        self.repeat = repeat
+        self.results: List[Dict[str, Any]] = []
+
+    def time(
+        self,
+        group: str,
+        name: str,
+        size: Dict[str, int],
+        fn: Callable[[], Any],
+        setup: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """Run ``fn`` ``repeat`` times; ``setup`` runs untimed before each."""
+        times = []
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn()
+            times.append(time.perf_counter() - start)
+        result = {
+            "group": group,
+            "name": name,
+            **size,
+            "times": times,
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.fmean(times),
+        }
+        self.results.append(result)
+        label = f"{size['symbols']}x{size['years']}"
+        print(f"{group:8} {label:>8} {name:48} {result['median'] * 1000:10.2f} ms")
+
+
+def _check(response: Any) -> Any:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.url}: {response.status_code}")
+    return response
+
+
+def bench_api(
+    recorder: Recorder, size: Dict[str, int], history_csv: bytes, client: Any
+) -> None:
+    from sqlmodel import SQLModel
+
+    from app.core.db import engine
+
+    def reset() -> None:
+        SQLModel.metadata.drop_all(engine)
+        SQLModel.metadata.create_all(engine)
+
+    def load() -> None:
+        files = {"file": ("history.csv", history_csv, "text/csv")}
+        _check(client.post("/imports/fidelity", files=files))
+
+    recorder.time("api", "POST /imports/fidelity", size, load, setup=reset)
+    asset_id = _check(client.get("/assets/", params={"limit": 1})).json()[0]["id"]
+
+    def get(path: str, **params: Any) -> Callable[[], Any]:
+        return lambda: _check(client.get(path, params=params)).content
+
+    page = {"limit": 1000}
+    reads = [
+        ("GET /assets/", get("/assets/", **page)),
+        ("GET /transactions/", get("/transactions/", **page)),
+        (
+            "GET /transactions/?format=rows",
+            get("/transactions/", **page, format="rows"),
+        ),
+        (
+            "GET /transactions/?format=columns",
+            get("/transactions/", **page, format="columns"),
+        ),
+        ("GET /transactions/?format=ndjson", get("/transactions/", format="ndjson")),
+        ("GET /dividends/", get("/dividends/", **page)),
+        (
+            "GET /assets/{id}/transactions",
+            get(f"/assets/{asset_id}/transactions", **page),
+        ),
+        ("GET /assets/{id}/dividends", get(f"/assets/{asset_id}/dividends", **page)),
+    ]
+    for name, fn in reads:
+        recorder.time("api", name, size, fn)
+
+    # a year of bars per symbol, then every lookback for the portfolio at once
+    assets = _check(client.get("/assets/", params=page)).json()
+    end = dt.date.today()
+    start = end - dt.timedelta(days=366)
+    bars = synthetic_prices([a["symbol"] for a in assets], start, end)
+    bars["date"] = bars["date"].dt.date.astype(str)
+    records = bars.to_dict("records")
+    for i in range(0, len(records), 10_000):
+        _check(client.post("/prices/bars", json=records[i : i + 10_000]))
+    windows = "5d,1m,3m,6m,1y"
+    recorder.time(
+        "api", "GET /prices/changes", size, get("/prices/changes", windows=windows)
+    )
+    # the first call builds the per-asset flows, later ranges reuse them
+    recorder.time("api", "GET /portfolio/returns", size, get("/portfolio/returns"))
+    start = (end - dt.timedelta(days=180)).isoformat()
+    recorder.time(
+        "api",
+        "GET /portfolio/returns?start=... (cached flows)",
+        size,
+        get("/portfolio/returns", start=start, dividends="cash"),
+    )
+    for method in ("fifo", "lifo", "average"):
+        recorder.time(
+            "api",
+            f"GET /assets/cost-basis?method={method}",
+            size,
+            get("/assets/cost-basis", method=method),
+        )
+
+    # a year of daily NAV premium per asset, then a day's update and a range read
+    first_day = end - dt.timedelta(days=365)
+    points = [
+        {
+            "symbol": a["symbol"],
+            "metric": "premium_pct",
+            "as_of": (first_day + dt.timedelta(days=i)).isoformat(),
+            "value": (i % 21 - 10) / 100,
+        }
+        for a in assets
+        for i in range(365)
+    ]
+    for i in range(0, len(points), 10_000):
+        _check(client.post("/asset-metrics/", json=points[i : i + 10_000]))
+    daily = [{**p, "as_of": end.isoformat()} for p in points[::365]]
+    recorder.time(
+        "api",
+        "POST /asset-metrics/ (one day)",
+        size,
+        lambda: _check(client.post("/asset-metrics/", json=daily)),
+    )
+    recorder.time(
+        "api",
+        "GET /asset-metrics/?metric=premium_pct",
+        size,
+        get("/asset-metrics/", metric="premium_pct"),
+    )
+
+    # per-share history for every symbol, checked against cash received
+    ex_dividends = [
+        {"symbol": a["symbol"], "ex_date": day.date().isoformat(), "amount": amount}
+        for a in assets
+        for day, amount in synthetic_ticker(a["symbol"])[1].items()
+    ]
+    for i in range(0, len(ex_dividends), 10_000):
+        _check(
+            client.post("/dividends/ex-dividends", json=ex_dividends[i : i + 10_000])
+        )
+    recorder.time(
+        "api",
+        "GET /dividends/reconciliation",
+        size,
+        get("/dividends/reconciliation"),
+    )
+
+    # distinct amounts on every call, so creates insert instead of deduplicating
+    created = iter(range(1, 1_000_000))
+    today = dt.date.today().isoformat()
+
+    def create_asset() -> None:
+        body = {"symbol": f"NEW{next(created)}", "name": "Benchmark"}
+        _check(client.post("/assets/", json=body))
+
+    def create_transaction() -> None:
+        body = {
+            "asset_id": asset_id,
+            "date": today,
+            "price_per_share": 20.0 + next(created) / 1000,
+            "shares": 1.0,
+        }
+        _check(client.post(f"/assets/{asset_id}/transactions", json=body))
+
+    def create_dividend() -> None:
+        body = {
+            "asset_id": asset_id,
+            "date_received": today,
+            "amount_received": 1.0 + next(created) / 1000,
+        }
+        _check(client.post(f"/assets/{asset_id}/dividends", json=body))
+
+    recorder.time("api", "POST /assets/", size, create_asset)
+    recorder.time("api", "POST /assets/{id}/transactions", size, create_transaction)
+    recorder.time("api", "POST /assets/{id}/dividends", size, create_dividend)
+
+    # one batch request spread over every asset
+    asset_ids = [a["id"] for a in _check(client.get("/assets/", params=page)).json()]
+    batch_size = 1000
+    batch: Dict[str, Any] = {}
+
+    def new_batch() -> None:
+        step = next(created) / 1000
+        batch["transactions"] = [
+            {
+                "asset_id": asset_ids[i % len(asset_ids)],
+                "date": today,
+                "price_per_share": 20.0 + step,
+                "shares": 1.0,
+            }
+            for i in range(batch_size)
+        ]
+        batch["dividends"] = [
+            {
+                "asset_id": asset_ids[i % len(asset_ids)],
+                "date_received": today,
+                "amount_received": 1.0 + step,
+            }
+            for i in range(batch_size)
+        ]
+
+    recorder.time(
+        "api",
+        f"POST /transactions/batch ({batch_size})",
+        size,
+        lambda: _check(client.post("/transactions/batch", json=batch["transactions"])),
+        setup=new_batch,
+    )
+    recorder.time(
+        "api",
+        f"POST /dividends/batch ({batch_size})",
+        size,
+        lambda: _check(client.post("/dividends/batch", json=batch["dividends"])),
+        setup=new_batch,
+    )
+
+
+def build_skeleton(workdir: Path) -> Path:
+    """Run build_dividend_tracker_skeleton.py with ``workdir`` as HOME."""
+    (workdir / "Documents").mkdir(parents=True, exist_ok=True)
+    script = ROOT / "scripts" / "build_dividend_tracker_skeleton.py"
+    env = {**os.environ, "HOME": str(workdir)}
+    subprocess.run(
+        [sys.executable, str(script)], env=env, check=True, stdout=subprocess.DEVNULL
+    )
+    return workdir / "Documents" / "Dividend_Tracker_Skeleton.xlsx"
+
+
+def bench_scripts(
+    recorder: Recorder,
+    size: Dict[str, int],
+    history: Any,
+    skeleton: Path,
+    workdir: Path,
+) -> None:
+    from openpyxl import load_workbook
+
+    import dividends_nav_etf_updater
+    import generate_spreadsheet
+    import prices_updater
+    from price_cache import PriceCache
+    from ticker_data import TickerFetcher
+    from workbook_io import write_table
+
+    history_path = workdir / "history.csv"
+    positions_path = workdir / "positions.xlsx"
+    history.to_csv(history_path, index=False)
+    synthetic_positions(history).to_excel(positions_path, index=False)
+
+    loaded = generate_spreadsheet.load_history(history_path)
+    div_received = generate_spreadsheet.select_actions(loaded, "DIVIDEND RECEIVED")
+    trades = generate_spreadsheet.select_actions(loaded, "BOUGHT|SOLD|REINVESTMENT")
+    recorder.time(
+        "scripts",
+        "generate_spreadsheet.calculate_dividends_by_date",
+        size,
+        lambda: generate_spreadsheet.calculate_dividends_by_date(div_received, trades),
+    )
+    recorder.time(
+        "scripts",
+        "generate_spreadsheet.main",
+        size,
+        lambda: generate_spreadsheet.main(
+            positions_path, history_path, workdir / "complete.xlsx"
+        ),
+    )
+
+    # the updaters edit Dividend_Tracker_Skeleton.xlsx in the working directory
+    filled = workdir / "filled.xlsx"
+    wb = load_workbook(skeleton)
+    write_table(wb["Transactions"], synthetic_transactions_sheet(history))
+    wb.save(filled)
+    workbook = workdir / dividends_nav_etf_updater.PATH
+    cache_path = workdir / "price_cache.sqlite"
+
+    def fresh_workbook() -> None:
+        shutil.copyfile(filled, workbook)
+
+    def fresh_cache() -> None:
+        fresh_workbook()
+        cache_path.unlink(missing_ok=True)
+
+    def update_prices() -> None:
+        cache = PriceCache(str(cache_path), fetcher=synthetic_prices)
+        try:
+            prices_updater.main(cache)
+        finally:
+            cache.close()
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        recorder.time(
+            "scripts",
+            "dividends_nav_etf_updater.main",
+            size,
+            lambda: dividends_nav_etf_updater.main(TickerFetcher(synthetic_ticker)),
+            setup=fresh_workbook,
+        )
+        recorder.time(
+            "scripts",
+            "prices_updater.main (cold cache)",
+            size,
+            update_prices,
+            setup=fresh_cache,
+        )
+        recorder.time(
+            "scripts",
+            "prices_updater.main (warm cache)",
+            size,
+            update_prices,
+            setup=fresh_workbook,
+        )
+    finally:
+        os.chdir(cwd)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def run(args: argparse.Namespace) -> None:
+    workdir = Path(tempfile.mkdtemp(prefix="divitrek-bench-"))
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir / 'bench.db'}")
+    os.environ.setdefault("CACHE_ENABLED", "false")
+    recorder = Recorder(args.repeat)
+    try:
+        with contextlib.ExitStack() as stack:
+            client = None
+            if "api" in args.only:
+                from fastapi.testclient import TestClient
+
+                from app.main import app
+
+                client = stack.enter_context(TestClient(app))
+            skeleton = build_skeleton(workdir) if "scripts" in args.only else None
+
+            for text in args.sizes:
+                symbols, years = parse_size(text)
+                history = synthetic_history(symbols, years, seed=args.seed)
+                size = {"symbols": symbols, "years": years, "rows": len(history)}
+                if client is not None:
+                    csv = history.to_csv(index=False).encode()
+                    bench_api(recorder, size, csv, client)
+                if skeleton is not None:
+                    size_dir = workdir / text
+                    size_dir.mkdir()
+                    bench_scripts(recorder, size, history, skeleton, size_dir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": os.environ["DATABASE_URL"].split("://")[0],
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": recorder.results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"Wrote {args.output}")
+
+
+def compare(baseline_path: str, current_path: str, ratio: float) -> int:
+    """Print median changes per benchmark; non-zero exit if any regressed."""
+
+    def key(result: Dict[str, Any]) -> Tuple:
+        return result["group"], result["name"], result["symbols"], result["years"]
+
+    baseline = json.loads(Path(baseline_path).read_text())["results"]
+    current = json.loads(Path(current_path).read_text())["results"]
+    before = {key(r): r["median"] for r in baseline}
+    regressions = 0
+    for result in current:
+        old = before.get(key(result))
+        if old is None:
+            continue
+        change = result["median"] / old if old else float("inf")
+        flag = "REGRESSION" if change > ratio else ""
+        regressions += bool(flag)
+        group, name, symbols, years = key(result)
+        print(
+            f"{group:8} {f'{symbols}x{years}':>8} {name:48} "
+            f"{old * 1000:10.2f} -> {result['median'] * 1000:10.2f} ms "
+            f"{change:6.2f}x {flag}"
+        )
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", nargs="+", default=DEFAULT_SIZES, help="SYMBOLSxYEARS, e.g. 50x2"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=GROUPS)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="diff two runs"
+    )
+    parser.add_argument("--ratio", type=float, default=REGRESSION_RATIO)
+    args = parser.parse_args()
+    if args.compare:
+        sys.exit(compare(*args.compare, args.ratio))
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Synthetic portfolios shaped like the Fidelity export in ``data/``.
+
+Every symbol gets an opening buy, a monthly top-up buy and a weekly or monthly
+cash dividend that is reinvested the same day, so N symbols x M years produce
+roughly ``N * M * (12 + 2 * payments_per_year)`` history rows. Output is
+deterministic for a given seed.
+"""
+import datetime as dt
+import zlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+HISTORY_COLUMNS = [
+    "Run Date",
+    "Action",
+    "Symbol",
+    "Description",
+    "Quantity",
+    "Price ($)",
+    "Amount ($)",
+    "Settlement Date",
+]
+CADENCES = ["weekly", "monthly"]
+END = dt.date(2025, 10, 1)
+
+
+def symbol_name(i: int) -> str:
+    return f"SYN{i:05d}"
+
+
+def description(symbol: str, cadence: str) -> str:
+    pay = "WEEKLYPAY" if cadence == "weekly" else "MONTHLY INCOME"
+    return f"SYNTHETIC {pay} ETF {symbol}"
+
+
+def fidelity_date(day: dt.date) -> str:
+    return f"{day.month}/{day.day}/{day:%y}"
+
+
+def pay_dates(start: dt.date, end: dt.date, cadence: str) -> List[dt.date]:
+    if cadence == "weekly":
+        days = pd.date_range(start, end, freq="W-FRI")
+    else:
+        days = pd.date_range(start, end, freq="BME")
+    return [d.date() for d in days]
+
+
+def _symbol_rows(
+    rng: np.random.Generator, symbol: str, cadence: str, start: dt.date, end: dt.date
+) -> List[tuple]:
+    desc = description(symbol, cadence)
+    buys = {d.date(): "YOU BOUGHT" for d in pd.date_range(start, end, freq="BMS")}
+    events = sorted(
+        [(d, kind) for d, kind in buys.items()]
+        + [(d, "DIVIDEND RECEIVED") for d in pay_dates(start, end, cadence)]
+    )
+    # price random walk over the events, yield paid per share per period
+    prices = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, len(events))))
+    rate = rng.uniform(0.005, 0.02) * (0.25 if cadence == "weekly" else 1.0)
+
+    rows: List[tuple] = []
+    shares = 0.0
+    for (day, kind), price in zip(events, prices):
+        price = round(float(price), 2)
+        action = f"{kind} {desc} ({symbol}) (Cash)"
+        if kind == "YOU BOUGHT":
+            qty = float(rng.integers(5, 50))
+            settle = fidelity_date(day + dt.timedelta(days=1))
+            rows.append(
+                (day, action, symbol, desc, qty, price, -round(qty * price, 2), settle)
+            )
+            shares += qty
+        elif shares > 0:
+            cash = round(shares * price * rate, 2)
+            rows.append((day, action, symbol, desc, 0, None, cash, None))
+            qty = round(cash / price, 3)
+            reinvest = f"REINVESTMENT {desc} ({symbol}) (Cash)"
+            rows.append((day, reinvest, symbol, desc, qty, price, -cash, None))
+            shares += qty
+    return rows
+
+
+def synthetic_history(
+    symbols: int, years: int, end: dt.date = END, seed: int = 0
+) -> pd.DataFrame:
+    """A Fidelity activity export for ``symbols`` symbols over ``years`` years."""
+    rng = np.random.default_rng(seed)
+    start = end - dt.timedelta(days=365 * years)
+    rows: List[tuple] = []
+    for i in range(symbols):
+        cadence = CADENCES[i % len(CADENCES)]
+        rows += _symbol_rows(rng, symbol_name(i), cadence, start, end)
+    history = pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+    # newest first, like the real export
+    history = history.sort_values("Run Date", ascending=False, kind="stable")
+    history["Run Date"] = history["Run Date"].map(fidelity_date)
+    return history.reset_index(drop=True)
+
+
+def synthetic_positions(history: pd.DataFrame) -> pd.DataFrame:
+    """``current_positions.xlsx`` rows for the symbols held in ``history``."""
+    trades = history[history["Quantity"] > 0]
+    by_symbol = trades.groupby("Symbol")
+    shares = by_symbol["Quantity"].sum()
+    cost = -by_symbol["Amount ($)"].sum()
+    is_div = history["Action"].str.startswith("DIVIDEND RECEIVED")
+    last = history[is_div].groupby("Symbol")["Amount ($)"].first()
+    positions = pd.DataFrame(
+        {
+            "Stock/ETF": "ETF",
+            "Shares": shares.round(3),
+            "average cost": (cost / shares).round(4),
+            "Cost Basis": cost.round(2),
+            "Last Dividend": (last / shares).round(4),
+            "Distribution Yield": 0.0,
+        }
+    )
+    return positions.rename_axis("Symbol").reset_index()
+
+
+def synthetic_transactions_sheet(history: pd.DataFrame) -> pd.DataFrame:
+    """``history`` with the skeleton workbook's Transactions headers."""
+    return history.rename(
+        columns={
+            "Run Date": "Run_Date",
+            "Price ($)": "Price",
+            "Amount ($)": "Amount",
+            "Settlement Date": "Settle_Date",
+        }
+    )
+
+
+def synthetic_prices(symbols: List[str], start: dt.date, end: dt.date) -> pd.DataFrame:
+    """Daily bars for :class:`price_cache.PriceCache`, without the network."""
+    days = pd.bdate_range(start, end)
+    frames = []
+    for symbol in symbols:
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        close = 20 * np.exp(np.cumsum(rng.normal(0, 0.01, len(days))))
+        frames.append(
+            pd.DataFrame(
+                {"symbol": symbol, "date": days, "close": close, "adj_close": close}
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=["symbol", "date", "close", "adj_close"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def synthetic_ticker(symbol: str) -> Tuple[Dict[str, object], pd.Series]:
+    """``(info, dividends)`` for :class:`ticker_data.TickerFetcher`."""
+    i = int(symbol[3:])
+    cadence = CADENCES[i % len(CADENCES)]
+    info = {
+        "quoteType": "ETF",
+        "shortName": description(symbol, cadence),
+        "navPrice": 20.0,
+        "totalAssets": 1e9,
+    }
+    ex_dates = pd.DatetimeIndex(pay_dates(END - dt.timedelta(days=730), END, cadence))
+    ex_dates = ex_dates - pd.Timedelta(days=1)
+    return info, pd.Series(0.1, index=ex_dates)
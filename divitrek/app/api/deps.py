@@ -0,0 +1,65 @@
+import time
+from typing import Any, AsyncIterator, Callable, TypeVar, Union
+
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.db import async_engine, engine, pool_metrics
+
+
+T = TypeVar("T")
+
+
+class Database:
+    """Request-scoped session that runs ``fn(session, ...)`` in either DB mode.
+
+    In async mode the function runs on the request's ``AsyncSession`` through
+    ``run_sync``, so waiting on PostgreSQL yields the event loop instead of a
+    threadpool worker. In sync mode it runs in the threadpool on the request's
+    sync session. Route code is written once against the sync ``Session`` API
+    either way, and every call within a request shares one session.
+    """
+
+    def __init__(self, session: Union[Session, AsyncSession]) -> None:
+        self.session = session
+        self._checked_out = False
+
+    async def _call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+    async def _checkout(self) -> None:
+        # Time the first pool checkout of the request as the pool wait
+        started = time.perf_counter()
+        await self._call(lambda session: session.connection())
+        pool_metrics.observe_wait(time.perf_counter() - started)
+        self._checked_out = True
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if not self._checked_out:
+            await self._checkout()
+        try:
+            return await self._call(fn, *args, **kwargs)
+        except Exception:
+            # release the connection now; teardown may run in a cancelled scope
+            await self._call(lambda session: session.rollback())
+            raise
+
+    async def close(self) -> None:
+        if isinstance(self.session, AsyncSession):
+            await self.session.close()
+        else:
+            await run_in_threadpool(self.session.close)
+
+
+async def get_db() -> AsyncIterator[Database]:
+    if async_engine is not None:
+        db = Database(AsyncSession(async_engine))
+    else:
+        db = Database(Session(engine))
+    try:
+        yield db
+    finally:
+        await db.close()
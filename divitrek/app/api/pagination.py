@@ -0,0 +1,64 @@
+import base64
+import json
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlmodel import Session
+from sqlmodel.sql.expression import SelectOfScalar
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        decoded = []
+        for key, value in zip(keys, values):
+            try:
+                python_type = key.type.python_type
+            except NotImplementedError:  # e.g. sqlmodel's AutoString
+                python_type = str
+            if python_type is date:
+                decoded.append(date.fromisoformat(value))
+            else:
+                decoded.append(python_type(value))
+        return decoded
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(
+    session: Session,
+    stmt: SelectOfScalar,
+    keys: Sequence[Any],
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[List[Any], Optional[str]]:
+    """Return one keyset page of ``stmt`` ordered by ``keys`` and the next cursor.
+
+    ``keys`` must be unique together (they always end with the primary key), so
+    the page boundary is a single row-value comparison the index can seek to.
+    """
+    if cursor:
+        stmt = stmt.where(tuple_(*keys) > tuple_(*decode_cursor(cursor, keys)))
+    rows = list(session.exec(stmt.order_by(*keys).limit(limit + 1)).all())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], key.key) for key in keys])
+
+
+def next_cursor_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
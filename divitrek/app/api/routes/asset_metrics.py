@@ -0,0 +1,54 @@
+from datetime import date
+from typing import List, Optional, Tuple
+
+import orjson
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from sqlmodel import Session
+
+from app.api.deps import Database, get_db
+from app.core.cache import response_cache
+from app.models.models import MetricPointCreate, MetricSeriesRead
+from app.services.asset_metrics import MAX_METRICS, metric_series, upsert_metrics
+from app.services.batch import MAX_BATCH
+
+
+router = APIRouter(prefix="/asset-metrics", tags=["asset-metrics"])
+
+
+@router.get("/", response_model=List[MetricSeriesRead])
+async def read_metric_series(
+    request: Request,
+    metric: List[str] = Query(..., max_length=MAX_METRICS),
+    symbol: Optional[List[str]] = Query(None),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Database = Depends(get_db),
+) -> Response:
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    symbols = [s.upper() for s in symbol] if symbol else None
+
+    async def load():
+        metrics = list(dict.fromkeys(metric))
+        series = await db.run(metric_series, metrics, start, end, symbols)
+        return series, {}
+
+    # the arrays are built from plain rows, so they skip model validation
+    return await response_cache.respond(
+        request, ["asset-metrics", "assets"], orjson.dumps, load
+    )
+
+
+@router.post("/")
+async def upsert_metric_points(
+    points: List[MetricPointCreate] = Body(..., max_length=MAX_BATCH),
+    db: Database = Depends(get_db),
+) -> dict:
+    def upsert(session: Session) -> Tuple[int, List[str]]:
+        result = upsert_metrics(session, points)
+        session.commit()
+        return result
+
+    count, unknown = await db.run(upsert)
+    await response_cache.invalidate(["asset-metrics"])
+    return {"upserted": count, "unknown_symbols": unknown}
@@ -1,35 +1,69 @@
-from typing import List
+from datetime import date
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
+from sqlmodel import Session, delete, select
 
-from app.core.db import get_session
+from app.api.deps import Database, get_db
+from app.api.pagination import DEFAULT_LIMIT, MAX_LIMIT
+from app.api.serialization import ListFormat, list_response, list_select, validated_json
+from app.core.cache import asset_tag, response_cache
 from app.models.models import (
     Asset,
     AssetCreate,
     AssetRead,
+    CostBasisMethod,
+    CostBasisRead,
     Dividend,
     DividendCreate,
+    DividendMonthly,
     DividendRead,
+    MetricPoint,
+    Position,
     Transaction,
     TransactionCreate,
     TransactionRead,
 )
-
+from app.services.batch import insert_dividend, insert_transaction
+from app.services.cost_basis import compute_cost_basis
 
 router = APIRouter(prefix="/assets", tags=["assets"])
 
+REPEAT_HELP = (
+    "0 for the first record with these values, 1 for a second real one, and "
+    "so on; a create repeating a stored one returns it with status 200"
+)
+
+_asset = TypeAdapter(AssetRead)
+_assets = TypeAdapter(List[AssetRead])
+_transactions = TypeAdapter(List[TransactionRead])
+_dividends = TypeAdapter(List[DividendRead])
+_cost_basis = TypeAdapter(List[CostBasisRead])
+_asset_cost_basis = TypeAdapter(CostBasisRead)
+
 
 @router.get("/", response_model=List[AssetRead])
-def list_assets() -> List[AssetRead]:
-    with get_session() as session:
-        assets = session.exec(select(Asset).order_by(Asset.symbol)).all()
-        return assets
+async def list_assets(
+    request: Request,
+    symbol: Optional[List[str]] = Query(None),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    format: ListFormat = ListFormat.json,
+    db: Database = Depends(get_db),
+) -> Response:
+    stmt = list_select(Asset, AssetRead, format)
+    if symbol:
+        stmt = stmt.where(Asset.symbol.in_([s.upper() for s in symbol]))
+    keys = (Asset.symbol, Asset.id)
+    return await list_response(
+        request, db, stmt, keys, cursor, limit, format, ["assets"], _assets
+    )
 
 
 @router.post("/", response_model=AssetRead)
-def create_asset(asset: AssetCreate) -> AssetRead:
-    with get_session() as session:
+async def create_asset(asset: AssetCreate, db: Database = Depends(get_db)) -> AssetRead:
+    def create(session: Session) -> Asset:
         exists = session.exec(select(Asset).where(Asset.symbol == asset.symbol)).first()
         if exists:
             raise HTTPException(status_code=400, detail="Asset symbol already exists")
@@ -39,74 +73,231 @@ def create_asset(asset: AssetCreate) -> AssetRead:
         session.refresh(db_asset)
         return db_asset
 
+    db_asset = await db.run(create)
+    await response_cache.invalidate(["assets"])
+    return db_asset
+
+
+@router.get("/cost-basis", response_model=List[CostBasisRead])
+async def list_cost_basis(
+    request: Request,
+    method: CostBasisMethod = CostBasisMethod.fifo,
+    symbol: Optional[List[str]] = Query(None),
+    as_of: Optional[date] = None,
+    include_lots: bool = False,
+    db: Database = Depends(get_db),
+) -> Response:
+    symbols = [s.upper() for s in symbol] if symbol else None
+
+    async def load():
+        basis = await db.run(
+            compute_cost_basis,
+            as_of or date.today(),
+            method,
+            symbols=symbols,
+            include_lots=include_lots,
+        )
+        return basis, {}
+
+    tags = ["assets", "transactions", "prices"]
+    return await response_cache.respond(
+        request, tags, validated_json(_cost_basis), load
+    )
+
 
 @router.get("/{asset_id}", response_model=AssetRead)
-def get_asset(asset_id: int) -> AssetRead:
-    with get_session() as session:
-        asset = session.get(Asset, asset_id)
+async def get_asset(
+    asset_id: int, request: Request, db: Database = Depends(get_db)
+) -> Response:
+    async def load():
+        asset = await db.run(lambda session: session.get(Asset, asset_id))
         if not asset:
             raise HTTPException(status_code=404, detail="Asset not found")
-        return asset
+        return asset, {}
+
+    tags = [asset_tag("asset", asset_id)]
+    return await response_cache.respond(request, tags, validated_json(_asset), load)
 
 
 @router.delete("/{asset_id}")
-def delete_asset(asset_id: int) -> dict:
-    with get_session() as session:
+async def delete_asset(asset_id: int, db: Database = Depends(get_db)) -> dict:
+    def remove(session: Session) -> dict:
         asset = session.get(Asset, asset_id)
         if not asset:
             raise HTTPException(status_code=404, detail="Asset not found")
+        session.exec(delete(Position).where(Position.asset_id == asset_id))
+        session.exec(
+            delete(DividendMonthly).where(DividendMonthly.asset_id == asset_id)
+        )
+        session.exec(delete(MetricPoint).where(MetricPoint.asset_id == asset_id))
+        # history goes with the asset, in the same transaction
+        session.exec(delete(Transaction).where(Transaction.asset_id == asset_id))
+        session.exec(delete(Dividend).where(Dividend.asset_id == asset_id))
         session.delete(asset)
         session.commit()
         return {"ok": True}
 
+    result = await db.run(remove)
+    await response_cache.invalidate(
+        [
+            "assets",
+            "transactions",
+            "dividends",
+            "asset-metrics",
+            asset_tag("asset", asset_id),
+            asset_tag("transactions", asset_id),
+            asset_tag("dividends", asset_id),
+        ]
+    )
+    return result
+
 
 # Transactions
 @router.get("/{asset_id}/transactions", response_model=List[TransactionRead])
-def list_transactions(asset_id: int) -> List[TransactionRead]:
-    with get_session() as session:
-        stmt = (
-            select(Transaction)
-            .where(Transaction.asset_id == asset_id)
-            .order_by(Transaction.date)
-        )
-        return session.exec(stmt).all()
+async def list_transactions(
+    asset_id: int,
+    request: Request,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    format: ListFormat = ListFormat.json,
+    db: Database = Depends(get_db),
+) -> Response:
+    stmt = list_select(Transaction, TransactionRead, format)
+    stmt = stmt.where(Transaction.asset_id == asset_id)
+    if start:
+        stmt = stmt.where(Transaction.date >= start)
+    if end:
+        stmt = stmt.where(Transaction.date <= end)
+    keys = (Transaction.date, Transaction.id)
+    tags = [asset_tag("transactions", asset_id)]
+    return await list_response(
+        request, db, stmt, keys, cursor, limit, format, tags, _transactions
+    )
 
 
-@router.post("/{asset_id}/transactions", response_model=TransactionRead)
-def create_transaction(asset_id: int, tx: TransactionCreate) -> TransactionRead:
+@router.post(
+    "/{asset_id}/transactions", response_model=TransactionRead, status_code=201
+)
+async def create_transaction(
+    asset_id: int,
+    tx: TransactionCreate,
+    response: Response,
+    repeat: int = Query(0, ge=0, description=REPEAT_HELP),
+    db: Database = Depends(get_db),
+) -> TransactionRead:
     if tx.asset_id != asset_id:
         raise HTTPException(status_code=400, detail="asset_id mismatch")
-    with get_session() as session:
+
+    def create(session: Session) -> Tuple[TransactionRead, bool]:
         if not session.get(Asset, asset_id):
             raise HTTPException(status_code=404, detail="Asset not found")
-        db_tx = Transaction(**tx.model_dump())
-        session.add(db_tx)
+        row, created = insert_transaction(session, tx, repeat)
         session.commit()
-        session.refresh(db_tx)
+        return TransactionRead.model_validate(row), created
+
+    db_tx, created = await db.run(create)
+    if not created:
+        # a retry of a stored create: 200 with the stored record
+        response.status_code = 200
         return db_tx
+    await response_cache.invalidate(
+        ["transactions", asset_tag("transactions", asset_id)]
+    )
+    return db_tx
+
+
+@router.get("/{asset_id}/cost-basis", response_model=CostBasisRead)
+async def get_cost_basis(
+    asset_id: int,
+    request: Request,
+    method: CostBasisMethod = CostBasisMethod.fifo,
+    as_of: Optional[date] = None,
+    include_lots: bool = True,
+    db: Database = Depends(get_db),
+) -> Response:
+    as_of = as_of or date.today()
+
+    def compute(session: Session) -> CostBasisRead:
+        asset = session.get(Asset, asset_id)
+        if not asset:
+            raise HTTPException(status_code=404, detail="Asset not found")
+        basis = compute_cost_basis(
+            session, as_of, method, asset_ids=[asset_id], include_lots=include_lots
+        )
+        if basis:
+            return basis[0]
+        # nothing traded by as_of
+        return CostBasisRead(
+            asset_id=asset_id,
+            symbol=asset.symbol,
+            method=method,
+            as_of=as_of,
+            shares=0.0,
+            cost_basis=0.0,
+            average_cost=None,
+            realized_proceeds=0.0,
+            realized_cost=0.0,
+            realized_gain=0.0,
+            lots=[] if include_lots else None,
+        )
+
+    async def load():
+        return await db.run(compute), {}
+
+    tags = [asset_tag("asset", asset_id), asset_tag("transactions", asset_id), "prices"]
+    return await response_cache.respond(
+        request, tags, validated_json(_asset_cost_basis), load
+    )
 
 
 # Dividends
 @router.get("/{asset_id}/dividends", response_model=List[DividendRead])
-def list_dividends(asset_id: int) -> List[DividendRead]:
-    with get_session() as session:
-        stmt = (
-            select(Dividend)
-            .where(Dividend.asset_id == asset_id)
-            .order_by(Dividend.date_received)
-        )
-        return session.exec(stmt).all()
+async def list_dividends(
+    asset_id: int,
+    request: Request,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    format: ListFormat = ListFormat.json,
+    db: Database = Depends(get_db),
+) -> Response:
+    stmt = list_select(Dividend, DividendRead, format)
+    stmt = stmt.where(Dividend.asset_id == asset_id)
+    if start:
+        stmt = stmt.where(Dividend.date_received >= start)
+    if end:
+        stmt = stmt.where(Dividend.date_received <= end)
+    keys = (Dividend.date_received, Dividend.id)
+    tags = [asset_tag("dividends", asset_id)]
+    return await list_response(
+        request, db, stmt, keys, cursor, limit, format, tags, _dividends
+    )
 
 
-@router.post("/{asset_id}/dividends", response_model=DividendRead)
-def create_dividend(asset_id: int, div: DividendCreate) -> DividendRead:
+@router.post("/{asset_id}/dividends", response_model=DividendRead, status_code=201)
+async def create_dividend(
+    asset_id: int,
+    div: DividendCreate,
+    response: Response,
+    repeat: int = Query(0, ge=0, description=REPEAT_HELP),
+    db: Database = Depends(get_db),
+) -> DividendRead:
     if div.asset_id != asset_id:
         raise HTTPException(status_code=400, detail="asset_id mismatch")
-    with get_session() as session:
+
+    def create(session: Session) -> Tuple[DividendRead, bool]:
         if not session.get(Asset, asset_id):
             raise HTTPException(status_code=404, detail="Asset not found")
-        db_div = Dividend(**div.model_dump())
-        session.add(db_div)
+        row, created = insert_dividend(session, div, repeat)
         session.commit()
-        session.refresh(db_div)
+        return DividendRead.model_validate(row), created
+
+    db_div, created = await db.run(create)
+    if not created:
+        response.status_code = 200
         return db_div
+    await response_cache.invalidate(["dividends", asset_tag("dividends", asset_id)])
+    return db_div
@@ -0,0 +1,203 @@
+from datetime import date
+from typing import Any, List, Optional
+
+import orjson
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
+from sqlmodel import Session, select
+
+from app.api.deps import Database, get_db
+from app.api.pagination import DEFAULT_LIMIT, MAX_LIMIT
+from app.api.serialization import (
+    ListFormat,
+    list_response,
+    list_select,
+    validated_json,
+)
+from app.core.cache import asset_tag, response_cache
+from app.models.models import (
+    Asset,
+    Dividend,
+    DividendCalendarRead,
+    DividendCreate,
+    DividendForecastRead,
+    DividendReconciliationRead,
+    DividendRead,
+    ExDividendCreate,
+    MonthlyIncomeRead,
+    ReconciliationStatus,
+)
+from app.services.batch import MAX_BATCH, insert_dividends, unknown_assets
+from app.services.dividend_calendar import compute_calendar, compute_forecast
+from app.services.monthly_income import add_months, month_start, monthly_income
+from app.services.reconciliation import (
+    DEFAULT_TOLERANCE,
+    compute_reconciliation,
+    upsert_ex_dividends,
+)
+
+
+router = APIRouter(prefix="/dividends", tags=["dividends"])
+
+_dividends = TypeAdapter(List[DividendRead])
+_calendar = TypeAdapter(List[DividendCalendarRead])
+_forecast = TypeAdapter(DividendForecastRead)
+_monthly = TypeAdapter(MonthlyIncomeRead)
+
+
+@router.get("/", response_model=List[DividendRead])
+async def list_dividends(
+    request: Request,
+    symbol: Optional[List[str]] = Query(None),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    format: ListFormat = ListFormat.json,
+    db: Database = Depends(get_db),
+) -> Response:
+    stmt = list_select(Dividend, DividendRead, format)
+    if symbol:
+        symbols = [s.upper() for s in symbol]
+        asset_ids = select(Asset.id).where(Asset.symbol.in_(symbols))
+        stmt = stmt.where(Dividend.asset_id.in_(asset_ids))
+    if start:
+        stmt = stmt.where(Dividend.date_received >= start)
+    if end:
+        stmt = stmt.where(Dividend.date_received <= end)
+    keys = (Dividend.date_received, Dividend.id)
+    return await list_response(
+        request, db, stmt, keys, cursor, limit, format, ["dividends"], _dividends
+    )
+
+
+@router.get("/calendar", response_model=List[DividendCalendarRead])
+async def dividend_calendar(
+    request: Request,
+    symbol: Optional[List[str]] = Query(None),
+    as_of: Optional[date] = None,
+    db: Database = Depends(get_db),
+) -> Response:
+    symbols = [s.upper() for s in symbol] if symbol else None
+
+    async def load():
+        calendar = await db.run(compute_calendar, as_of or date.today(), symbols)
+        return calendar, {}
+
+    render = validated_json(_calendar)
+    tags = ["dividends", "ex-dividends"]
+    return await response_cache.respond(request, tags, render, load)
+
+
+@router.get("/forecast", response_model=DividendForecastRead)
+async def dividend_forecast(
+    request: Request,
+    symbol: Optional[List[str]] = Query(None),
+    as_of: Optional[date] = None,
+    months: int = Query(12, ge=1, le=60),
+    db: Database = Depends(get_db),
+) -> Response:
+    symbols = [s.upper() for s in symbol] if symbol else None
+
+    async def load():
+        forecast = await db.run(
+            compute_forecast, as_of or date.today(), months, symbols
+        )
+        return forecast, {}
+
+    render = validated_json(_forecast)
+    tags = ["dividends", "ex-dividends"]
+    return await response_cache.respond(request, tags, render, load)
+
+
+@router.get("/monthly", response_model=MonthlyIncomeRead)
+async def dividend_monthly(
+    request: Request,
+    symbol: Optional[List[str]] = Query(None),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Database = Depends(get_db),
+) -> Response:
+    # Defaults to the trailing twelve months, including the current one
+    end = end or date.today()
+    start = start or add_months(month_start(end), -11)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    symbols = [s.upper() for s in symbol] if symbol else None
+
+    async def load():
+        income = await db.run(monthly_income, start, end, symbols)
+        return income, {}
+
+    render = validated_json(_monthly)
+    return await response_cache.respond(request, ["dividends"], render, load)
+
+
+@router.get("/reconciliation", response_model=List[DividendReconciliationRead])
+async def dividend_reconciliation(
+    request: Request,
+    symbol: Optional[List[str]] = Query(None),
+    status: Optional[List[ReconciliationStatus]] = Query(None),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    as_of: Optional[date] = None,
+    tolerance: float = Query(DEFAULT_TOLERANCE, ge=0, le=1),
+    db: Database = Depends(get_db),
+) -> Response:
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    symbols = [s.upper() for s in symbol] if symbol else None
+
+    async def load():
+        entries = await db.run(
+            compute_reconciliation,
+            as_of or date.today(),
+            start,
+            end,
+            symbols,
+            status,
+            tolerance,
+        )
+        return entries, {}
+
+    # entries are built from validated columns, so they skip model validation
+    tags = ["dividends", "transactions", "ex-dividends", "assets"]
+    return await response_cache.respond(request, tags, orjson.dumps, load)
+
+
+@router.post("/ex-dividends")
+async def upsert_ex_dividend_history(
+    items: List[ExDividendCreate] = Body(..., max_length=MAX_BATCH),
+    db: Database = Depends(get_db),
+) -> dict:
+    def upsert(session: Session) -> int:
+        count = upsert_ex_dividends(session, items)
+        session.commit()
+        return count
+
+    count = await db.run(upsert)
+    await response_cache.invalidate(["ex-dividends"])
+    return {"upserted": count}
+
+
+@router.post("/batch", response_model=List[DividendRead])
+async def create_dividends(
+    items: List[DividendCreate] = Body(..., max_length=MAX_BATCH),
+    db: Database = Depends(get_db),
+) -> Response:
+    asset_ids = {item.asset_id for item in items}
+
+    def create(session: Session) -> List[Any]:
+        missing = unknown_assets(session, asset_ids)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Assets not found: {missing}")
+        rows = insert_dividends(session, items)
+        session.commit()
+        return rows
+
+    if not items:
+        return Response(b"[]", media_type="application/json")
+    rows = await db.run(create)
+    tags = [asset_tag("dividends", asset_id) for asset_id in asset_ids]
+    await response_cache.invalidate(["dividends", *tags])
+    return Response(validated_json(_dividends)(rows), media_type="application/json")
@@ -0,0 +1,198 @@
+import io
+from datetime import date
+from enum import Enum
+from typing import Any, AsyncIterator, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import sqlalchemy as sa
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+
+from app.api.deps import Database, get_db
+from app.api.pagination import paginate
+from app.models.models import (
+    Asset,
+    AssetRead,
+    Dividend,
+    DividendRead,
+    Transaction,
+    TransactionRead,
+)
+
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+
+class ExportFormat(str, Enum):
+    arrow = "arrow"  # Arrow IPC stream
+    parquet = "parquet"
+
+
+MEDIA_TYPES = {
+    ExportFormat.arrow: "application/vnd.apache.arrow.stream",
+    ExportFormat.parquet: "application/vnd.apache.parquet",
+}
+
+
+def arrow_type(column: Any) -> pa.DataType:
+    sql_type = column.type
+    if isinstance(sql_type, sa.Integer):
+        return pa.int64()
+    if isinstance(sql_type, sa.Float):
+        return pa.float64()
+    if isinstance(sql_type, sa.DateTime):
+        return pa.timestamp("us")
+    if isinstance(sql_type, sa.Date):
+        return pa.date32()
+    return pa.string()
+
+
+def arrow_schema(columns: Sequence[Any]) -> pa.Schema:
+    return pa.schema(
+        [pa.field(c.key, arrow_type(c), nullable=c.nullable) for c in columns]
+    )
+
+
+def read_columns(model: Any, read_model: Any) -> List[Any]:
+    """``model``'s table columns that ``read_model`` exposes, in table order."""
+    return [c for c in model.__table__.columns if c.key in read_model.model_fields]
+
+
+def record_batch(rows: Sequence[Any], schema: pa.Schema) -> pa.RecordBatch:
+    values = list(zip(*rows)) if rows else [()] * len(schema)
+    arrays = []
+    for field, column in zip(schema, values):
+        if pa.types.is_string(field.type):
+            # enums arrive as members; export their values
+            column = [getattr(v, "value", v) for v in column]
+        arrays.append(pa.array(column, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain."""
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _writer(fmt: ExportFormat, sink: _ChunkSink, schema: pa.Schema) -> Any:
+    if fmt is ExportFormat.parquet:
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    return pa.ipc.new_stream(sink, schema)
+
+
+async def _stream(
+    db: Database,
+    stmt: Any,
+    keys: Sequence[Any],
+    fmt: ExportFormat,
+    batch_size: int,
+) -> AsyncIterator[bytes]:
+    """Encode ``stmt`` one keyset page at a time.
+
+    Each page becomes one record batch (one row group for Parquet) and is sent
+    as soon as it is written, so memory stays bounded by ``batch_size``.
+    """
+    schema = arrow_schema(stmt.selected_columns)
+    sink = _ChunkSink()
+    writer = _writer(fmt, sink, schema)
+    cursor: Optional[str] = None
+    while True:
+        rows, cursor = await db.run(paginate, stmt, keys, cursor, batch_size)
+        if rows:
+            writer.write_batch(record_batch(rows, schema))
+            yield sink.drain()
+        if cursor is None:
+            break
+    writer.close()
+    yield sink.drain()
+
+
+def _response(
+    db: Database,
+    stmt: Any,
+    keys: Sequence[Any],
+    fmt: ExportFormat,
+    batch_size: int,
+    name: str,
+) -> StreamingResponse:
+    extension = "parquet" if fmt is ExportFormat.parquet else "arrows"
+    return StreamingResponse(
+        _stream(db, stmt, keys, fmt, batch_size),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{extension}"'},
+    )
+
+
+@router.get("/assets")
+async def export_assets(
+    symbol: Optional[List[str]] = Query(None),
+    format: ExportFormat = ExportFormat.arrow,
+    batch_size: int = Query(50_000, ge=1, le=1_000_000),
+    db: Database = Depends(get_db),
+) -> StreamingResponse:
+    stmt = select(*read_columns(Asset, AssetRead))
+    if symbol:
+        stmt = stmt.where(Asset.symbol.in_([s.upper() for s in symbol]))
+    return _response(db, stmt, (Asset.id,), format, batch_size, "assets")
+
+
+@router.get("/transactions")
+async def export_transactions(
+    symbol: Optional[List[str]] = Query(None),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    format: ExportFormat = ExportFormat.arrow,
+    batch_size: int = Query(50_000, ge=1, le=1_000_000),
+    db: Database = Depends(get_db),
+) -> StreamingResponse:
+    stmt = select(*read_columns(Transaction, TransactionRead), Asset.symbol).join(Asset)
+    if symbol:
+        stmt = stmt.where(Asset.symbol.in_([s.upper() for s in symbol]))
+    if start:
+        stmt = stmt.where(Transaction.date >= start)
+    if end:
+        stmt = stmt.where(Transaction.date <= end)
+    keys = (Transaction.date, Transaction.id)
+    return _response(db, stmt, keys, format, batch_size, "transactions")
+
+
+@router.get("/dividends")
+async def export_dividends(
+    symbol: Optional[List[str]] = Query(None),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    format: ExportFormat = ExportFormat.arrow,
+    batch_size: int = Query(50_000, ge=1, le=1_000_000),
+    db: Database = Depends(get_db),
+) -> StreamingResponse:
+    stmt = select(*read_columns(Dividend, DividendRead), Asset.symbol).join(Asset)
+    if symbol:
+        stmt = stmt.where(Asset.symbol.in_([s.upper() for s in symbol]))
+    if start:
+        stmt = stmt.where(Dividend.date_received >= start)
+    if end:
+        stmt = stmt.where(Dividend.date_received <= end)
+    keys = (Dividend.date_received, Dividend.id)
+    return _response(db, stmt, keys, format, batch_size, "dividends")
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+
+from app.core.db import pool_status
+
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/")
+async def health() -> dict:
+    return {"ok": True}
+
+
+@router.get("/pool")
+async def pool() -> dict:
+    return pool_status()
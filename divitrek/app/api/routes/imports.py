@@ -0,0 +1,133 @@
+import io
+from typing import Any, Dict, List, Set
+
+from fastapi import APIRouter, Depends, File, Query, UploadFile
+from sqlmodel import Session, select
+
+from app.api.deps import Database, get_db
+from app.core.bulk import copy_rows
+from app.core.cache import asset_tag, response_cache
+from app.models.models import (
+    Asset,
+    AssetType,
+    Dividend,
+    ImportReject,
+    ImportResult,
+    Transaction,
+)
+from app.services.dedup import (
+    KeyAssigner,
+    dividend_natural_key,
+    stored_keys,
+    transaction_natural_key,
+)
+from app.services.fidelity import (
+    DIVIDEND,
+    FidelityRow,
+    iter_fidelity_rows,
+    transaction_values,
+)
+from app.services.monthly_income import rebuild_dividend_monthly
+from app.services.positions import rebuild_positions
+
+
+router = APIRouter(prefix="/imports", tags=["imports"])
+
+
+class _BatchLoader:
+    def __init__(self, session: Session, batch_size: int) -> None:
+        self.session = session
+        self.batch_size = batch_size
+        self.result = ImportResult()
+        self.asset_ids: Dict[str, int] = {}
+        self.changed: Set[int] = set()  # assets that got new rows
+        self.keys = KeyAssigner()
+        self.transactions: List[dict] = []
+        self.dividends: List[dict] = []
+
+    def asset_id(self, row: FidelityRow) -> int:
+        asset_id = self.asset_ids.get(row.symbol)
+        if asset_id is not None:
+            return asset_id
+        asset = self.session.exec(
+            select(Asset).where(Asset.symbol == row.symbol)
+        ).first()
+        if asset is None:
+            is_etf = "ETF" in row.description.upper()
+            kind = AssetType.etf if is_etf else AssetType.stock
+            asset = Asset(
+                symbol=row.symbol, name=(row.description or row.symbol)[:128], type=kind
+            )
+            self.session.add(asset)
+            self.session.flush()
+            self.result.assets_created += 1
+        self.asset_ids[row.symbol] = asset.id
+        return asset.id
+
+    def add(self, row: FidelityRow) -> None:
+        asset_id = self.asset_id(row)
+        if row.kind == DIVIDEND:
+            values = {
+                "asset_id": asset_id,
+                "date_received": row.date,
+                "amount_received": row.amount,
+            }
+            values["dedup_key"] = self.keys.key(dividend_natural_key(values))
+            self.dividends.append(values)
+        else:
+            values = {"asset_id": asset_id, **transaction_values(row)}
+            values["dedup_key"] = self.keys.key(transaction_natural_key(values))
+            self.transactions.append(values)
+        if len(self.transactions) + len(self.dividends) >= self.batch_size:
+            self.flush()
+
+    def new_rows(self, column: Any, rows: List[dict]) -> List[dict]:
+        # rows from an earlier, overlapping import are already stored
+        stored = stored_keys(self.session, column, [r["dedup_key"] for r in rows])
+        self.result.duplicates_skipped += len(stored)
+        rows = [r for r in rows if r["dedup_key"] not in stored]
+        self.changed.update(r["asset_id"] for r in rows)
+        return rows
+
+    def flush(self) -> None:
+        transactions = self.new_rows(Transaction.dedup_key, self.transactions)
+        self.result.transactions_inserted += copy_rows(
+            self.session, Transaction.__table__, transactions
+        )
+        dividends = self.new_rows(Dividend.dedup_key, self.dividends)
+        self.result.dividends_inserted += copy_rows(
+            self.session, Dividend.__table__, dividends
+        )
+        self.transactions = []
+        self.dividends = []
+
+
+@router.post("/fidelity", response_model=ImportResult)
+async def import_fidelity(
+    file: UploadFile = File(...),
+    batch_size: int = Query(5000, ge=1, le=100_000),
+    db: Database = Depends(get_db),
+) -> ImportResult:
+    def load(session: Session) -> _BatchLoader:
+        stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        loader = _BatchLoader(session, batch_size)
+        for item in iter_fidelity_rows(stream):
+            loader.result.rows_read += 1
+            if isinstance(item, ImportReject):
+                loader.result.rejects.append(item)
+            else:
+                loader.add(item)
+        loader.flush()
+        rebuild_positions(session, loader.changed)
+        rebuild_dividend_monthly(session, loader.changed)
+        session.commit()
+        return loader
+
+    loader = await db.run(load)
+    tags = ["transactions", "dividends"]
+    if loader.result.assets_created:
+        tags.append("assets")
+    for asset_id in loader.changed:
+        tags += [asset_tag("transactions", asset_id), asset_tag("dividends", asset_id)]
+    await response_cache.invalidate(tags)
+    return loader.result
@@ -0,0 +1,77 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
+from sqlmodel import Session
+
+from app.api.deps import Database, get_db
+from app.api.serialization import validated_json
+from app.core.cache import response_cache
+from app.models.models import (
+    DividendTreatment,
+    HoldingRead,
+    PortfolioReturnsRead,
+    PositionRead,
+)
+from app.services.holdings import compute_holdings
+from app.services.positions import list_positions, rebuild_positions
+from app.services.returns import compute_returns
+
+router = APIRouter(prefix="/portfolio", tags=["portfolio"])
+
+_returns = TypeAdapter(PortfolioReturnsRead)
+
+
+@router.get("/holdings", response_model=List[HoldingRead])
+async def list_holdings(
+    as_of: Optional[date] = None,
+    include_closed: bool = False,
+    db: Database = Depends(get_db),
+) -> List[HoldingRead]:
+    return await db.run(compute_holdings, as_of or date.today(), include_closed)
+
+
+@router.get("/positions", response_model=List[PositionRead])
+async def get_positions(db: Database = Depends(get_db)) -> List[PositionRead]:
+    def read(session: Session) -> List[PositionRead]:
+        positions = list_positions(session)
+        session.commit()
+        return positions
+
+    return await db.run(read)
+
+
+@router.post("/positions/rebuild")
+async def rebuild_position_snapshots(db: Database = Depends(get_db)) -> dict:
+    def rebuild(session: Session) -> dict:
+        count = rebuild_positions(session)
+        session.commit()
+        return {"rebuilt": count}
+
+    return await db.run(rebuild)
+
+
+@router.get("/returns", response_model=PortfolioReturnsRead)
+async def get_returns(
+    request: Request,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    symbol: Optional[List[str]] = Query(None),
+    dividends: DividendTreatment = DividendTreatment.reinvested,
+    db: Database = Depends(get_db),
+) -> Response:
+    # start defaults to the first transaction or dividend
+    end = end or date.today()
+    if start and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    symbols = [s.upper() for s in symbol] if symbol else None
+
+    async def load():
+        returns = await db.run(compute_returns, start, end, dividends, symbols)
+        if returns is None:
+            raise HTTPException(status_code=404, detail="No transactions or dividends")
+        return returns, {}
+
+    tags = ["assets", "transactions", "dividends", "prices"]
+    return await response_cache.respond(request, tags, validated_json(_returns), load)
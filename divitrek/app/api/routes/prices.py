@@ -0,0 +1,61 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
+from sqlmodel import Session
+
+from app.api.deps import Database, get_db
+from app.api.serialization import validated_json
+from app.core.cache import response_cache
+from app.models.models import PriceBarCreate, PriceChangesRead
+from app.services.batch import MAX_BATCH
+from app.services.prices import (
+    DEFAULT_WINDOWS,
+    parse_windows,
+    price_changes,
+    upsert_price_bars,
+)
+
+
+router = APIRouter(prefix="/prices", tags=["prices"])
+
+_changes = TypeAdapter(List[PriceChangesRead])
+
+
+@router.get("/changes", response_model=List[PriceChangesRead])
+async def list_price_changes(
+    request: Request,
+    windows: str = Query(DEFAULT_WINDOWS, description="comma-separated, e.g. 5d,1m"),
+    symbol: Optional[List[str]] = Query(None),
+    as_of: Optional[date] = None,
+    db: Database = Depends(get_db),
+) -> Response:
+    try:
+        lookbacks = parse_windows(windows)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    symbols = [s.upper() for s in symbol] if symbol else None
+
+    async def load():
+        changes = await db.run(price_changes, as_of or date.today(), lookbacks, symbols)
+        return changes, {}
+
+    # the held set follows transactions, the symbols follow assets
+    tags = ["prices", "transactions", "assets"]
+    return await response_cache.respond(request, tags, validated_json(_changes), load)
+
+
+@router.post("/bars")
+async def upsert_bars(
+    bars: List[PriceBarCreate] = Body(..., max_length=MAX_BATCH),
+    db: Database = Depends(get_db),
+) -> dict:
+    def upsert(session: Session) -> int:
+        count = upsert_price_bars(session, bars)
+        session.commit()
+        return count
+
+    count = await db.run(upsert)
+    await response_cache.invalidate(["prices"])
+    return {"upserted": count}
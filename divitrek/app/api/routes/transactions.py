@@ -0,0 +1,72 @@
+from datetime import date
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
+from sqlmodel import Session, select
+
+from app.api.deps import Database, get_db
+from app.api.pagination import DEFAULT_LIMIT, MAX_LIMIT
+from app.api.serialization import (
+    ListFormat,
+    list_response,
+    list_select,
+    validated_json,
+)
+from app.core.cache import asset_tag, response_cache
+from app.models.models import Asset, Transaction, TransactionCreate, TransactionRead
+from app.services.batch import MAX_BATCH, insert_transactions, unknown_assets
+
+
+router = APIRouter(prefix="/transactions", tags=["transactions"])
+
+_transactions = TypeAdapter(List[TransactionRead])
+
+
+@router.get("/", response_model=List[TransactionRead])
+async def list_transactions(
+    request: Request,
+    symbol: Optional[List[str]] = Query(None),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    format: ListFormat = ListFormat.json,
+    db: Database = Depends(get_db),
+) -> Response:
+    stmt = list_select(Transaction, TransactionRead, format)
+    if symbol:
+        symbols = [s.upper() for s in symbol]
+        asset_ids = select(Asset.id).where(Asset.symbol.in_(symbols))
+        stmt = stmt.where(Transaction.asset_id.in_(asset_ids))
+    if start:
+        stmt = stmt.where(Transaction.date >= start)
+    if end:
+        stmt = stmt.where(Transaction.date <= end)
+    keys = (Transaction.date, Transaction.id)
+    return await list_response(
+        request, db, stmt, keys, cursor, limit, format, ["transactions"], _transactions
+    )
+
+
+@router.post("/batch", response_model=List[TransactionRead])
+async def create_transactions(
+    items: List[TransactionCreate] = Body(..., max_length=MAX_BATCH),
+    db: Database = Depends(get_db),
+) -> Response:
+    asset_ids = {item.asset_id for item in items}
+
+    def create(session: Session) -> List[Any]:
+        missing = unknown_assets(session, asset_ids)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Assets not found: {missing}")
+        rows = insert_transactions(session, items)
+        session.commit()
+        return rows
+
+    if not items:
+        return Response(b"[]", media_type="application/json")
+    rows = await db.run(create)
+    tags = [asset_tag("transactions", asset_id) for asset_id in asset_ids]
+    await response_cache.invalidate(["transactions", *tags])
+    return Response(validated_json(_transactions)(rows), media_type="application/json")
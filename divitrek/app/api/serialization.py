@@ -0,0 +1,91 @@
+from enum import Enum
+from functools import partial
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence, Type
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlmodel import SQLModel, select
+
+from app.api.deps import Database
+from app.api.pagination import next_cursor_headers, paginate
+from app.core.cache import response_cache
+
+
+class ListFormat(str, Enum):
+    json = "json"  # validated through the Read model (default)
+    rows = "rows"  # same shape, encoded straight from column tuples
+    columns = "columns"  # {"field": [...], ...}
+    ndjson = "ndjson"  # one object per line, streamed
+
+
+def list_select(model: Type[SQLModel], read_model: Type[SQLModel], fmt: ListFormat):
+    """Select ORM entities for ``json``, plain column tuples for the fast formats."""
+    if fmt is ListFormat.json:
+        return select(model)
+    return select(*[getattr(model, name) for name in read_model.model_fields])
+
+
+def validated_json(adapter: TypeAdapter) -> Callable[[Any], bytes]:
+    def render(data: Any) -> bytes:
+        return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+    return render
+
+
+def render_rows(rows: Sequence[Any]) -> bytes:
+    return orjson.dumps([row._asdict() for row in rows])
+
+
+def render_columns(rows: Sequence[Any], fields: List[str]) -> bytes:
+    columns = zip(*rows) if rows else [()] * len(fields)
+    return orjson.dumps({name: list(values) for name, values in zip(fields, columns)})
+
+
+async def _ndjson(
+    db: Database, stmt: Any, keys: Sequence[Any], cursor: Optional[str], limit: int
+) -> AsyncIterator[bytes]:
+    while True:
+        rows, cursor = await db.run(paginate, stmt, keys, cursor, limit)
+        if rows:
+            yield b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
+        if cursor is None:
+            break
+
+
+async def list_response(
+    request: Request,
+    db: Database,
+    stmt: Any,
+    keys: Sequence[Any],
+    cursor: Optional[str],
+    limit: int,
+    fmt: ListFormat,
+    tags: List[str],
+    adapter: TypeAdapter,
+) -> Response:
+    """Serve one keyset page of ``stmt`` in ``fmt`` through the response cache.
+
+    ``ndjson`` is not cached or paged: it streams every row from ``cursor``
+    onwards, fetching ``limit`` rows per query.
+    """
+    if fmt is ListFormat.ndjson:
+        return StreamingResponse(
+            _ndjson(db, stmt, keys, cursor, limit),
+            media_type="application/x-ndjson",
+        )
+
+    if fmt is ListFormat.rows:
+        render = render_rows
+    elif fmt is ListFormat.columns:
+        fields = [column.key for column in stmt.selected_columns]
+        render = partial(render_columns, fields=fields)
+    else:
+        render = validated_json(adapter)
+
+    async def load():
+        rows, next_cursor = await db.run(paginate, stmt, keys, cursor, limit)
+        return rows, next_cursor_headers(next_cursor)
+
+    return await response_cache.respond(request, tags, render, load)
@@ -0,0 +1,88 @@
+import csv
+import io
+from enum import Enum
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import Table, insert
+from sqlmodel import Session
+
+
+def _copy_value(value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, Enum):
+        return value.name
+    return value
+
+
+def copy_rows(session: Session, table: Table, rows: Sequence[dict]) -> int:
+    """Insert ``rows`` into ``table`` inside the session's current transaction.
+
+    psycopg2 connections stream the rows through ``COPY ... FROM STDIN``; other
+    drivers (including asyncpg in async mode) fall back to a single executemany
+    ``INSERT``.
+    """
+    if not rows:
+        return 0
+    columns: List[str] = list(rows[0].keys())
+    connection = session.connection()
+    if connection.dialect.driver != "psycopg2":
+        connection.execute(insert(table), list(rows))
+        return len(rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[c]) for c in columns])
+    buffer.seek(0)
+
+    preparer = connection.dialect.identifier_preparer
+    sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+        preparer.format_table(table), ", ".join(preparer.quote(c) for c in columns)
+    )
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(sql, buffer)
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+def dialect_insert(session: Session, table: Table) -> Any:
+    """Return an ``INSERT`` for ``table`` that supports ``on_conflict_do_*``."""
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        return pg_insert(table)
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+    return sqlite_insert(table)
+
+
+def insert_returning(
+    session: Session,
+    table: Table,
+    rows: Sequence[dict],
+    columns: Sequence[str],
+    skip_conflicts_on: Optional[str] = None,
+) -> List[Any]:
+    """Insert ``rows`` and return ``columns`` of each new row.
+
+    SQLAlchemy batches the parameter sets into multi-row ``INSERT ... VALUES
+    ... RETURNING`` statements on both PostgreSQL drivers and SQLite. Rows come
+    back in input order, except with ``skip_conflicts_on``: then rows whose
+    value in that unique column is already stored are skipped with ``ON
+    CONFLICT DO NOTHING`` and only the inserted rows are returned, unordered.
+    """
+    if not rows:
+        return []
+    returning = [table.c[name] for name in columns]
+    if skip_conflicts_on is None:
+        stmt = insert(table).returning(*returning, sort_by_parameter_order=True)
+    else:
+        stmt = (
+            dialect_insert(session, table)
+            .on_conflict_do_nothing(index_elements=[skip_conflicts_on])
+            .returning(*returning)
+        )
+    return list(session.execute(stmt, list(rows)))
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    versions: List[int]
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class MemoryStore:
+    """In-process LRU with a per-entry TTL; tag versions live in a dict."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, CacheEntry]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def versions(self, tags: List[str]) -> List[int]:
+        return [self._versions.get(tag, 0) for tag in tags]
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+
+class RedisStore:
+    """Shared store so every API worker sees the same entries and invalidations."""
+
+    def __init__(self, url: str) -> None:
+        import redis.asyncio as redis  # optional dependency
+
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        raw = await self.client.get(f"cache:{key}")
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        data["body"] = data["body"].encode()
+        return CacheEntry(**data)
+
+    async def set(self, key: str, entry: CacheEntry, ttl: float) -> None:
+        data = asdict(entry)
+        data["body"] = entry.body.decode()
+        await self.client.set(f"cache:{key}", json.dumps(data), px=int(ttl * 1000))
+
+    async def versions(self, tags: List[str]) -> List[int]:
+        if not tags:
+            return []
+        values = await self.client.mget([f"tag:{tag}" for tag in tags])
+        return [int(v or 0) for v in values]
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f"tag:{tag}")
+            await pipe.execute()
+
+
+class ResponseCache:
+    """JSON response cache keyed by route and query, invalidated by tags.
+
+    Each entry records the version of every tag it depends on when it was
+    loaded. Writes bump the versions of the tags they affect, so only entries
+    that depend on changed data miss, with no key scanning. Versions are read
+    before loading, which makes an entry filled concurrently with a write stale
+    rather than wrong.
+    """
+
+    def __init__(self, store: Any, ttl: float, enabled: bool = True) -> None:
+        self.store = store
+        self.ttl = ttl
+        self.enabled = enabled
+
+    async def invalidate(self, tags: Iterable[str]) -> None:
+        await self.store.bump(list(tags))
+
+    async def respond(
+        self,
+        request: Request,
+        tags: List[str],
+        render: Callable[[Any], bytes],
+        load: Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]],
+    ) -> Response:
+        key = cache_key(request)
+        entry = await self.store.get(key) if self.enabled else None
+        versions = await self.store.versions(tags)
+        if entry is None or entry.versions != versions:
+            data, headers = await load()
+            body = render(data)
+            entry = CacheEntry(body, make_etag(body), versions, headers)
+            if self.enabled:
+                await self.store.set(key, entry, self.ttl)
+        headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+
+def asset_tag(kind: str, asset_id: int) -> str:
+    return f"{kind}:{asset_id}"
+
+
+def cache_key(request: Request) -> str:
+    query = sorted(request.query_params.multi_items())
+    return f"{request.url.path}?{query}"
+
+
+def make_etag(body: bytes) -> str:
+    return '"{}"'.format(hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def _store() -> Any:
+    if settings.cache_url:
+        return RedisStore(settings.cache_url)
+    return MemoryStore(settings.cache_max_entries)
+
+
+response_cache = ResponseCache(
+    _store(), settings.cache_ttl_seconds, enabled=settings.cache_enabled
+)
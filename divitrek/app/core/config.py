@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -8,6 +10,29 @@ class Settings(BaseSettings):
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     api_reload: bool = True
+    # Serve routes through an async engine instead of the sync threadpool path
+    db_async: bool = False
+    # Defaults to database_url with the asyncpg driver when db_async is set
+    async_database_url: Optional[str] = None
+    # Connection pool, per uvicorn worker (ignored for SQLite)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = False
+    # Read-endpoint response cache; set cache_url (redis://...) to share it
+    # between workers, otherwise each worker keeps its own LRU
+    cache_enabled: bool = True
+    cache_ttl_seconds: float = 60.0
+    cache_max_entries: int = 1024
+    cache_url: Optional[str] = None
+    # Request latency and SQL metrics on /metrics; requests slower than
+    # slow_request_seconds are logged with the statements they issued
+    metrics_enabled: bool = True
+    slow_request_seconds: float = 0.5
+    # PostgreSQL only: partition metric_point by year of as_of. Takes effect
+    # when the table is created; yearly partitions are added on upsert
+    metric_partitions: bool = False
     streamlit_host: str = "0.0.0.0"
     streamlit_port: int = 8501
 
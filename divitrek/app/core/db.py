@@ -1,19 +1,199 @@
+import threading
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Any, Dict, Iterator, Optional, Set
 
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
 
 from app.core.config import settings
+from app.core.metrics import instrument_queries
 
 
-engine = create_engine(settings.database_url, echo=False, pool_pre_ping=True)
+def engine_options(url: str) -> Dict[str, Any]:
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+class PoolMetrics:
+    """Process-wide connection pool counters, including time spent waiting."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "waits": self.waits,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+def _instrument(sync_engine: Engine) -> None:
+    for name, counter in (
+        ("connect", "connects"),
+        ("checkout", "checkouts"),
+        ("checkin", "checkins"),
+    ):
+        event.listen(
+            sync_engine.pool,
+            name,
+            lambda *args, counter=counter: pool_metrics.count(counter),
+        )
+    instrument_queries(sync_engine)
+
+
+engine = create_engine(
+    settings.database_url, echo=False, **engine_options(settings.database_url)
+)
+_instrument(engine)
+
+
+def async_database_url() -> str:
+    if settings.async_database_url:
+        return settings.async_database_url
+    url = make_url(settings.database_url)
+    return url.set(drivername="postgresql+asyncpg").render_as_string(
+        hide_password=False
+    )
+
+
+async_engine: Optional[AsyncEngine] = None
+if settings.db_async:
+    async_engine = create_async_engine(
+        async_database_url(), echo=False, **engine_options(async_database_url())
+    )
+    _instrument(async_engine.sync_engine)
+
+
+def pool_status() -> Dict[str, Any]:
+    """Current pool occupancy for the engine serving requests, plus counters."""
+    pool = (async_engine.sync_engine if async_engine else engine).pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    status.update(pool_metrics.snapshot())
+    return status
+
+
+def add_transaction_action(session: Session) -> bool:
+    """Add ``transaction.action`` to a table created before it existed.
+
+    Rows stored until then get ``buy``, the column's default. Returns whether
+    the column was added.
+    """
+    from app.models.models import Transaction
+
+    connection = session.connection()
+    table = Transaction.__table__
+    columns = {c["name"] for c in inspect(connection).get_columns(table.name)}
+    if "action" in columns:
+        return False
+    action = table.c.action.type
+    if hasattr(action, "create"):
+        action.create(connection, checkfirst=True)  # PostgreSQL's enum type
+    name = connection.dialect.identifier_preparer.format_table(table)
+    kind = action.compile(dialect=connection.dialect)
+    session.execute(
+        text(f"ALTER TABLE {name} ADD COLUMN action {kind} NOT NULL DEFAULT 'buy'")
+    )
+    return True
+
+
+def _has_rows(session: Session, model: Any) -> bool:
+    first = select(*model.__table__.primary_key.columns).limit(1)
+    return session.execute(first).first() is not None
+
+
+def needs_rebuild(
+    session: Session, existing: Set[str], rollup: Any, source: Any
+) -> bool:
+    """Whether ``rollup`` was just created, or is empty while ``source`` is not.
+
+    Rollup tables are kept up to date on every write, so they only need to
+    be rebuilt from history when they start out missing or empty.
+    """
+    if rollup.__table__.name not in existing:
+        return True
+    return not _has_rows(session, rollup) and _has_rows(session, source)
+
+
+def create_missing_indexes(session: Session, existing: Set[str]) -> None:
+    """Create the indexes declared on tables that already existed.
+
+    create_all only indexes the tables it creates, so an index added to a
+    model later would never reach an existing database.
+    """
+    connection = session.connection()
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name in existing:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
 
 
 def init_db() -> None:
     # Import models to register them with SQLModel's metadata
-    from app.models.models import Asset, Transaction, Dividend, Metric
+    from app.models.models import (
+        Asset,
+        Dividend,
+        DividendMonthly,
+        ExDividend,
+        MetricPoint,
+        Position,
+        PriceBar,
+        Transaction,
+    )
 
+    from app.services.asset_metrics import configure_partitions
+    from app.services.dedup import backfill_dedup_keys
+    from app.services.monthly_income import rebuild_dividend_monthly
+    from app.services.positions import rebuild_positions
+
+    existing = set(inspect(engine).get_table_names())
+    configure_partitions(engine)
     SQLModel.metadata.create_all(engine)
+    # create_all does not alter existing tables
+    with Session(engine) as session:
+        add_transaction_action(session)  # before dedup keys, which hash it
+        backfill_dedup_keys(session, only_new_column=True)
+        create_missing_indexes(session, existing)  # once dedup keys are unique
+        if needs_rebuild(session, existing, Position, Transaction):
+            rebuild_positions(session)
+        if needs_rebuild(session, existing, DividendMonthly, Dividend):
+            rebuild_dividend_monthly(session)
+        session.commit()
 
 
 @contextmanager
@@ -0,0 +1,239 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+LOGGED_QUERIES = 50  # statements kept per request for the slow-request log
+POOL_COUNTERS = {"connects", "checkouts", "checkins", "waits", "wait_seconds_total"}
+UNMATCHED = "unmatched"  # route label for 404s, so raw paths never become labels
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: Sequence[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str]) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                text = _label_text(self.labels, labels)
+                lines.append(f"{self.name}{text} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram; buckets are upper bounds, +Inf is implied."""
+
+    def __init__(
+        self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # per label set: [count per bucket..., count above the last], sum
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(
+                labels, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        with self._lock:
+            for labels, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                bounds = [_number(b) for b in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, counts):
+                    cumulative += count
+                    text = _label_text(names, labels + (bound,))
+                    lines.append(f"{self.name}_bucket{text} {cumulative}")
+                text = _label_text(self.labels, labels)
+                lines.append(f"{self.name}_sum{text} {_number(total[0])}")
+                lines.append(f"{self.name}_count{text} {cumulative}")
+        return lines
+
+
+requests_total = Counter(
+    "divitrek_http_requests_total",
+    "HTTP requests by route and status.",
+    ["method", "route", "status"],
+)
+request_duration = Histogram(
+    "divitrek_http_request_duration_seconds",
+    "HTTP request latency by route, including streaming the body.",
+    ["method", "route"],
+    LATENCY_BUCKETS,
+)
+request_queries = Histogram(
+    "divitrek_db_queries_per_request",
+    "SQL statements issued per request.",
+    ["method", "route"],
+    COUNT_BUCKETS,
+)
+query_duration = Histogram(
+    "divitrek_db_query_duration_seconds",
+    "Execution time of each SQL statement, by the route that issued it.",
+    ["method", "route"],
+    QUERY_BUCKETS,
+)
+METRICS = [requests_total, request_duration, request_queries, query_duration]
+
+
+@dataclass
+class RequestStats:
+    durations: List[float] = field(default_factory=list)
+    statements: List[Tuple[float, str]] = field(default_factory=list)
+
+    @property
+    def queries(self) -> int:
+        return len(self.durations)
+
+    @property
+    def query_seconds(self) -> float:
+        return sum(self.durations)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.durations.append(seconds)
+        if len(self.statements) < LOGGED_QUERIES:
+            self.statements.append((seconds, statement))
+
+
+# Set per request by MetricsMiddleware. The object is shared, not copied, so
+# queries run in the threadpool or through run_sync still land on it.
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def _before_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    elapsed = time.perf_counter() - conn.info.pop("query_start")
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+def instrument_queries(sync_engine: Engine) -> None:
+    event.listen(sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_execute)
+
+
+def _route(scope: Dict[str, Any]) -> str:
+    # the router stores the matched route in the scope it was handed
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED
+
+
+def _log_slow(method: str, path: str, seconds: float, stats: RequestStats) -> None:
+    lines = [
+        f"slow request {method} {path}: {seconds * 1000:.1f} ms, "
+        f"{stats.queries} queries ({stats.query_seconds * 1000:.1f} ms in SQL)"
+    ]
+    for elapsed, statement in stats.statements:
+        lines.append(f"  {elapsed * 1000:8.2f} ms  {' '.join(statement.split())}")
+    if stats.queries > len(stats.statements):
+        lines.append(f"  ... {stats.queries - len(stats.statements)} more")
+    logger.warning("\n".join(lines))
+
+
+class MetricsMiddleware:
+    """Per-route latency and SQL counts, plus a log line for slow requests.
+
+    A plain ASGI middleware rather than ``BaseHTTPMiddleware``, so the timing
+    covers streamed bodies and the request's context reaches the DB hooks.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+
+        async def send_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            labels = (scope["method"], _route(scope))
+            requests_total.inc(labels + (str(status),))
+            request_duration.observe(labels, elapsed)
+            request_queries.observe(labels, stats.queries)
+            for seconds in stats.durations:
+                query_duration.observe(labels, seconds)
+            if elapsed >= settings.slow_request_seconds:
+                _log_slow(scope["method"], scope["path"], elapsed, stats)
+
+
+def render_metrics(pool: Optional[Dict[str, Any]] = None) -> str:
+    """Prometheus text exposition of the request metrics and pool counters."""
+    lines: List[str] = []
+    for metric in METRICS:
+        lines += metric.render()
+    for name, value in (pool or {}).items():
+        if isinstance(value, (int, float)):
+            kind = "counter" if name in POOL_COUNTERS else "gauge"
+            lines += [
+                f"# TYPE divitrek_db_pool_{name} {kind}",
+                f"divitrek_db_pool_{name} {_number(value)}",
+            ]
+    return "\n".join(lines) + "\n"
@@ -1,13 +1,37 @@
 from fastapi import FastAPI
 
-from app.api.routes import assets
+from app.api.routes import (
+    asset_metrics,
+    assets,
+    dividends,
+    exports,
+    health,
+    imports,
+    metrics,
+    portfolio,
+    prices,
+    transactions,
+)
+from app.core.config import settings
 from app.core.db import init_db
+from app.core.metrics import MetricsMiddleware
 
 
 def create_app() -> FastAPI:
     init_db()
     application = FastAPI(title="DiviTrek API")
+    if settings.metrics_enabled:
+        application.add_middleware(MetricsMiddleware)
     application.include_router(assets.router)
+    application.include_router(transactions.router)
+    application.include_router(dividends.router)
+    application.include_router(imports.router)
+    application.include_router(exports.router)
+    application.include_router(portfolio.router)
+    application.include_router(prices.router)
+    application.include_router(asset_metrics.router)
+    application.include_router(health.router)
+    application.include_router(metrics.router)
     return application
 
 
@@ -1,7 +1,8 @@
 from datetime import date, datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+from sqlalchemy import Index, PrimaryKeyConstraint, text
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -10,6 +11,15 @@ class AssetType(str, Enum):
     etf = "etf"
 
 
+class DividendCadence(str, Enum):
+    weekly = "weekly"
+    monthly = "monthly"
+    quarterly = "quarterly"
+    semiannual = "semiannual"
+    annual = "annual"
+    irregular = "irregular"
+
+
 class AssetBase(SQLModel):
     symbol: str = Field(index=True, max_length=16)
     name: str = Field(max_length=128)
@@ -22,7 +32,7 @@ class Asset(AssetBase, table=True):
 
     transactions: List["Transaction"] = Relationship(back_populates="asset")
     dividends: List["Dividend"] = Relationship(back_populates="asset")
-    metrics: List["Metric"] = Relationship(back_populates="asset")
+    metrics: List["MetricPoint"] = Relationship(back_populates="asset")
 
 
 class AssetCreate(AssetBase):
@@ -34,16 +44,34 @@ class AssetRead(AssetBase):
     created_at: datetime
 
 
+class TransactionAction(str, Enum):
+    buy = "buy"
+    sell = "sell"
+    reinvestment = "reinvestment"
+
+
 class TransactionBase(SQLModel):
     date: date
+    action: TransactionAction = Field(
+        default=TransactionAction.buy, description="buy, sell or reinvestment"
+    )
     price_per_share: float = Field(gt=0)
     shares: float = Field(description="positive for buy, negative for sell")
     fees: float = 0.0
 
 
 class Transaction(TransactionBase, table=True):
+    __table_args__ = (Index("ix_transaction_asset_id_date", "asset_id", "date", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     asset_id: int = Field(foreign_key="asset.id", index=True)
+    dedup_key: Optional[str] = Field(
+        default=None,
+        max_length=32,
+        unique=True,
+        index=True,
+        description="natural key hash, see app.services.dedup",
+    )
 
     asset: Optional[Asset] = Relationship(back_populates="transactions")
 
@@ -63,8 +91,19 @@ class DividendBase(SQLModel):
 
 
 class Dividend(DividendBase, table=True):
+    __table_args__ = (
+        Index("ix_dividend_asset_id_date_received", "asset_id", "date_received", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     asset_id: int = Field(foreign_key="asset.id", index=True)
+    dedup_key: Optional[str] = Field(
+        default=None,
+        max_length=32,
+        unique=True,
+        index=True,
+        description="natural key hash, see app.services.dedup",
+    )
 
     asset: Optional[Asset] = Relationship(back_populates="dividends")
 
@@ -78,24 +117,265 @@ class DividendRead(DividendBase):
     asset_id: int
 
 
-class MetricBase(SQLModel):
-    key: str = Field(index=True, max_length=64)
-    value: Optional[str] = Field(
-        default=None, description="placeholder for future metrics"
+class ExDividendBase(SQLModel):
+    symbol: str = Field(max_length=16)
+    ex_date: date
+    amount: float = Field(ge=0, description="declared cash per share")
+    pay_date: Optional[date] = None
+
+
+class ExDividend(ExDividendBase, table=True):
+    """Per-share dividend history by symbol and ex-date, as providers list it."""
+
+    __tablename__ = "ex_dividend"
+    __table_args__ = (PrimaryKeyConstraint("symbol", "ex_date"),)
+
+
+class ExDividendCreate(ExDividendBase):
+    pass
+
+
+class DividendMonthly(SQLModel, table=True):
+    """Dividend cash per asset and calendar month, kept current on insert."""
+
+    __tablename__ = "dividend_monthly"
+
+    asset_id: int = Field(foreign_key="asset.id", primary_key=True)
+    month: date = Field(primary_key=True, description="first day of the month")
+    amount: float = 0.0
+    payments: int = 0
+
+
+class PositionBase(SQLModel):
+    shares: float = 0.0
+    buy_shares: float = 0.0
+    buy_cost: float = 0.0
+    dividends_received: float = 0.0
+    ttm_dividends: float = 0.0
+    ttm_as_of: Optional[date] = None
+    last_dividend_date: Optional[date] = None
+
+
+class Position(PositionBase, table=True):
+    asset_id: int = Field(foreign_key="asset.id", primary_key=True)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class PositionRead(PositionBase):
+    asset_id: int
+    symbol: str
+    updated_at: datetime
+
+
+class PriceBarBase(SQLModel):
+    symbol: str = Field(max_length=16)
+    date: date
+    close: Optional[float] = None
+    adj_close: Optional[float] = Field(
+        default=None, description="close adjusted for splits and distributions"
     )
 
 
-class Metric(MetricBase, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
-    asset_id: int = Field(foreign_key="asset.id", index=True)
+class PriceBar(PriceBarBase, table=True):
+    """Daily closes by symbol, not asset, so benchmarks can be stored too."""
+
+    __tablename__ = "price_bar"
+    __table_args__ = (
+        PrimaryKeyConstraint("symbol", "date"),
+        # newest-first lookups, index-only on PostgreSQL
+        Index(
+            "ix_price_bar_symbol_date_desc",
+            "symbol",
+            text("date DESC"),
+            postgresql_include=["close", "adj_close"],
+        ),
+    )
+
+
+class PriceBarCreate(PriceBarBase):
+    pass
+
+
+class PriceChange(SQLModel):
+    start_date: Optional[date]
+    start_price: Optional[float]
+    change: Optional[float]
+    change_pct: Optional[float]
+
+
+class PriceChangesRead(SQLModel):
+    symbol: str
+    last_date: Optional[date]
+    last_price: Optional[float]
+    changes: Dict[str, PriceChange]  # keyed by window, e.g. "1m"
+
+
+class MetricPointBase(SQLModel):
+    metric: str = Field(max_length=64, description="e.g. nav, aum_usd, premium_pct")
+    as_of: date
+    value: float
+
+
+class MetricPoint(MetricPointBase, table=True):
+    # the key is also the per-asset range index; the second serves one metric
+    # across every asset
+    __tablename__ = "metric_point"
+    __table_args__ = (
+        PrimaryKeyConstraint("asset_id", "metric", "as_of"),
+        Index("ix_metric_point_metric_as_of", "metric", "as_of"),
+    )
+
+    asset_id: int = Field(foreign_key="asset.id")
 
     asset: Optional[Asset] = Relationship(back_populates="metrics")
 
 
-class MetricCreate(MetricBase):
+class MetricPointCreate(MetricPointBase):
+    symbol: str = Field(max_length=16)
+
+
+class MetricSeriesRead(SQLModel):
     asset_id: int
+    symbol: str
+    metric: str
+    as_of: List[date]
+    values: List[float]
 
 
-class MetricRead(MetricBase):
-    id: int
+class CostBasisMethod(str, Enum):
+    fifo = "fifo"
+    lifo = "lifo"
+    average = "average"
+
+
+class LotRead(SQLModel):
+    date: date
+    shares: float
+    cost: float
+    cost_per_share: float
+
+
+class CostBasisRead(SQLModel):
+    asset_id: int
+    symbol: str
+    method: CostBasisMethod
+    as_of: date
+    shares: float
+    cost_basis: float
+    average_cost: Optional[float]
+    realized_proceeds: float
+    realized_cost: float
+    realized_gain: float
+    unmatched_shares: float = Field(
+        default=0.0, description="sold with no open lot to match, so not realized"
+    )
+    price: Optional[float] = None
+    market_value: Optional[float] = None
+    unrealized_gain: Optional[float] = None
+    lots: Optional[List[LotRead]] = None
+
+
+class DividendTreatment(str, Enum):
+    reinvested = "reinvested"
+    cash = "cash"
+
+
+class ReturnsRead(SQLModel):
+    asset_id: Optional[int] = Field(default=None, description="None for the total")
+    symbol: Optional[str] = None
+    start_value: float
+    end_value: float
+    contributions: float = Field(description="bought less sold, reinvestments in")
+    dividends: float
+    gain: float
+    xirr: Optional[float] = Field(default=None, description="money-weighted, annual")
+    twr: Optional[float] = Field(default=None, description="time-weighted, total")
+    twr_annualized: Optional[float] = None
+
+
+class PortfolioReturnsRead(SQLModel):
+    start: date
+    end: date
+    dividends: DividendTreatment
+    portfolio: ReturnsRead
+    assets: List[ReturnsRead]
+
+
+class ImportReject(SQLModel):
+    line: int
+    reason: str
+
+
+class ImportResult(SQLModel):
+    rows_read: int = 0
+    assets_created: int = 0
+    transactions_inserted: int = 0
+    dividends_inserted: int = 0
+    duplicates_skipped: int = 0
+    rejects: List[ImportReject] = []
+
+
+class HoldingRead(SQLModel):
+    asset_id: int
+    symbol: str
+    name: str
+    type: AssetType
+    shares: float
+    cost_basis: float
+    average_cost: Optional[float]
+    last_dividend_date: Optional[date]
+    ttm_dividends: float
+    ttm_yield_on_cost: Optional[float]
+
+
+class DividendCalendarRead(SQLModel):
+    symbol: str
+    cadence: DividendCadence
+    payments_per_year: int
+    payments: int
+    median_gap_days: Optional[float]
+    last_pay_date: Optional[date]
+    next_pay_date: Optional[date]
+    expected_amount: Optional[float]
+    last_ex_date: Optional[date]
+    next_ex_date: Optional[date]
+    expected_amount_per_share: Optional[float]
+
+
+class SymbolMonthMatrix(SQLModel):
+    months: List[str]
+    symbols: List[str]
+    amounts: List[List[float]]  # one row per symbol, one column per month
+    totals: List[float]
+
+
+class DividendForecastRead(SymbolMonthMatrix):
+    as_of: date
+
+
+class MonthlyIncomeRead(SymbolMonthMatrix):
+    start: date
+    end: date
+
+
+class ReconciliationStatus(str, Enum):
+    matched = "matched"
+    short = "short"
+    over = "over"
+    missing = "missing"
+    pending = "pending"  # not due yet
+    unexpected = "unexpected"  # cash with no eligible shares or no ex-date
+
+
+class DividendReconciliationRead(SQLModel):
     asset_id: int
+    symbol: str
+    ex_date: Optional[date]
+    pay_date: Optional[date]
+    amount_per_share: Optional[float]
+    shares: float = Field(description="held at the close before the ex-date")
+    expected: float
+    received: float
+    received_date: Optional[date]
+    difference: float  # received - expected
+    status: ReconciliationStatus
@@ -0,0 +1,131 @@
+from datetime import date
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Engine, func, text
+from sqlmodel import Session, select
+
+from app.core.bulk import dialect_insert
+from app.core.config import settings
+from app.models.models import Asset, MetricPoint, MetricPointCreate
+
+MAX_METRICS = 16  # metric names per range query
+
+
+def _partitioned(bind: Any) -> bool:
+    return settings.metric_partitions and bind.dialect.name == "postgresql"
+
+
+def configure_partitions(engine: Engine) -> None:
+    """Have ``create_all`` declare ``metric_point`` partitioned by ``as_of``.
+
+    Only a table created from now on is affected; an existing one stays as
+    it is.
+    """
+    if _partitioned(engine):
+        table = MetricPoint.__table__
+        table.dialect_kwargs["postgresql_partition_by"] = "RANGE (as_of)"
+
+
+def ensure_partitions(session: Session, years: Iterable[int]) -> None:
+    """Create the yearly ``metric_point`` partitions that do not exist yet."""
+    for year in sorted(set(years)):
+        session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS metric_point_{year} "
+                f"PARTITION OF metric_point "
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            )
+        )
+
+
+def asset_ids_by_symbol(session: Session, symbols: Iterable[str]) -> Dict[str, int]:
+    """The first asset of each symbol, for the symbols that have one."""
+    stmt = (
+        select(Asset.symbol, func.min(Asset.id))
+        .where(Asset.symbol.in_(set(symbols)))
+        .group_by(Asset.symbol)
+    )
+    return dict(session.execute(stmt).all())
+
+
+def upsert_metrics(
+    session: Session, points: Iterable[MetricPointCreate]
+) -> Tuple[int, List[str]]:
+    """Store points, replacing the value of any (asset, metric, day) present.
+
+    Returns the number of points written and the symbols with no asset, whose
+    points are skipped. Points repeated within ``points`` keep the last value.
+    """
+    points = list(points)
+    ids = asset_ids_by_symbol(session, (p.symbol.upper() for p in points))
+    rows: Dict[Tuple[int, str, date], Dict[str, Any]] = {}
+    unknown: Set[str] = set()
+    for point in points:
+        symbol = point.symbol.upper()
+        if symbol not in ids:
+            unknown.add(symbol)
+            continue
+        row = {
+            "asset_id": ids[symbol],
+            "metric": point.metric,
+            "as_of": point.as_of,
+            "value": point.value,
+        }
+        rows[row["asset_id"], point.metric, point.as_of] = row
+    if rows:
+        if _partitioned(session.get_bind()):
+            ensure_partitions(session, (day.year for _, _, day in rows))
+        stmt = dialect_insert(session, MetricPoint.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["asset_id", "metric", "as_of"],
+            set_={"value": stmt.excluded.value},
+        )
+        session.execute(stmt, list(rows.values()))
+    return len(rows), sorted(unknown)
+
+
+def metric_series(
+    session: Session,
+    metrics: List[str],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    symbols: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Each asset's points for ``metrics`` as parallel date and value arrays.
+
+    Shaped like MetricSeriesRead. One ordered range scan, on the primary key
+    when ``symbols`` narrows the assets and on the (metric, as_of) index
+    otherwise; rows are selected as table columns and grouped without the
+    ORM, so long histories stay cheap to read.
+    """
+    point, asset = MetricPoint.__table__.c, Asset.__table__.c
+    stmt = (
+        select(asset.id, asset.symbol, point.metric, point.as_of, point.value)
+        .join_from(MetricPoint.__table__, Asset.__table__)
+        .where(point.metric.in_(metrics))
+        .order_by(point.asset_id, point.metric, point.as_of)
+    )
+    if start is not None:
+        stmt = stmt.where(point.as_of >= start)
+    if end is not None:
+        stmt = stmt.where(point.as_of <= end)
+    if symbols:
+        stmt = stmt.where(asset.symbol.in_(symbols))
+
+    series = []
+    for (asset_id, symbol, metric), rows in groupby(
+        session.execute(stmt).all(), key=itemgetter(0, 1, 2)
+    ):
+        _, _, _, days, values = zip(*rows)
+        series.append(
+            {
+                "asset_id": asset_id,
+                "symbol": symbol,
+                "metric": metric,
+                "as_of": list(days),
+                "values": list(values),
+            }
+        )
+    return series
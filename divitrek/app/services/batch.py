@@ -0,0 +1,112 @@
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session, select
+
+from app.core.bulk import insert_returning
+from app.models.models import (
+    Asset,
+    Dividend,
+    DividendCreate,
+    DividendRead,
+    Transaction,
+    TransactionCreate,
+    TransactionRead,
+)
+from app.services.dedup import (
+    KeyAssigner,
+    NaturalKey,
+    dedup_key,
+    dividend_natural_key,
+    transaction_natural_key,
+    with_dividend_keys,
+    with_transaction_keys,
+)
+from app.services.monthly_income import apply_dividend_months
+from app.services.positions import apply_dividends, apply_transactions
+
+MAX_BATCH = 10_000  # records per batch request
+
+
+def unknown_assets(session: Session, asset_ids: Iterable[int]) -> List[int]:
+    """The ids in ``asset_ids`` with no asset, checked in one ``IN`` query."""
+    wanted = set(asset_ids)
+    found = set(session.exec(select(Asset.id).where(Asset.id.in_(wanted))))
+    return sorted(wanted - found)
+
+
+def insert_transactions(
+    session: Session,
+    items: Sequence[TransactionCreate],
+    keys: Optional[KeyAssigner] = None,
+) -> List[Any]:
+    """Insert ``items`` that are not stored yet and fold them into positions.
+
+    Returns the inserted rows with TransactionRead's columns, in id order;
+    records whose dedup key already exists are skipped by the database.
+    """
+    values = with_transaction_keys((item.model_dump() for item in items), keys)
+    rows = insert_returning(
+        session,
+        Transaction.__table__,
+        values,
+        list(TransactionRead.model_fields),
+        skip_conflicts_on="dedup_key",
+    )
+    rows.sort(key=lambda row: row.id)
+    apply_transactions(session, rows)
+    return rows
+
+
+def insert_dividends(
+    session: Session,
+    items: Sequence[DividendCreate],
+    keys: Optional[KeyAssigner] = None,
+) -> List[Any]:
+    """Insert new ``items``, then update positions and the monthly rollup."""
+    values = with_dividend_keys((item.model_dump() for item in items), keys)
+    rows = insert_returning(
+        session,
+        Dividend.__table__,
+        values,
+        list(DividendRead.model_fields),
+        skip_conflicts_on="dedup_key",
+    )
+    rows.sort(key=lambda row: row.id)
+    apply_dividends(session, rows)
+    apply_dividend_months(session, rows)
+    return rows
+
+
+def _repeat_keys(natural: NaturalKey, repeat: int) -> KeyAssigner:
+    keys = KeyAssigner()
+    keys.seen[natural] = repeat
+    return keys
+
+
+def insert_transaction(
+    session: Session, item: TransactionCreate, repeat: int = 0
+) -> Tuple[Any, bool]:
+    """Store ``item`` as the ``repeat``-th identical trade; True if inserted.
+
+    A create with a ``repeat`` already stored is a retry and returns the stored
+    row, so a second real trade identical to the first passes ``repeat=1``.
+    """
+    natural = transaction_natural_key(item.model_dump())
+    rows = insert_transactions(session, [item], _repeat_keys(natural, repeat))
+    if rows:
+        return rows[0], True
+    key = dedup_key(natural, repeat)
+    stmt = select(Transaction).where(Transaction.dedup_key == key)
+    return session.exec(stmt).one(), False
+
+
+def insert_dividend(
+    session: Session, item: DividendCreate, repeat: int = 0
+) -> Tuple[Any, bool]:
+    """Store ``item`` as the ``repeat``-th identical payment; True if inserted."""
+    natural = dividend_natural_key(item.model_dump())
+    rows = insert_dividends(session, [item], _repeat_keys(natural, repeat))
+    if rows:
+        return rows[0], True
+    key = dedup_key(natural, repeat)
+    return session.exec(select(Dividend).where(Dividend.dedup_key == key)).one(), False
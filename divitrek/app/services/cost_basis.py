@@ -0,0 +1,271 @@
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.models.models import (
+    Asset,
+    CostBasisMethod,
+    CostBasisRead,
+    LotRead,
+    PriceBar,
+    Transaction,
+)
+
+EPSILON = 1e-9  # shares below this are treated as zero
+EVENT_COLUMNS = ["asset_id", "date", "shares", "price_per_share", "fees"]
+
+
+def _per_asset_cumsum(
+    values: np.ndarray, starts: np.ndarray, sizes: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Global running total and the same total restarted at each asset."""
+    total = np.cumsum(values)
+    base = np.repeat(total[starts] - values[starts], sizes)
+    return total, total - base
+
+
+def _lifo(
+    first: List[bool], bought: List[float], matched: List[float], unit: List[float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Realized cost per row and open shares per buy, newest lot first."""
+    realized = [0.0] * len(bought)
+    open_shares = list(bought)
+    stack: List[int] = []
+    for k, need in enumerate(matched):
+        if first[k]:
+            stack = []
+        if bought[k] > 0:
+            stack.append(k)
+        while need > EPSILON and stack:
+            top = stack[-1]
+            take = min(open_shares[top], need)
+            realized[k] += take * unit[top]
+            open_shares[top] -= take
+            need -= take
+            if open_shares[top] <= EPSILON:
+                open_shares[top] = 0.0
+                stack.pop()
+    return np.array(realized), np.array(open_shares)
+
+
+def _average(
+    first: List[bool], bought: List[float], cost: List[float], matched: List[float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Realized cost per row and the pooled cost per share left at each row."""
+    realized = [0.0] * len(bought)
+    pooled = [0.0] * len(bought)
+    shares = total = 0.0
+    for k, sold in enumerate(matched):
+        if first[k]:
+            shares = total = 0.0
+        shares += bought[k]
+        total += cost[k]
+        if sold > 0 and shares > EPSILON:
+            realized[k] = total * min(sold / shares, 1.0)
+            shares -= sold
+            total -= realized[k]
+            if shares <= EPSILON:
+                shares = total = 0.0
+        pooled[k] = total / shares if shares > EPSILON else 0.0
+    return np.array(realized), np.array(pooled)
+
+
+def match_lots(events: pd.DataFrame, method: CostBasisMethod) -> pd.DataFrame:
+    """Match every sell to buy lots, for all assets in ``events`` at once.
+
+    ``events`` has EVENT_COLUMNS, sorted by asset and then trade order; buys
+    (including DRIP reinvestments) have positive shares. Returns it with the
+    matched and unmatched shares, realized proceeds and cost of each sell, and
+    the shares and cost still open in each buy lot.
+
+    Which shares a sell consumes does not depend on the method: it takes what
+    is open, and anything beyond that is unmatched rather than opening a short
+    lot. With per-asset running totals U (bought) and S (sold), consumed
+    shares follow ``C = min(C_prev + sold, U)``, which unrolls to ``S +
+    min(0, cummin(U - S))``, so it is a few array passes over the whole
+    history. FIFO is then an interpolation on the cumulative cost curve.
+    LIFO and average cost are inherently sequential and run one loop over
+    plain floats, which stays linear in the number of lots.
+    """
+    df = events.reset_index(drop=True)
+    if df.empty:
+        columns = ["matched", "unmatched", "proceeds", "realized_cost"]
+        return df.assign(**{c: [] for c in columns + ["open_shares", "open_cost"]})
+    group = df["asset_id"].to_numpy()
+    first = np.r_[True, group[1:] != group[:-1]]
+    starts = np.flatnonzero(first)
+    sizes = np.diff(np.r_[starts, len(df)])
+    last = starts + sizes - 1
+
+    shares = df["shares"].to_numpy(float)
+    gross = np.abs(shares) * df["price_per_share"].to_numpy(float)
+    fees = df["fees"].to_numpy(float)
+    buy = shares > EPSILON
+    bought = np.where(buy, shares, 0.0)
+    sold = np.where(shares < -EPSILON, -shares, 0.0)
+    cost = np.where(buy, gross + fees, 0.0)
+
+    global_bought, asset_bought = _per_asset_cumsum(bought, starts, sizes)
+    _, asset_sold = _per_asset_cumsum(sold, starts, sizes)
+    headroom = pd.Series(asset_bought - asset_sold).groupby(group).cummin()
+    consumed = asset_sold + np.minimum(headroom.to_numpy(), 0.0)
+    before = np.r_[0.0, consumed[:-1]]
+    before[starts] = 0.0
+    matched = np.maximum(consumed - before, 0.0)
+    share = np.divide(matched, sold, out=np.zeros_like(sold), where=sold > 0)
+
+    # FIFO open shares: each lot covers a stretch of the global bought axis
+    offset = global_bought - asset_bought
+    used = offset + np.repeat(consumed[last], sizes)
+    fifo_open = np.where(buy, np.clip(global_bought - used, 0.0, bought), 0.0)
+    unit = np.divide(cost, bought, out=np.zeros_like(cost), where=buy)
+
+    if method == CostBasisMethod.fifo:
+        curve_x = np.r_[0.0, global_bought[buy]]
+        curve_y = np.r_[0.0, np.cumsum(cost)[buy]]
+        realized = np.interp(offset + consumed, curve_x, curve_y) - np.interp(
+            offset + before, curve_x, curve_y
+        )
+        open_shares, open_cost = fifo_open, fifo_open * unit
+    elif method == CostBasisMethod.lifo:
+        realized, open_shares = _lifo(
+            first.tolist(), bought.tolist(), matched.tolist(), unit.tolist()
+        )
+        open_cost = open_shares * unit
+    else:
+        realized, pooled = _average(
+            first.tolist(), bought.tolist(), cost.tolist(), matched.tolist()
+        )
+        # lots keep their FIFO share counts, all at the final pooled cost
+        open_shares = fifo_open
+        open_cost = fifo_open * np.repeat(pooled[last], sizes)
+
+    return df.assign(
+        matched=matched,
+        unmatched=sold - matched,
+        proceeds=(gross - fees) * share,
+        realized_cost=np.where(sold > 0, realized, 0.0),
+        open_shares=open_shares,
+        open_cost=open_cost,
+    )
+
+
+def load_events(
+    session: Session,
+    as_of: date,
+    asset_ids: Optional[List[int]] = None,
+    symbols: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Every transaction up to ``as_of`` in trade order, from one query.
+
+    Selects table columns rather than ORM attributes so rows skip the ORM's
+    loading layer, which otherwise takes longer than the matching itself.
+    """
+    tx = Transaction.__table__.c
+    stmt = (
+        select(tx.asset_id, tx.date, tx.shares, tx.price_per_share, tx.fees)
+        .where(tx.date <= as_of)
+        .order_by(tx.asset_id, tx.date, tx.id)
+    )
+    if asset_ids is not None:
+        stmt = stmt.where(tx.asset_id.in_(asset_ids))
+    if symbols:
+        ids = select(Asset.id).where(Asset.symbol.in_(symbols))
+        stmt = stmt.where(tx.asset_id.in_(ids))
+    return pd.DataFrame(session.execute(stmt).all(), columns=EVENT_COLUMNS)
+
+
+def last_closes(
+    session: Session, as_of: date, symbols: Sequence[str]
+) -> Dict[str, float]:
+    """Each symbol's last close on or before ``as_of``, from one query.
+
+    Unadjusted, as returns._bar_marks values positions: an adjusted close
+    understates what shares were worth on any past day.
+    """
+    bar = PriceBar.__table__.c
+    price = func.coalesce(bar.close, bar.adj_close)
+    latest = (
+        select(bar.symbol, func.max(bar.date).label("date"))
+        .where(bar.symbol.in_(symbols), bar.date <= as_of, price.is_not(None))
+        .group_by(bar.symbol)
+        .subquery()
+    )
+    stmt = select(bar.symbol, price).join_from(
+        PriceBar.__table__,
+        latest,
+        (bar.symbol == latest.c.symbol) & (bar.date == latest.c.date),
+    )
+    return dict(session.execute(stmt).all())
+
+
+def compute_cost_basis(
+    session: Session,
+    as_of: date,
+    method: CostBasisMethod,
+    asset_ids: Optional[List[int]] = None,
+    symbols: Optional[List[str]] = None,
+    include_lots: bool = False,
+) -> List[CostBasisRead]:
+    """Open lots and realized/unrealized gains for every traded asset.
+
+    Unrealized gain uses the last close on or before ``as_of`` and is left
+    empty for symbols without one.
+    """
+    matched = match_lots(load_events(session, as_of, asset_ids, symbols), method)
+    if matched.empty:
+        return []
+    totals = matched.groupby("asset_id")[
+        ["open_shares", "open_cost", "proceeds", "realized_cost", "unmatched"]
+    ].sum()
+    ids = [int(asset_id) for asset_id in totals.index]
+    names = dict(
+        session.exec(select(Asset.id, Asset.symbol).where(Asset.id.in_(ids))).all()
+    )
+    last_prices = last_closes(session, as_of, sorted(set(names.values())))
+    lots = matched[matched["open_shares"] > EPSILON].groupby("asset_id")
+
+    results = []
+    for asset_id, row in totals.iterrows():
+        symbol = names[asset_id]
+        shares = row["open_shares"] if row["open_shares"] > EPSILON else 0.0
+        cost_basis = row["open_cost"] if shares else 0.0
+        price = last_prices.get(symbol)
+        market_value = shares * price if price is not None else None
+        result = CostBasisRead(
+            asset_id=int(asset_id),
+            symbol=symbol,
+            method=method,
+            as_of=as_of,
+            shares=shares,
+            cost_basis=cost_basis,
+            average_cost=cost_basis / shares if shares else None,
+            realized_proceeds=row["proceeds"],
+            realized_cost=row["realized_cost"],
+            realized_gain=row["proceeds"] - row["realized_cost"],
+            unmatched_shares=row["unmatched"],
+            price=price,
+            market_value=market_value,
+            unrealized_gain=(
+                market_value - cost_basis if market_value is not None else None
+            ),
+        )
+        if include_lots:
+            open_lots = (
+                lots.get_group(asset_id) if asset_id in lots.groups else matched[:0]
+            )
+            result.lots = [
+                LotRead(
+                    date=lot.date,
+                    shares=lot.open_shares,
+                    cost=lot.open_cost,
+                    cost_per_share=lot.open_cost / lot.open_shares,
+                )
+                for lot in open_lots.itertuples()
+            ]
+        results.append(result)
+    return sorted(results, key=lambda r: r.symbol)
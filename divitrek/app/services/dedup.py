@@ -0,0 +1,151 @@
+"""Idempotency keys for transactions and dividends.
+
+A record's natural key is its asset, date and amounts (plus the action for a
+transaction). Two records with the same natural key can both be real, e.g. two
+identical buys on one day, so the stored ``dedup_key`` hashes the natural key
+together with its repeat number within the batch being written: the second
+identical buy in an export gets key #1 every time that export is loaded, and
+an overlapping re-import only adds rows whose keys are not stored yet.
+"""
+import hashlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import inspect, text
+from sqlmodel import Session, select
+
+from app.models.models import Dividend, Transaction
+
+NaturalKey = Tuple[Any, ...]
+IN_CHUNK = 1000  # keys per IN query; SQLite caps bound parameters
+
+
+def _number(value: float) -> str:
+    return repr(float(value))
+
+
+def _value(value: Any) -> Any:
+    return getattr(value, "value", value)  # enums by value, like the API
+
+
+def transaction_natural_key(values: Mapping[str, Any]) -> NaturalKey:
+    return (
+        values["asset_id"],
+        values["date"].isoformat(),
+        _value(values["action"]),
+        _number(values["shares"]),
+        _number(values["price_per_share"]),
+        _number(values.get("fees") or 0.0),
+    )
+
+
+def dividend_natural_key(values: Mapping[str, Any]) -> NaturalKey:
+    return (
+        values["asset_id"],
+        values["date_received"].isoformat(),
+        _number(values["amount_received"]),
+    )
+
+
+def dedup_key(natural: NaturalKey, repeat: int = 0) -> str:
+    raw = "|".join(str(part) for part in natural + (repeat,))
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+class KeyAssigner:
+    """Numbers repeats of a natural key across everything one write adds."""
+
+    def __init__(self) -> None:
+        self.seen: Counter = Counter()
+
+    def key(self, natural: NaturalKey) -> str:
+        repeat = self.seen[natural]
+        self.seen[natural] += 1
+        return dedup_key(natural, repeat)
+
+
+def with_transaction_keys(
+    rows: Iterable[Dict[str, Any]], keys: Optional[KeyAssigner] = None
+) -> List[Dict[str, Any]]:
+    keys = keys or KeyAssigner()
+    return [
+        {**row, "dedup_key": keys.key(transaction_natural_key(row))} for row in rows
+    ]
+
+
+def with_dividend_keys(
+    rows: Iterable[Dict[str, Any]], keys: Optional[KeyAssigner] = None
+) -> List[Dict[str, Any]]:
+    keys = keys or KeyAssigner()
+    return [{**row, "dedup_key": keys.key(dividend_natural_key(row))} for row in rows]
+
+
+def stored_keys(session: Session, column: Any, keys: Sequence[str]) -> set:
+    """The subset of ``keys`` already present in ``column``."""
+    found: set = set()
+    for i in range(0, len(keys), IN_CHUNK):
+        chunk = keys[i : i + IN_CHUNK]
+        found.update(session.exec(select(column).where(column.in_(chunk))))
+    return found
+
+
+def backfill_dedup_keys(
+    session: Session, only_new_column: bool = False
+) -> Dict[str, int]:
+    """Key rows stored without a ``dedup_key``, adding the column if needed.
+
+    Rows are numbered in id order and skip keys already in use, so existing
+    duplicates get distinct keys and the unique index can be built over them.
+    With ``only_new_column`` tables that already have the column are left
+    alone, which keeps the check cheap enough for startup.
+    """
+    counts: Dict[str, int] = {}
+    connection = session.connection()
+    for model, natural_key in (
+        (Transaction, transaction_natural_key),
+        (Dividend, dividend_natural_key),
+    ):
+        table = model.__table__
+        columns = {c["name"] for c in inspect(connection).get_columns(table.name)}
+        if "dedup_key" in columns and only_new_column:
+            continue
+        if "dedup_key" not in columns:
+            name = connection.dialect.identifier_preparer.format_table(table)
+            session.execute(
+                text(f"ALTER TABLE {name} ADD COLUMN dedup_key VARCHAR(32)")
+            )
+
+        rows = session.execute(select(*table.c).order_by(table.c.id)).mappings().all()
+        used = {row["dedup_key"] for row in rows if row["dedup_key"]}
+        keys = KeyAssigner()
+        updates = []
+        for row in rows:
+            if row["dedup_key"]:
+                continue
+            key = keys.key(natural_key(row))
+            while key in used:
+                key = keys.key(natural_key(row))
+            used.add(key)
+            updates.append({"id": row["id"], "dedup_key": key})
+        if updates:
+            session.bulk_update_mappings(model, updates)
+        for index in table.indexes:
+            if "dedup_key" in index.columns:
+                index.create(connection, checkfirst=True)
+        counts[table.name] = len(updates)
+    return counts
+
+
+def main() -> None:
+    from app.core.db import get_session, init_db
+
+    init_db()
+    with get_session() as session:
+        counts = backfill_dedup_keys(session)
+        session.commit()
+    for table, count in counts.items():
+        print(f"Keyed {count} {table} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+from datetime import date
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlmodel import Session, select
+
+from app.models.models import (
+    Asset,
+    Dividend,
+    DividendCadence,
+    DividendCalendarRead,
+    DividendForecastRead,
+    ExDividend,
+    Position,
+)
+
+# Upper bound on the median gap between payments, in days, for each cadence
+GAP_LIMITS = [
+    (DividendCadence.weekly, 10),
+    (DividendCadence.monthly, 45),
+    (DividendCadence.quarterly, 135),
+    (DividendCadence.semiannual, 240),
+    (DividendCadence.annual, 400),
+]
+STEP_MONTHS = {
+    DividendCadence.monthly: 1,
+    DividendCadence.quarterly: 3,
+    DividendCadence.semiannual: 6,
+    DividendCadence.annual: 12,
+}
+PAYMENTS_PER_YEAR = {
+    DividendCadence.weekly: 52,
+    DividendCadence.monthly: 12,
+    DividendCadence.quarterly: 4,
+    DividendCadence.semiannual: 2,
+    DividendCadence.annual: 1,
+    DividendCadence.irregular: 0,
+}
+RECENT_GAPS = 6  # cadence follows the latest payments if a fund changes it
+RECENT_AMOUNTS = 3  # expected amount is the median of the last three
+MAX_GAP_SPREAD = 0.5  # gap IQR over median above this is irregular
+STALE_GAPS = 2  # a payer silent for this many of its gaps has stopped
+EPSILON = 1e-9  # shares below this are treated as zero
+
+
+def until(events: pd.DataFrame, as_of: pd.Timestamp) -> pd.DataFrame:
+    return events[pd.to_datetime(events["date"]) <= as_of]
+
+
+def event_stats(events: pd.DataFrame) -> pd.DataFrame:
+    """Per-symbol count, last date, recent gap profile and expected amount.
+
+    ``events`` has ``symbol``, ``date`` and ``amount`` columns. Everything is
+    one sort plus grouped aggregations, whatever the number of symbols.
+    """
+    columns = ["payments", "last_date", "median_gap", "gap_spread", "amount"]
+    events = events.dropna(subset=["symbol", "date"])
+    if events.empty:
+        empty = pd.DataFrame(columns=columns, index=pd.Index([], name="symbol"))
+        return empty.astype({"last_date": "datetime64[ns]", "median_gap": float})
+    df = events.assign(date=pd.to_datetime(events["date"])).sort_values(
+        ["symbol", "date"], kind="stable"
+    )
+    df["gap"] = df.groupby("symbol")["date"].diff().dt.days
+    by_symbol = df.groupby("symbol")
+    recent = df.groupby("symbol").tail(RECENT_GAPS).groupby("symbol")["gap"]
+    q1, q3 = recent.quantile(0.25), recent.quantile(0.75)
+    median_gap = recent.median()
+    stats = pd.DataFrame(
+        {
+            "payments": by_symbol.size(),
+            "last_date": by_symbol["date"].max(),
+            "median_gap": median_gap,
+            "gap_spread": (q3 - q1) / median_gap,
+            "amount": df.groupby("symbol")
+            .tail(RECENT_AMOUNTS)
+            .groupby("symbol")["amount"]
+            .median(),
+        }
+    )
+    return stats[columns]
+
+
+def classify_cadence(median_gap: pd.Series, gap_spread: pd.Series) -> pd.Series:
+    conditions = [median_gap <= limit for _, limit in GAP_LIMITS]
+    choices = [cadence.value for cadence, _ in GAP_LIMITS]
+    cadence = np.select(conditions, choices, DividendCadence.irregular.value)
+    irregular = median_gap.isna() | (gap_spread > MAX_GAP_SPREAD)
+    cadence = np.where(irregular, DividendCadence.irregular.value, cadence)
+    return pd.Series(cadence, index=median_gap.index).map(DividendCadence)
+
+
+def add_months(dates: pd.Series, months: pd.Series) -> pd.Series:
+    # Same day of month, clamped to the month's length like EDATE
+    total = dates.dt.year * 12 + dates.dt.month - 1 + months.astype(int)
+    first = pd.to_datetime(
+        pd.DataFrame({"year": total // 12, "month": total % 12 + 1, "day": 1})
+    )
+    day = np.minimum(dates.dt.day, first.dt.days_in_month)
+    return first + pd.to_timedelta(day - 1, unit="D")
+
+
+def next_dates(last: pd.Series, cadence: pd.Series, as_of: pd.Timestamp) -> pd.Series:
+    """First scheduled date after ``last`` that is on or after ``as_of``.
+
+    Irregular payers have no schedule and get NaT.
+    """
+    nxt = pd.Series(pd.NaT, index=last.index, dtype="datetime64[ns]")
+    known = last.notna()
+
+    weekly = known & (cadence == DividendCadence.weekly)
+    if weekly.any():
+        days = (as_of - last[weekly]).dt.days
+        steps = np.maximum(1, np.ceil(days / 7))
+        nxt[weekly] = last[weekly] + pd.to_timedelta(steps * 7, unit="D")
+
+    step = cadence.map(STEP_MONTHS)
+    monthly = known & step.notna()
+    if monthly.any():
+        start, step = last[monthly], step[monthly]
+        # months until as_of, counting a partial month as a whole one
+        elapsed = (
+            (as_of.year - start.dt.year) * 12
+            + (as_of.month - start.dt.month)
+            + (as_of.day > start.dt.day)
+        )
+        nxt[monthly] = add_months(start, np.maximum(1, np.ceil(elapsed / step)) * step)
+    return nxt
+
+
+def dividend_calendar(
+    payments: pd.DataFrame,
+    ex_dividends: Optional[pd.DataFrame] = None,
+    as_of: Optional[date] = None,
+) -> pd.DataFrame:
+    """Cadence, next dates and expected amounts for every symbol in one pass.
+
+    ``payments`` holds cash received (``symbol``, ``date``, ``amount``) and
+    drives the pay dates and expected cash. ``ex_dividends`` optionally holds
+    per-share history keyed by ex-date; when a symbol has a regular ex-date
+    history its cadence wins, since it does not depend on how long the
+    position has been held.
+    """
+    as_of_ts = pd.Timestamp(as_of or date.today())
+    if ex_dividends is None:
+        ex_dividends = payments.iloc[0:0]
+    pay = event_stats(until(payments, as_of_ts))
+    ex = event_stats(until(ex_dividends, as_of_ts))
+    frame = pay.join(ex, how="outer", lsuffix="_pay", rsuffix="_ex")
+
+    pay_cadence = classify_cadence(frame["median_gap_pay"], frame["gap_spread_pay"])
+    ex_cadence = classify_cadence(frame["median_gap_ex"], frame["gap_spread_ex"])
+    use_ex = ex_cadence != DividendCadence.irregular
+    cadence = ex_cadence.where(use_ex, pay_cadence)
+    median_gap = frame["median_gap_ex"].where(use_ex, frame["median_gap_pay"])
+
+    result = pd.DataFrame(
+        {
+            "cadence": cadence,
+            "payments_per_year": cadence.map(PAYMENTS_PER_YEAR).astype(int),
+            "payments": frame["payments_pay"].fillna(0).astype(int),
+            "median_gap_days": median_gap,
+            "last_pay_date": frame["last_date_pay"],
+            "next_pay_date": next_dates(frame["last_date_pay"], cadence, as_of_ts),
+            "expected_amount": frame["amount_pay"],
+            "last_ex_date": frame["last_date_ex"],
+            "next_ex_date": next_dates(frame["last_date_ex"], cadence, as_of_ts),
+            "expected_amount_per_share": frame["amount_ex"],
+        },
+        index=frame.index,
+    )
+    return result.rename_axis("symbol").reset_index()
+
+
+def dividend_forecast(
+    calendar: pd.DataFrame, as_of: Optional[date] = None, months: int = 12
+) -> pd.DataFrame:
+    """Projected cash per symbol (rows) and calendar month (columns).
+
+    The first column is as_of's month. Every symbol with a schedule is expanded
+    to its upcoming pay dates in one repeat, and the dates are binned by month
+    with a single pivot. Each payment is the symbol's expected amount. Symbols
+    whose last payment is more than STALE_GAPS of their gaps before as_of
+    are left out, since they have stopped paying.
+    """
+    as_of_ts = pd.Timestamp(as_of or date.today())
+    periods = pd.period_range(as_of_ts, periods=months, freq="M")
+    cal = calendar.dropna(subset=["next_pay_date", "expected_amount"])
+    silent = (as_of_ts - cal["last_pay_date"]).dt.days
+    stopped = silent > STALE_GAPS * cal["median_gap_days"]
+    cal = cal[(cal["payments_per_year"] > 0) & ~stopped].reset_index(drop=True)
+    if cal.empty:
+        return pd.DataFrame(0.0, index=pd.Index([], name="symbol"), columns=periods)
+
+    per_symbol = np.ceil(cal["payments_per_year"] * months / 12).astype(int) + 1
+    rows = cal.loc[cal.index.repeat(per_symbol)]
+    k = rows.groupby(level=0).cumcount()
+    weekly = rows["cadence"] == DividendCadence.weekly
+    step = rows["cadence"].map(STEP_MONTHS).fillna(0).astype(int)
+    # count months from the last payment so month-end dates do not drift
+    last, nxt = rows["last_pay_date"], rows["next_pay_date"]
+    offset = (nxt.dt.year - last.dt.year) * 12 + (nxt.dt.month - last.dt.month)
+    pay_dates = add_months(last, offset + k * step).where(
+        ~weekly, nxt + pd.to_timedelta(k * 7, unit="D")
+    )
+    rows = rows.assign(month=pay_dates.dt.to_period("M"))
+    rows = rows[rows["month"] <= periods[-1]]
+    matrix = rows.pivot_table(
+        index="symbol", columns="month", values="expected_amount", aggfunc="sum"
+    )
+    return matrix.reindex(columns=periods, fill_value=0.0).fillna(0.0)
+
+
+def dividend_events(
+    session: Session, symbols: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    stmt = (
+        select(Asset.symbol, Dividend.date_received, Dividend.amount_received)
+        .select_from(Dividend)
+        .join(Asset)
+    )
+    if symbols is not None:
+        stmt = stmt.where(Asset.symbol.in_(symbols))
+    rows = session.exec(stmt).all()
+    return pd.DataFrame(rows, columns=["symbol", "date", "amount"])
+
+
+def ex_dividend_events(
+    session: Session, symbols: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Stored per-share history of the assets' symbols, like dividend_events."""
+    stmt = select(ExDividend.symbol, ExDividend.ex_date, ExDividend.amount).where(
+        ExDividend.symbol.in_(select(Asset.symbol))
+    )
+    if symbols is not None:
+        stmt = stmt.where(ExDividend.symbol.in_(symbols))
+    rows = session.exec(stmt).all()
+    return pd.DataFrame(rows, columns=["symbol", "date", "amount"])
+
+
+def compute_calendar(
+    session: Session, as_of: date, symbols: Optional[Sequence[str]] = None
+) -> List[DividendCalendarRead]:
+    calendar = dividend_calendar(
+        dividend_events(session, symbols),
+        ex_dividend_events(session, symbols),
+        as_of=as_of,
+    )
+    for column in ("last_pay_date", "next_pay_date", "last_ex_date", "next_ex_date"):
+        calendar[column] = calendar[column].dt.date
+    calendar = calendar.astype(object).where(calendar.notna(), None)
+    fields = list(DividendCalendarRead.model_fields)
+    return [DividendCalendarRead(**row) for row in calendar[fields].to_dict("records")]
+
+
+def compute_forecast(
+    session: Session,
+    as_of: date,
+    months: int = 12,
+    symbols: Optional[Sequence[str]] = None,
+) -> DividendForecastRead:
+    """Projected income of the assets held now, optionally only ``symbols``."""
+    stmt = (
+        select(Asset.symbol)
+        .distinct()
+        .join(Position, Position.asset_id == Asset.id)
+        .where(Position.shares > EPSILON)
+    )
+    if symbols:
+        stmt = stmt.where(Asset.symbol.in_(symbols))
+    held = list(session.exec(stmt).all())
+    calendar = dividend_calendar(
+        dividend_events(session, held),
+        ex_dividend_events(session, held),
+        as_of=as_of,
+    )
+    matrix = dividend_forecast(calendar, as_of, months)
+    return DividendForecastRead(
+        as_of=as_of,
+        months=[str(period) for period in matrix.columns],
+        symbols=list(matrix.index),
+        amounts=matrix.to_numpy().round(2).tolist(),
+        totals=matrix.sum().round(2).tolist(),
+    )
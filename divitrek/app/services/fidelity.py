@@ -0,0 +1,154 @@
+import csv
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Iterator, Optional, TextIO, Union
+
+from app.models.models import ImportReject, TransactionAction
+
+HEADER_MARKER = "Run Date"
+DATE_FORMATS = ("%m/%d/%y", "%m/%d/%Y", "%Y-%m-%d")
+DIVIDEND = "dividend"
+LEADING_VERBS = (
+    ("DIVIDEND RECEIVED", DIVIDEND),
+    ("REINVESTMENT", TransactionAction.reinvestment.value),
+    ("YOU BOUGHT", TransactionAction.buy.value),
+    ("YOU SOLD", TransactionAction.sell.value),
+)
+
+
+@dataclass
+class FidelityRow:
+    line: int
+    kind: str  # a TransactionAction value or DIVIDEND
+    symbol: str
+    description: str
+    date: date
+    quantity: float
+    price: Optional[float]
+    amount: float
+
+
+def classify_action(action: str) -> Optional[str]:
+    # The leading verb first: the security's name follows it and may contain
+    # any of these words, e.g. a sale of a BUYWRITE fund
+    text = action.upper().strip()
+    for verb, kind in LEADING_VERBS:
+        if text.startswith(verb):
+            return kind
+    # Otherwise the same precedence as the Action_Type column in the workbook
+    if "DIVIDEND RECEIVED" in text:
+        return DIVIDEND
+    if "REINVESTMENT" in text:
+        return TransactionAction.reinvestment.value
+    if "BOUGHT" in text or "BUY" in text:
+        return TransactionAction.buy.value
+    if "SOLD" in text or "SELL" in text:
+        return TransactionAction.sell.value
+    return None
+
+
+def parse_date(value: str) -> Optional[date]:
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_number(value: Optional[str]) -> Optional[float]:
+    value = (value or "").strip().replace(",", "").replace("$", "")
+    if not value or value == "--":
+        return None
+    return float(value)
+
+
+def iter_fidelity_rows(stream: TextIO) -> Iterator[Union[FidelityRow, ImportReject]]:
+    """Yield parsed rows or rejects from a Fidelity account history export.
+
+    Leading banner lines before the header and the trailing disclaimer text are
+    skipped; every other row that cannot be loaded is reported as a reject.
+    """
+    reader = csv.reader(stream)
+    index: dict = {}
+    for row in reader:
+        if row and row[0].strip().lstrip("\ufeff") == HEADER_MARKER:
+            index = {name.strip().lstrip("\ufeff"): i for i, name in enumerate(row)}
+            break
+    if not index:
+        yield ImportReject(line=reader.line_num, reason="Fidelity header not found")
+        return
+
+    def cell(row: list, name: str) -> str:
+        i = index.get(name)
+        return row[i] if i is not None and i < len(row) else ""
+
+    for row in reader:
+        line = reader.line_num
+        if not any(v.strip() for v in row):
+            continue
+        if len(row) == 1 or not (cell(row, "Symbol").strip() or cell(row, "Action")):
+            continue  # footer notes
+        run_date = parse_date(cell(row, "Run Date"))
+        if run_date is None:
+            yield ImportReject(line=line, reason="invalid Run Date")
+            continue
+        kind = classify_action(cell(row, "Action"))
+        if kind is None:
+            yield ImportReject(line=line, reason="unsupported action")
+            continue
+        symbol = cell(row, "Symbol").strip().upper()
+        if not symbol or len(symbol) > 16:
+            yield ImportReject(line=line, reason="invalid symbol")
+            continue
+        try:
+            quantity = parse_number(cell(row, "Quantity")) or 0.0
+            price = parse_number(cell(row, "Price ($)"))
+            amount = parse_number(cell(row, "Amount ($)"))
+        except ValueError:
+            yield ImportReject(line=line, reason="invalid number")
+            continue
+        if amount is None:
+            yield ImportReject(line=line, reason="missing Amount ($)")
+            continue
+        if kind == DIVIDEND:
+            if amount < 0:
+                yield ImportReject(line=line, reason="negative dividend amount")
+                continue
+        else:
+            if quantity == 0:
+                yield ImportReject(line=line, reason="zero quantity")
+                continue
+            if not price:
+                price = abs(amount / quantity)
+            if price <= 0:
+                yield ImportReject(line=line, reason="invalid price")
+                continue
+        yield FidelityRow(
+            line=line,
+            kind=kind,
+            symbol=symbol,
+            description=cell(row, "Description").strip(),
+            date=run_date,
+            quantity=quantity,
+            price=price,
+            amount=amount,
+        )
+
+
+def transaction_values(row: FidelityRow) -> dict:
+    shares = abs(row.quantity)
+    gross = shares * (row.price or 0.0)
+    if row.kind == TransactionAction.sell.value:
+        fees = gross - abs(row.amount)
+        shares = -shares
+    else:
+        fees = abs(row.amount) - gross
+    return {
+        "date": row.date,
+        "action": TransactionAction(row.kind),
+        "price_per_share": row.price,
+        "shares": shares,
+        "fees": round(max(fees, 0.0), 2),
+    }
@@ -0,0 +1,99 @@
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy import Select, and_, case, func
+from sqlmodel import Session, select
+
+from app.models.models import Asset, Dividend, HoldingRead, Transaction
+
+
+def ttm_start(as_of: date) -> date:
+    # Matches EDATE(AsOfDate, -12) + 1 in the workbook
+    try:
+        year_ago = as_of.replace(year=as_of.year - 1)
+    except ValueError:  # Feb 29
+        year_ago = as_of.replace(year=as_of.year - 1, day=28)
+    return year_ago + timedelta(days=1)
+
+
+def transaction_totals(as_of: Optional[date] = None) -> Select:
+    bought = Transaction.shares > 0
+    cost = Transaction.shares * Transaction.price_per_share + Transaction.fees
+    stmt = select(
+        Transaction.asset_id,
+        func.sum(Transaction.shares).label("shares"),
+        func.sum(case((bought, Transaction.shares), else_=0.0)).label("buy_shares"),
+        func.sum(case((bought, cost), else_=0.0)).label("buy_cost"),
+    ).group_by(Transaction.asset_id)
+    if as_of is not None:
+        stmt = stmt.where(Transaction.date <= as_of)
+    return stmt
+
+
+def dividend_totals(as_of: Optional[date] = None) -> Select:
+    # Without as_of every row is totalled and the TTM window ends today
+    ttm_end = as_of or date.today()
+    in_ttm = and_(
+        Dividend.date_received >= ttm_start(ttm_end), Dividend.date_received <= ttm_end
+    )
+    stmt = select(
+        Dividend.asset_id,
+        func.max(Dividend.date_received).label("last_date"),
+        func.sum(Dividend.amount_received).label("total"),
+        func.sum(case((in_ttm, Dividend.amount_received), else_=0.0)).label("ttm"),
+    ).group_by(Dividend.asset_id)
+    if as_of is not None:
+        stmt = stmt.where(Dividend.date_received <= as_of)
+    return stmt
+
+
+def compute_holdings(
+    session: Session, as_of: date, include_closed: bool = False
+) -> List[HoldingRead]:
+    """Net shares, cost and trailing-twelve-month income for every asset.
+
+    Transactions and dividends are each aggregated once per asset and joined to
+    the asset table, so the database does a single grouped pass per table
+    instead of one SUMIFS scan per symbol.
+    """
+    tx = transaction_totals(as_of).subquery()
+    div = dividend_totals(as_of).subquery()
+    stmt = (
+        select(
+            Asset.id,
+            Asset.symbol,
+            Asset.name,
+            Asset.type,
+            func.coalesce(tx.c.shares, 0.0),
+            func.coalesce(tx.c.buy_shares, 0.0),
+            func.coalesce(tx.c.buy_cost, 0.0),
+            div.c.last_date,
+            func.coalesce(div.c.ttm, 0.0),
+        )
+        .outerjoin(tx, tx.c.asset_id == Asset.id)
+        .outerjoin(div, div.c.asset_id == Asset.id)
+        .order_by(Asset.symbol)
+    )
+
+    holdings = []
+    for row in session.exec(stmt):
+        asset_id, symbol, name, kind, shares, buy_shares, buy_cost, last, ttm = row
+        if not include_closed and abs(shares) < 1e-9:
+            continue
+        average_cost = buy_cost / buy_shares if buy_shares > 0 else None
+        cost_basis = shares * average_cost if average_cost is not None else 0.0
+        holdings.append(
+            HoldingRead(
+                asset_id=asset_id,
+                symbol=symbol,
+                name=name,
+                type=kind,
+                shares=shares,
+                cost_basis=cost_basis,
+                average_cost=average_cost,
+                last_dividend_date=last,
+                ttm_dividends=ttm,
+                ttm_yield_on_cost=ttm / cost_basis if cost_basis > 0 else None,
+            )
+        )
+    return holdings
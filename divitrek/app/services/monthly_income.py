@@ -0,0 +1,138 @@
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert
+from sqlmodel import Session, select
+
+from app.core.bulk import dialect_insert
+from app.models.models import Asset, Dividend, DividendMonthly, MonthlyIncomeRead
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    total = month.year * 12 + month.month - 1 + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _month_of(session: Session, column: Any) -> Any:
+    if session.get_bind().dialect.name == "postgresql":
+        return cast(func.date_trunc("month", column), Date)
+    return func.date(column, "start of month")
+
+
+def apply_dividend_months(session: Session, divs: Iterable[Any]) -> None:
+    """Add dividends (anything with Dividend's columns) to their months."""
+    totals: Dict[Tuple[int, date], Dict[str, Any]] = {}
+    for div in divs:
+        month = month_start(div.date_received)
+        row = totals.setdefault(
+            (div.asset_id, month),
+            {"asset_id": div.asset_id, "month": month, "amount": 0.0, "payments": 0},
+        )
+        row["amount"] += div.amount_received
+        row["payments"] += 1
+    if not totals:
+        return
+    table = DividendMonthly.__table__
+    stmt = dialect_insert(session, table).values(list(totals.values()))
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["asset_id", "month"],
+            set_={
+                "amount": table.c.amount + stmt.excluded.amount,
+                "payments": table.c.payments + stmt.excluded.payments,
+            },
+        )
+    )
+
+
+def apply_dividend_month(session: Session, div: Dividend) -> None:
+    apply_dividend_months(session, [div])
+
+
+def rebuild_dividend_monthly(
+    session: Session, asset_ids: Optional[Iterable[int]] = None
+) -> int:
+    """Recompute the rollup from the dividend table, for all or only some assets."""
+    asset_filter = list(asset_ids) if asset_ids is not None else None
+    clear = delete(DividendMonthly)
+    if asset_filter is not None:
+        clear = clear.where(DividendMonthly.asset_id.in_(asset_filter))
+    session.execute(clear)
+
+    month = _month_of(session, Dividend.date_received)
+    source = select(
+        Dividend.asset_id,
+        month,
+        func.sum(Dividend.amount_received),
+        func.count(),
+    ).group_by(Dividend.asset_id, month)
+    if asset_filter is not None:
+        source = source.where(Dividend.asset_id.in_(asset_filter))
+    columns = ["asset_id", "month", "amount", "payments"]
+    result = session.execute(
+        insert(DividendMonthly.__table__).from_select(columns, source)
+    )
+    return result.rowcount
+
+
+def month_range(start: date, end: date) -> List[date]:
+    months, month = [], month_start(start)
+    while month <= end:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def monthly_income(
+    session: Session,
+    start: date,
+    end: date,
+    symbols: Optional[Sequence[str]] = None,
+) -> MonthlyIncomeRead:
+    """Symbol x month income matrix for the months from ``start`` to ``end``.
+
+    Reads one rollup row per asset and month, so the cost depends on the
+    window and the number of assets, not on how many dividends are stored.
+    """
+    months = month_range(start, end)
+    stmt = (
+        select(Asset.symbol, DividendMonthly.month, DividendMonthly.amount)
+        .join(Asset, Asset.id == DividendMonthly.asset_id)
+        .where(DividendMonthly.month >= month_start(start))
+        .where(DividendMonthly.month <= end)
+        .order_by(Asset.symbol)
+    )
+    if symbols:
+        stmt = stmt.where(Asset.symbol.in_(symbols))
+
+    column = {month: i for i, month in enumerate(months)}
+    matrix: Dict[str, List[float]] = {}
+    for symbol, month, amount in session.exec(stmt):
+        matrix.setdefault(symbol, [0.0] * len(months))[column[month]] += amount
+    totals = [sum(row[i] for row in matrix.values()) for i in range(len(months))]
+    return MonthlyIncomeRead(
+        start=month_start(start),
+        end=end,
+        months=[month.strftime("%Y-%m") for month in months],
+        symbols=list(matrix),
+        amounts=[[round(v, 2) for v in row] for row in matrix.values()],
+        totals=[round(v, 2) for v in totals],
+    )
+
+
+def main() -> None:
+    from app.core.db import get_session, init_db
+
+    init_db()
+    with get_session() as session:
+        count = rebuild_dividend_monthly(session)
+        session.commit()
+    print(f"Rebuilt {count} monthly dividend rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import case, delete, func, insert, literal, or_, update
+from sqlmodel import Session, select
+
+from app.core.bulk import dialect_insert
+from app.models.models import (
+    Asset,
+    Dividend,
+    Position,
+    PositionRead,
+    Transaction,
+)
+from app.services.holdings import dividend_totals, transaction_totals, ttm_start
+
+
+def _increment(session: Session, rows: List[Dict[str, Any]]) -> None:
+    """Add each row's deltas to its asset's snapshot.
+
+    One atomic upsert for all rows, so concurrent writers never lose an update.
+    Rows need distinct ``asset_id``s and the same keys; ``last_dividend_date``
+    is kept as the later of the stored and incoming dates.
+    """
+    if not rows:
+        return
+    table = Position.__table__
+    today, now = date.today(), datetime.utcnow()
+    stmt = dialect_insert(session, table).values(
+        [{"ttm_as_of": today, "updated_at": now, **row} for row in rows]
+    )
+    deltas = [
+        name for name in rows[0] if name not in ("asset_id", "last_dividend_date")
+    ]
+    set_: Dict[str, Any] = {
+        name: table.c[name] + stmt.excluded[name] for name in deltas
+    }
+    set_["updated_at"] = stmt.excluded.updated_at
+    if "last_dividend_date" in rows[0]:
+        current = table.c.last_dividend_date
+        incoming = stmt.excluded.last_dividend_date
+        set_["last_dividend_date"] = case(
+            (current.is_(None), incoming), (incoming > current, incoming), else_=current
+        )
+    session.execute(stmt.on_conflict_do_update(index_elements=["asset_id"], set_=set_))
+
+
+def apply_transactions(session: Session, txs: Iterable[Any]) -> None:
+    """Fold transactions (anything with Transaction's columns) into snapshots."""
+    totals: Dict[int, Dict[str, Any]] = {}
+    for tx in txs:
+        row = totals.setdefault(
+            tx.asset_id,
+            {
+                "asset_id": tx.asset_id,
+                "shares": 0.0,
+                "buy_shares": 0.0,
+                "buy_cost": 0.0,
+            },
+        )
+        row["shares"] += tx.shares
+        if tx.shares > 0:
+            row["buy_shares"] += tx.shares
+            row["buy_cost"] += tx.shares * tx.price_per_share + tx.fees
+    _increment(session, list(totals.values()))
+
+
+def apply_transaction(session: Session, tx: Transaction) -> None:
+    apply_transactions(session, [tx])
+
+
+def apply_dividends(session: Session, divs: Iterable[Any]) -> None:
+    """Fold dividends (anything with Dividend's columns) into snapshots."""
+    # TTM is relative to today; a snapshot refreshed on another day is
+    # recomputed by refresh_ttm before it is read.
+    today = date.today()
+    start = ttm_start(today)
+    totals: Dict[int, Dict[str, Any]] = {}
+    for div in divs:
+        row = totals.setdefault(
+            div.asset_id,
+            {
+                "asset_id": div.asset_id,
+                "dividends_received": 0.0,
+                "ttm_dividends": 0.0,
+                "last_dividend_date": div.date_received,
+            },
+        )
+        row["dividends_received"] += div.amount_received
+        if start <= div.date_received <= today:
+            row["ttm_dividends"] += div.amount_received
+        row["last_dividend_date"] = max(row["last_dividend_date"], div.date_received)
+    _increment(session, list(totals.values()))
+
+
+def apply_dividend(session: Session, div: Dividend) -> None:
+    apply_dividends(session, [div])
+
+
+def rebuild_positions(
+    session: Session, asset_ids: Optional[Iterable[int]] = None
+) -> int:
+    """Recompute snapshots from the full history, for all or only some assets."""
+    asset_filter = list(asset_ids) if asset_ids is not None else None
+    clear = delete(Position)
+    if asset_filter is not None:
+        clear = clear.where(Position.asset_id.in_(asset_filter))
+    session.execute(clear)
+
+    tx = transaction_totals().subquery()
+    div = dividend_totals().subquery()
+    source = (
+        select(
+            Asset.id,
+            func.coalesce(tx.c.shares, 0.0),
+            func.coalesce(tx.c.buy_shares, 0.0),
+            func.coalesce(tx.c.buy_cost, 0.0),
+            func.coalesce(div.c.total, 0.0),
+            func.coalesce(div.c.ttm, 0.0),
+            literal(date.today()),
+            div.c.last_date,
+            literal(datetime.utcnow()),
+        )
+        .outerjoin(tx, tx.c.asset_id == Asset.id)
+        .outerjoin(div, div.c.asset_id == Asset.id)
+    )
+    if asset_filter is not None:
+        source = source.where(Asset.id.in_(asset_filter))
+    columns = [
+        "asset_id",
+        "shares",
+        "buy_shares",
+        "buy_cost",
+        "dividends_received",
+        "ttm_dividends",
+        "ttm_as_of",
+        "last_dividend_date",
+        "updated_at",
+    ]
+    result = session.execute(insert(Position.__table__).from_select(columns, source))
+    return result.rowcount
+
+
+def refresh_ttm(session: Session, as_of: date) -> None:
+    window = (
+        select(func.coalesce(func.sum(Dividend.amount_received), 0.0))
+        .where(
+            Dividend.asset_id == Position.asset_id,
+            Dividend.date_received >= ttm_start(as_of),
+            Dividend.date_received <= as_of,
+        )
+        .scalar_subquery()
+    )
+    session.execute(
+        update(Position)
+        .where(or_(Position.ttm_as_of.is_(None), Position.ttm_as_of != as_of))
+        .values(ttm_dividends=window, ttm_as_of=as_of)
+    )
+
+
+def list_positions(session: Session) -> List[PositionRead]:
+    refresh_ttm(session, date.today())
+    rows = session.exec(
+        select(Position, Asset.symbol)
+        .join(Asset, Asset.id == Position.asset_id)
+        .order_by(Asset.symbol)
+    )
+    return [
+        PositionRead(**position.model_dump(), symbol=symbol)
+        for position, symbol in rows
+    ]
+
+
+def main() -> None:
+    from app.core.db import get_session, init_db
+
+    init_db()
+    with get_session() as session:
+        count = rebuild_positions(session)
+        session.commit()
+    print(f"Rebuilt {count} position snapshots")
+
+
+if __name__ == "__main__":
+    main()
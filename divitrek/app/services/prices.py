@@ -0,0 +1,189 @@
+import calendar
+import re
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import String, func, literal, true, union_all
+from sqlmodel import Session, select
+
+from app.core.bulk import dialect_insert
+from app.models.models import (
+    Asset,
+    Position,
+    PriceBar,
+    PriceBarCreate,
+    PriceChange,
+    PriceChangesRead,
+)
+
+DEFAULT_WINDOWS = "5d,1m,3m,6m,1y"
+MAX_WINDOWS = 12
+_WINDOW = re.compile(r"^(\d{1,3})([dwmy])$")
+
+
+def parse_windows(spec: str) -> List[str]:
+    """Split ``"5d,1m,1y"`` into windows; d, w, m and y are calendar units."""
+    windows = [w.strip().lower() for w in spec.split(",") if w.strip()]
+    if not windows:
+        raise ValueError("at least one window is required")
+    if len(windows) > MAX_WINDOWS:
+        raise ValueError(f"at most {MAX_WINDOWS} windows are allowed")
+    for window in windows:
+        match = _WINDOW.match(window)
+        if not match or int(match.group(1)) == 0:
+            raise ValueError(f"invalid window {window!r}, expected e.g. 5d, 2w, 1m, 1y")
+    return list(dict.fromkeys(windows))
+
+
+def _months_before(day: date, months: int) -> date:
+    total = day.year * 12 + day.month - 1 - months
+    year, month = total // 12, total % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def window_start(as_of: date, window: str) -> date:
+    """The date ``window`` before ``as_of``; month ends clamp, like EDATE."""
+    count, unit = int(window[:-1]), window[-1]
+    if unit == "d":
+        return as_of - timedelta(days=count)
+    if unit == "w":
+        return as_of - timedelta(weeks=count)
+    return _months_before(as_of, count * 12 if unit == "y" else count)
+
+
+def _price() -> Any:
+    # raw closes, like returns._bar_marks: a stored adjusted close is only as
+    # current as the fetch that wrote it, so bars loaded at different times
+    # would mix adjustment bases
+    return func.coalesce(PriceBar.close, PriceBar.adj_close)
+
+
+def _bar_on_or_before(symbol: Any, day: date) -> Any:
+    return (
+        select(PriceBar.date, _price().label("price"))
+        .where(PriceBar.symbol == symbol, PriceBar.date <= day)
+        .order_by(PriceBar.date.desc())
+        .limit(1)
+    )
+
+
+def _change(last: Optional[float], start: Optional[float]) -> Dict[str, Any]:
+    if last is None or start is None:
+        return {"change": None, "change_pct": None}
+    change = last - start
+    return {"change": change, "change_pct": change / start * 100 if start else None}
+
+
+def price_changes(
+    session: Session,
+    as_of: date,
+    windows: Sequence[str],
+    symbols: Optional[List[str]] = None,
+) -> List[PriceChangesRead]:
+    """Last price and its change over each window, for every held symbol.
+
+    One statement for the whole portfolio: each (symbol, cutoff) pair is a
+    newest-first seek on ``ix_price_bar_symbol_date_desc``, through ``LATERAL``
+    joins on PostgreSQL and correlated subqueries on SQLite, which has no
+    ``LATERAL``. ``symbols`` replaces the held set and need not be assets, so
+    benchmarks work too.
+    """
+    if symbols:
+        requested = [
+            select(literal(symbol, String).label("symbol"))
+            for symbol in dict.fromkeys(symbols)
+        ]
+        held = union_all(*requested).subquery("held")
+    else:
+        held = (
+            select(Asset.symbol)
+            .distinct()
+            .join(Position, Position.asset_id == Asset.id)
+            .where(func.abs(Position.shares) >= 1e-9)
+            .subquery("held")
+        )
+
+    cutoffs = [as_of] + [window_start(as_of, window) for window in windows]
+    source: Any = held
+    columns: List[Any] = []
+    if session.get_bind().dialect.name == "postgresql":
+        for i, cutoff in enumerate(cutoffs):
+            bar = _bar_on_or_before(held.c.symbol, cutoff).lateral(f"bar_{i}")
+            source = source.outerjoin(bar, true())
+            columns += [bar.c.date, bar.c.price]
+    else:
+        for cutoff in cutoffs:
+            bar = _bar_on_or_before(held.c.symbol, cutoff)
+            columns += [
+                bar.with_only_columns(PriceBar.date).scalar_subquery(),
+                bar.with_only_columns(_price()).scalar_subquery(),
+            ]
+    stmt = select(held.c.symbol, *columns).select_from(source).order_by(held.c.symbol)
+
+    results = []
+    for symbol, last_date, last_price, *starts in session.execute(stmt):
+        changes = {}
+        for i, window in enumerate(windows):
+            start_date, start_price = starts[2 * i], starts[2 * i + 1]
+            changes[window] = PriceChange(
+                start_date=start_date,
+                start_price=start_price,
+                **_change(last_price, start_price),
+            )
+        results.append(
+            PriceChangesRead(
+                symbol=symbol,
+                last_date=last_date,
+                last_price=last_price,
+                changes=changes,
+            )
+        )
+    return results
+
+
+def upsert_price_bars(session: Session, bars: Iterable[PriceBarCreate]) -> int:
+    """Insert bars, replacing the closes of any (symbol, date) already stored."""
+    rows = [{**bar.model_dump(), "symbol": bar.symbol.upper()} for bar in bars]
+    if not rows:
+        return 0
+    table = PriceBar.__table__
+    stmt = dialect_insert(session, table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["symbol", "date"],
+        set_={"close": stmt.excluded.close, "adj_close": stmt.excluded.adj_close},
+    )
+    session.execute(stmt, rows)
+    return len(rows)
+
+
+def read_price_cache(path: str) -> List[PriceBarCreate]:
+    """Bars from the SQLite cache ``scripts/price_cache.py`` keeps."""
+    with closing(sqlite3.connect(path)) as conn:
+        rows = conn.execute("SELECT symbol, date, close, adj_close FROM price_bar")
+        return [
+            PriceBarCreate(
+                symbol=symbol,
+                date=date.fromisoformat(day),
+                close=close,
+                adj_close=adj_close,
+            )
+            for symbol, day, close, adj_close in rows
+        ]
+
+
+def main() -> None:
+    from app.core.db import get_session, init_db
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "price_cache.sqlite"
+    init_db()
+    with get_session() as session:
+        count = upsert_price_bars(session, read_price_cache(path))
+        session.commit()
+    print(f"Loaded {count} price bars from {path}")
+
+
+if __name__ == "__main__":
+    main()
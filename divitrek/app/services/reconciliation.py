@@ -0,0 +1,265 @@
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlmodel import Session, select
+
+from app.core.bulk import dialect_insert
+from app.models.models import (
+    Asset,
+    Dividend,
+    DividendReconciliationRead,
+    ExDividend,
+    ExDividendCreate,
+    ReconciliationStatus,
+    Transaction,
+)
+
+EPSILON = 1e-9  # shares below this are treated as zero
+DEFAULT_TOLERANCE = 0.02  # relative gap between expected and received cash
+MIN_TOLERANCE = 0.01  # absolute slack, so sub-cent rounding never flags
+MAX_PAY_LAG_DAYS = 60  # cash later than this after an ex-date is not its payment
+DEFAULT_PAY_LAG_DAYS = 30  # assumed lag for symbols with no declared or paid one
+GRACE_DAYS = 7  # an unpaid dividend is missing this long after it was due
+_DAY_SPAN = 1 << 20  # days per asset in the combined (asset, day) sort key
+
+
+def upsert_ex_dividends(session: Session, items: Iterable[ExDividendCreate]) -> int:
+    """Store per-share history, replacing any (symbol, ex-date) already stored."""
+    rows = {}
+    for item in items:
+        row = {**item.model_dump(), "symbol": item.symbol.upper()}
+        rows[row["symbol"], row["ex_date"]] = row
+    if not rows:
+        return 0
+    stmt = dialect_insert(session, ExDividend.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["symbol", "ex_date"],
+        set_={"amount": stmt.excluded.amount, "pay_date": stmt.excluded.pay_date},
+    )
+    session.execute(stmt, list(rows.values()))
+    return len(rows)
+
+
+def _keys(asset_ids: np.ndarray, dates: pd.Series) -> np.ndarray:
+    days = dates.to_numpy("datetime64[D]").astype(np.int64)
+    return asset_ids.astype(np.int64) * _DAY_SPAN + days
+
+
+def shares_before(
+    trades: pd.DataFrame, asset_ids: np.ndarray, dates: pd.Series
+) -> np.ndarray:
+    """Shares each asset held at the close before each date, in one search.
+
+    ``trades`` has ``asset_id``, ``date`` and signed ``shares``. Running
+    totals restart per asset, and every (asset, date) pair is a single sorted
+    key, so one ``searchsorted`` finds the last trade before each date for all
+    assets at once.
+    """
+    if trades.empty or not len(asset_ids):
+        return np.zeros(len(asset_ids))
+    trades = trades.sort_values(["asset_id", "date"], kind="stable")
+    held = trades.groupby("asset_id")["shares"].cumsum().to_numpy(float)
+    trade_assets = trades["asset_id"].to_numpy()
+    trade_keys = _keys(trade_assets, trades["date"])
+    last = np.searchsorted(trade_keys, _keys(asset_ids, dates), side="left") - 1
+    found = (last >= 0) & (trade_assets[np.maximum(last, 0)] == asset_ids)
+    shares = np.where(found, held[np.maximum(last, 0)], 0.0)
+    return np.where(shares > EPSILON, shares, 0.0)
+
+
+def reconcile(
+    ex_dividends: pd.DataFrame,
+    trades: pd.DataFrame,
+    received: pd.DataFrame,
+    as_of: date,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> pd.DataFrame:
+    """Expected against received dividend cash, for every asset and ex-date.
+
+    ``ex_dividends`` has ``asset_id``, ``ex_date``, ``pay_date`` and per-share
+    ``amount``; ``trades`` has ``asset_id``, ``date`` and ``shares``;
+    ``received`` has ``asset_id``, ``date`` and ``amount``. Shares held before
+    each ex-date come from :func:`shares_before`. Each payment is matched to
+    the asset's latest ex-date on or before it with one ``merge_asof``, so the
+    whole history of every symbol is reconciled in a few array passes.
+
+    Returns one row per ex-date that was eligible or paid, with the expected
+    and received cash and a ReconciliationStatus, plus one ``unexpected`` row
+    for each payment with no ex-date to match. Payments before an asset's
+    first known ex-date are left out, since the history cannot explain them.
+    """
+    as_of_ts = pd.Timestamp(as_of)
+    ex = ex_dividends[ex_dividends["ex_date"] <= as_of_ts]
+    ex = ex.sort_values(["asset_id", "ex_date"], kind="stable").reset_index(drop=True)
+    asset_ids = ex["asset_id"].to_numpy()
+    ex = ex.assign(
+        event=np.arange(len(ex)),
+        shares=shares_before(trades, asset_ids, ex["ex_date"]),
+    )
+    ex["expected"] = ex["shares"] * ex["amount"]
+
+    first_ex = ex.groupby("asset_id")["ex_date"].min()
+    paid = received[received["date"] <= as_of_ts]
+    paid = paid[paid["date"] >= paid["asset_id"].map(first_ex)]
+    matched = pd.merge_asof(
+        paid.sort_values("date", kind="stable"),
+        ex[["asset_id", "ex_date", "event"]].sort_values("ex_date", kind="stable"),
+        left_on="date",
+        right_on="ex_date",
+        by="asset_id",
+        direction="backward",
+        tolerance=pd.Timedelta(days=MAX_PAY_LAG_DAYS),
+    )
+    hits = matched[matched["event"].notna()]
+    got = hits.groupby("event").agg(
+        received=("amount", "sum"), received_date=("date", "max")
+    )
+    got.index = got.index.astype(int)
+    ex = ex.join(got, on="event")
+    ex["received"] = ex["received"].fillna(0.0)
+
+    # unpaid dividends fall due at the declared pay date, or after the
+    # asset's usual lag between ex-date and cash
+    lag = (ex["received_date"] - ex["ex_date"]).dt.days.groupby(ex["asset_id"])
+    lag_days = lag.transform("median").fillna(DEFAULT_PAY_LAG_DAYS)
+    due = ex["pay_date"].fillna(ex["ex_date"] + pd.to_timedelta(lag_days, unit="D"))
+
+    expected, got_cash = ex["expected"], ex["received"]
+    slack = np.maximum(MIN_TOLERANCE, expected * tolerance)
+    unpaid = got_cash <= 0
+    status = np.select(
+        [
+            (expected <= 0) & ~unpaid,
+            unpaid & (due + pd.Timedelta(days=GRACE_DAYS) < as_of_ts),
+            unpaid,
+            got_cash < expected - slack,
+            got_cash > expected + slack,
+        ],
+        [
+            ReconciliationStatus.unexpected.value,
+            ReconciliationStatus.missing.value,
+            ReconciliationStatus.pending.value,
+            ReconciliationStatus.short.value,
+            ReconciliationStatus.over.value,
+        ],
+        ReconciliationStatus.matched.value,
+    )
+    ex = ex.assign(status=status)[(expected > 0) | ~unpaid]
+
+    orphans = matched[matched["event"].isna()]
+    orphans = pd.DataFrame(
+        {
+            "asset_id": orphans["asset_id"],
+            "shares": 0.0,
+            "expected": 0.0,
+            "received": orphans["amount"],
+            "received_date": orphans["date"],
+            "status": ReconciliationStatus.unexpected.value,
+        }
+    )
+    columns = [
+        "asset_id",
+        "ex_date",
+        "pay_date",
+        "amount",
+        "shares",
+        "expected",
+        "received",
+        "received_date",
+        "status",
+    ]
+    result = pd.concat([ex, orphans], ignore_index=True).reindex(columns=columns)
+    result["difference"] = result["received"] - result["expected"]
+    result["date"] = result["ex_date"].fillna(result["received_date"])
+    return result.sort_values(["asset_id", "date"], kind="stable").reset_index(
+        drop=True
+    )
+
+
+def _frame(rows: Sequence[Tuple], dtypes: Dict[str, Any]) -> pd.DataFrame:
+    # explicit dtypes keep empty frames mergeable
+    return pd.DataFrame(rows, columns=list(dtypes)).astype(dtypes)
+
+
+def load_inputs(
+    session: Session, as_of: date, symbols: Optional[Sequence[str]] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, dict]:
+    """Ex-dividends, trades, cash received and asset symbols, one query each.
+
+    Ex-dividends are stored by symbol and apply to every asset with it.
+    Table columns skip the ORM's loading layer, as in cost_basis.
+    """
+    asset, ex = Asset.__table__.c, ExDividend.__table__.c
+    tx, div = Transaction.__table__.c, Dividend.__table__.c
+    assets_stmt = select(asset.id, asset.symbol)
+    if symbols:
+        assets_stmt = assets_stmt.where(asset.symbol.in_(symbols))
+    names = dict(session.execute(assets_stmt).all())
+    ids = list(names)
+
+    ex_stmt = (
+        select(asset.id, ex.ex_date, ex.pay_date, ex.amount)
+        .join_from(ExDividend.__table__, Asset.__table__, asset.symbol == ex.symbol)
+        .where(ex.ex_date <= as_of, asset.id.in_(ids))
+    )
+    trades_stmt = select(tx.asset_id, tx.date, tx.shares).where(
+        tx.date <= as_of, tx.asset_id.in_(ids)
+    )
+    paid_stmt = select(div.asset_id, div.date_received, div.amount_received).where(
+        div.date_received <= as_of, div.asset_id.in_(ids)
+    )
+    day, ids_dtype = "datetime64[ns]", "int64"
+    return (
+        _frame(
+            session.execute(ex_stmt).all(),
+            {"asset_id": ids_dtype, "ex_date": day, "pay_date": day, "amount": float},
+        ),
+        _frame(
+            session.execute(trades_stmt).all(),
+            {"asset_id": ids_dtype, "date": day, "shares": float},
+        ),
+        _frame(
+            session.execute(paid_stmt).all(),
+            {"asset_id": ids_dtype, "date": day, "amount": float},
+        ),
+        names,
+    )
+
+
+def compute_reconciliation(
+    session: Session,
+    as_of: date,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    symbols: Optional[Sequence[str]] = None,
+    statuses: Optional[Sequence[ReconciliationStatus]] = None,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[Dict[str, Any]]:
+    """Reconciled dividends dated from ``start`` to ``end``, by symbol.
+
+    Shaped like DividendReconciliationRead. An entry is dated by its ex-date,
+    or by the payment for cash with none.
+    """
+    ex, trades, received, names = load_inputs(session, as_of, symbols)
+    result = reconcile(ex, trades, received, as_of, tolerance)
+    if start is not None:
+        result = result[result["date"] >= pd.Timestamp(start)]
+    if end is not None:
+        result = result[result["date"] <= pd.Timestamp(end)]
+    if statuses:
+        result = result[result["status"].isin([s.value for s in statuses])]
+    result = result.assign(symbol=result["asset_id"].map(names))
+    result = result.sort_values(["symbol", "date"], kind="stable")
+    result = result.rename(columns={"amount": "amount_per_share"})
+
+    # column-wise to plain values, far cheaper than per-row models
+    fields = list(DividendReconciliationRead.model_fields)
+    columns = []
+    for field in fields:
+        column = result[field]
+        if column.dtype.kind == "M":
+            column = column.dt.date
+        columns.append(column.astype(object).where(column.notna(), None).tolist())
+    return [dict(zip(fields, values)) for values in zip(*columns)]
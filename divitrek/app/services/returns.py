@@ -0,0 +1,393 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.models.models import (
+    Asset,
+    Dividend,
+    DividendTreatment,
+    PortfolioReturnsRead,
+    PriceBar,
+    ReturnsRead,
+    Transaction,
+)
+
+EPSILON = 1e-9  # shares below this are treated as zero
+PRICE_LOOKBACK_DAYS = 10  # bars before start that can still mark the first day
+CACHED_ASSETS = 4096
+MIN_RATE, MAX_RATE = -0.9999, 100.0  # XIRR search range, -99.99% to 10000%
+
+Fingerprint = Tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class AssetFlows:
+    """Daily arrays for one asset, from its first event to its last.
+
+    ``contributions`` is cash put into the position that day (buys, including
+    DRIP reinvestments, less sale proceeds) and ``dividends`` cash paid out of
+    it, so a reinvested dividend nets to zero for the investor. ``marks`` is
+    the last trade price, the fallback when no price bar covers a day.
+    """
+
+    first: int  # date ordinal of index 0
+    shares: np.ndarray  # end of day
+    marks: np.ndarray
+    contributions: np.ndarray
+    dividends: np.ndarray
+
+    def window(self, start: int, end: int) -> Dict[str, np.ndarray]:
+        """Arrays for ``start - 1`` through ``end``, padded outside the history.
+
+        Shares and marks hold their last value after the history ends; flows
+        are zero outside it.
+        """
+        index = np.arange(start - 1, end + 1) - self.first
+        inside = (index >= 0) & (index < len(self.shares))
+        clipped = np.clip(index, 0, len(self.shares) - 1)
+        before = index < 0
+        return {
+            "shares": np.where(before, 0.0, self.shares[clipped]),
+            "marks": np.where(before, np.nan, self.marks[clipped]),
+            "contributions": np.where(inside, self.contributions[clipped], 0.0),
+            "dividends": np.where(inside, self.dividends[clipped], 0.0),
+        }
+
+
+class FlowCache:
+    """Per-asset flows, reused until the asset's transactions or dividends change.
+
+    Entries are keyed by a fingerprint of row counts and highest ids, which
+    one grouped query per table reads from the (asset_id, date, id) indexes,
+    so a new date range only slices arrays that are already built.
+    """
+
+    def __init__(self, max_assets: int = CACHED_ASSETS) -> None:
+        self.max_assets = max_assets
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[Fingerprint, AssetFlows]]" = (
+            OrderedDict()
+        )
+
+    def get(self, asset_id: int, fingerprint: Fingerprint) -> Optional[AssetFlows]:
+        with self._lock:
+            entry = self._entries.get(asset_id)
+            if entry is None or entry[0] != fingerprint:
+                return None
+            self._entries.move_to_end(asset_id)
+            return entry[1]
+
+    def put(self, asset_id: int, fingerprint: Fingerprint, flows: AssetFlows) -> None:
+        with self._lock:
+            self._entries[asset_id] = (fingerprint, flows)
+            self._entries.move_to_end(asset_id)
+            while len(self._entries) > self.max_assets:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+flow_cache = FlowCache()
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Carry the last non-NaN value forward along the last axis."""
+    index = np.where(np.isnan(values), 0, np.arange(values.shape[-1]))
+    np.maximum.accumulate(index, axis=-1, out=index)
+    return np.take_along_axis(values, index, axis=-1)
+
+
+def _fingerprints(session: Session, asset_ids: Sequence[int]) -> Dict[int, Fingerprint]:
+    counts: Dict[int, List[int]] = {asset_id: [0, 0, 0, 0] for asset_id in asset_ids}
+    for i, model in enumerate((Transaction, Dividend)):
+        table = model.__table__.c
+        rows = session.execute(
+            select(table.asset_id, func.count(), func.max(table.id))
+            .where(table.asset_id.in_(asset_ids))
+            .group_by(table.asset_id)
+        )
+        for asset_id, count, last_id in rows:
+            counts[asset_id][2 * i : 2 * i + 2] = [count, last_id]
+    return {asset_id: tuple(values) for asset_id, values in counts.items()}
+
+
+def build_flows(session: Session, asset_ids: Sequence[int]) -> Dict[int, AssetFlows]:
+    """Daily flows for ``asset_ids`` from one query per table."""
+    tx = Transaction.__table__.c
+    trades = session.execute(
+        select(tx.asset_id, tx.date, tx.shares, tx.price_per_share, tx.fees)
+        .where(tx.asset_id.in_(asset_ids))
+        .order_by(tx.asset_id, tx.date, tx.id)
+    ).all()
+    div = Dividend.__table__.c
+    payments = session.execute(
+        select(div.asset_id, div.date_received, div.amount_received).where(
+            div.asset_id.in_(asset_ids)
+        )
+    ).all()
+
+    by_asset: Dict[int, Dict[str, list]] = {
+        asset_id: {"trades": [], "payments": []} for asset_id in asset_ids
+    }
+    for row in trades:
+        by_asset[row[0]]["trades"].append(row[1:])
+    for row in payments:
+        by_asset[row[0]]["payments"].append(row[1:])
+
+    flows = {}
+    for asset_id, rows in by_asset.items():
+        if not rows["trades"] and not rows["payments"]:
+            continue
+        t_day = np.array([d.toordinal() for d, *_ in rows["trades"]], dtype=np.int64)
+        t_shares, t_price, t_fees = (
+            np.array([r[i] for r in rows["trades"]], dtype=float) for i in (1, 2, 3)
+        )
+        p_day = np.array([d.toordinal() for d, _ in rows["payments"]], dtype=np.int64)
+        p_amount = np.array([a for _, a in rows["payments"]], dtype=float)
+
+        first = int(np.concatenate([t_day, p_day]).min())
+        length = int(np.concatenate([t_day, p_day]).max()) - first + 1
+        t_index, p_index = t_day - first, p_day - first
+        # buys pay price plus fees, sales receive price less fees
+        cash = t_shares * t_price + t_fees
+        marks = np.full(length, np.nan)
+        marks[t_index] = t_price  # trades are in order, so the day's last wins
+        flows[asset_id] = AssetFlows(
+            first=first,
+            shares=np.cumsum(np.bincount(t_index, t_shares, length)),
+            marks=_ffill(marks),
+            contributions=np.bincount(t_index, cash, length),
+            dividends=np.bincount(p_index, p_amount, length),
+        )
+    return flows
+
+
+def load_flows(session: Session, asset_ids: Sequence[int]) -> Dict[int, AssetFlows]:
+    """Cached flows where the asset is unchanged, rebuilding only the rest."""
+    fingerprints = _fingerprints(session, asset_ids)
+    flows: Dict[int, AssetFlows] = {}
+    stale = []
+    for asset_id, fingerprint in fingerprints.items():
+        cached = flow_cache.get(asset_id, fingerprint)
+        if cached is not None:
+            flows[asset_id] = cached
+        elif fingerprint != (0, 0, 0, 0):
+            stale.append(asset_id)
+    if stale:
+        for asset_id, built in build_flows(session, stale).items():
+            flow_cache.put(asset_id, fingerprints[asset_id], built)
+            flows[asset_id] = built
+    return flows
+
+
+def _bar_marks(
+    session: Session, symbols: Sequence[str], start: int, end: int
+) -> np.ndarray:
+    """Closes for ``start - 1`` through ``end``, one row per symbol, carried forward.
+
+    Valuation uses the unadjusted close because dividends are counted as
+    cash separately; adjusted closes would count them twice.
+    """
+    first = start - 1 - PRICE_LOOKBACK_DAYS
+    bar = PriceBar.__table__.c
+    bars = session.execute(
+        select(bar.symbol, bar.date, func.coalesce(bar.close, bar.adj_close)).where(
+            bar.symbol.in_(symbols),
+            bar.date >= date.fromordinal(first),
+            bar.date <= date.fromordinal(end),
+            func.coalesce(bar.close, bar.adj_close).is_not(None),
+        )
+    ).all()
+    marks = np.full((len(symbols), end - first + 1), np.nan)
+    if bars:
+        row = {symbol: i for i, symbol in enumerate(symbols)}
+        symbol, day, close = zip(*bars)
+        rows = np.fromiter((row[s] for s in symbol), np.int64, len(bars))
+        days = np.fromiter((d.toordinal() for d in day), np.int64, len(bars))
+        marks[rows, days - first] = close
+    return _ffill(marks)[:, PRICE_LOOKBACK_DAYS:]
+
+
+def _npv(
+    rate: np.ndarray, amounts: np.ndarray, years: np.ndarray, groups: np.ndarray
+) -> np.ndarray:
+    discounted = amounts * np.exp(-years * np.log1p(rate[groups]))
+    return np.bincount(groups, discounted, len(rate))
+
+
+def xirr(
+    amounts: np.ndarray,
+    years: np.ndarray,
+    groups: np.ndarray,
+    count: int,
+    guess: float = 0.1,
+    tolerance: float = 1e-10,
+    max_iterations: int = 100,
+) -> np.ndarray:
+    """Annual rate zeroing each group's NPV, solved for all groups at once.
+
+    ``amounts`` are signed cash flows ``years`` after the group's start, and
+    ``groups`` numbers each flow's group in ``range(count)``. Newton's method
+    runs on every group together; a rate it reaches counts only if it is
+    finite, inside -99.99% to 10000% and NPV changes sign around it, since
+    NPV also fades to zero as a rate runs off to infinity. The remaining
+    groups are bisected together over that range. Groups without both an
+    inflow and an outflow, or with no root in that range, get NaN.
+    """
+    inflow = np.bincount(groups, amounts > 0, count) > 0
+    outflow = np.bincount(groups, amounts < 0, count) > 0
+    active = inflow & outflow
+    scale = np.maximum(np.bincount(groups, np.abs(amounts), count), 1.0)
+    rate = np.full(count, guess)
+    with np.errstate(all="ignore"):
+        for _ in range(max_iterations):
+            base = 1.0 + rate[groups]
+            discounted = amounts * np.exp(-years * np.log(base))
+            npv = np.bincount(groups, discounted, count)
+            slope = np.bincount(groups, -years * discounted / base, count)
+            step = np.divide(npv, slope, out=np.zeros(count), where=slope != 0)
+            step[~active | ~np.isfinite(step)] = 0.0
+            proposed = rate - step
+            # never step to or past -100%; go halfway there instead
+            proposed = np.where(proposed <= -1.0, (rate - 1.0) / 2, proposed)
+            done = np.abs(proposed - rate) <= tolerance * np.maximum(1.0, np.abs(rate))
+            rate = proposed
+            if done.all():
+                break
+        in_range = np.isfinite(rate) & (rate >= MIN_RATE) & (rate <= MAX_RATE)
+        width = 1e-6 * np.maximum(1.0, np.abs(rate))
+        below = _npv(np.maximum(rate - width, MIN_RATE), amounts, years, groups)
+        above = _npv(np.minimum(rate + width, MAX_RATE), amounts, years, groups)
+        settled = (
+            in_range
+            & (np.abs(_npv(rate, amounts, years, groups)) <= 1e-9 * scale)
+            & (np.sign(below) != np.sign(above))
+        )
+
+        todo = active & ~settled
+        if todo.any():
+            low, high = np.full(count, MIN_RATE), np.full(count, MAX_RATE)
+            low_npv = _npv(low, amounts, years, groups)
+            bracketed = todo & (
+                np.sign(low_npv) != np.sign(_npv(high, amounts, years, groups))
+            )
+            for _ in range(200):
+                mid = (low + high) / 2
+                mid_npv = _npv(mid, amounts, years, groups)
+                same = np.sign(mid_npv) == np.sign(low_npv)
+                low = np.where(same, mid, low)
+                low_npv = np.where(same, mid_npv, low_npv)
+                high = np.where(same, high, mid)
+            rate = np.where(bracketed, (low + high) / 2, rate)
+            settled |= bracketed
+    return np.where(active & settled, rate, np.nan)
+
+
+def _twr(
+    values: np.ndarray,
+    contributions: np.ndarray,
+    dividends: np.ndarray,
+    treatment: DividendTreatment,
+) -> np.ndarray:
+    """Time-weighted return per row over the window.
+
+    ``values`` has one more column than the flows: the value at the end of
+    the day before the window. Money put in counts from the start of its day
+    and money taken out at the end, so days that open or close a position
+    still have a base.
+    """
+    base = values[:, :-1] + np.maximum(contributions, 0.0)
+    ending = values[:, 1:] + np.maximum(-contributions, 0.0)
+    valid = base > EPSILON
+    price = np.divide(ending, base, out=np.ones_like(base), where=valid) - 1.0
+    income = np.divide(dividends, base, out=np.zeros_like(base), where=valid)
+    if treatment == DividendTreatment.reinvested:
+        return np.prod(1.0 + price + income, axis=1) - 1.0
+    # cash dividends earn nothing after they are paid
+    growth = np.cumprod(1.0 + price, axis=1)
+    before = np.hstack([np.ones((len(growth), 1)), growth[:, :-1]])
+    return growth[:, -1] - 1.0 + (income * before).sum(axis=1)
+
+
+def compute_returns(
+    session: Session,
+    start: Optional[date],
+    end: date,
+    treatment: DividendTreatment,
+    symbols: Optional[List[str]] = None,
+) -> Optional[PortfolioReturnsRead]:
+    """Money- and time-weighted returns per asset and for their total.
+
+    Positions are valued at stored closes, or at the last trade price where
+    no bar covers a day. ``start`` defaults to the first transaction or
+    dividend; returns None when there is nothing to measure.
+    """
+    stmt = select(Asset.id, Asset.symbol).order_by(Asset.symbol, Asset.id)
+    if symbols:
+        stmt = stmt.where(Asset.symbol.in_(symbols))
+    assets = session.exec(stmt).all()
+    flows = load_flows(session, [asset_id for asset_id, _ in assets])
+    assets = [(asset_id, symbol) for asset_id, symbol in assets if asset_id in flows]
+    if not assets:
+        return None
+    first = start.toordinal() if start else min(f.first for f in flows.values())
+    last = end.toordinal()
+
+    windows = [flows[asset_id].window(first, last) for asset_id, _ in assets]
+    shares = np.array([w["shares"] for w in windows])
+    trade_marks = np.array([w["marks"] for w in windows])
+    bar_marks = _bar_marks(session, [symbol for _, symbol in assets], first, last)
+    marks = np.where(np.isnan(bar_marks), trade_marks, bar_marks)
+    held = np.abs(shares) > EPSILON
+    values = np.where(held, shares * np.nan_to_num(marks), 0.0)
+    contributions = np.array([w["contributions"][1:] for w in windows])
+    dividends = np.array([w["dividends"][1:] for w in windows])
+
+    # the total is one more row, so both go through the same vectorized pass
+    values = np.vstack([values, values.sum(axis=0)])
+    contributions = np.vstack([contributions, contributions.sum(axis=0)])
+    dividends = np.vstack([dividends, dividends.sum(axis=0)])
+
+    # investor cash flows: buy in at the opening value, sell out at the end
+    cash = dividends - contributions
+    cash[:, 0] -= values[:, 0]
+    cash[:, -1] += values[:, -1]
+    rows, days = np.nonzero(cash)
+    # each row's times count from its own first flow, as xirr expects
+    first_day = np.full(len(values), days.max(initial=0))
+    np.minimum.at(first_day, rows, days)
+    rates = xirr(cash[rows, days], (days - first_day[rows]) / 365.0, rows, len(values))
+    twr = _twr(values, contributions, dividends, treatment)
+    span = last - first + 1
+    annualized = (1.0 + twr) ** (365.0 / span) - 1.0 if span >= 365 else None
+
+    def row(i: int, asset_id: Optional[int], symbol: Optional[str]) -> ReturnsRead:
+        contributed, paid = float(contributions[i].sum()), float(dividends[i].sum())
+        return ReturnsRead(
+            asset_id=asset_id,
+            symbol=symbol,
+            start_value=values[i, 0],
+            end_value=values[i, -1],
+            contributions=contributed,
+            dividends=paid,
+            gain=values[i, -1] - values[i, 0] - contributed + paid,
+            xirr=None if np.isnan(rates[i]) else rates[i],
+            twr=twr[i],
+            twr_annualized=None if annualized is None else annualized[i],
+        )
+
+    return PortfolioReturnsRead(
+        start=date.fromordinal(first),
+        end=end,
+        dividends=treatment,
+        portfolio=row(len(assets), None, None),
+        assets=[row(i, *asset) for i, asset in enumerate(assets)],
+    )
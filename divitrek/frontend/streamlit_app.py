@@ -13,9 +13,20 @@ st.title("DiviTrek - Dividend Tracker")
 @st.cache_data(show_spinner=False)
 def fetch_assets() -> pd.DataFrame:
     import httpx
+    import pyarrow as pa
 
     with httpx.Client() as client:
-        r = client.get(f"{API_BASE}/assets/")
+        r = client.get(f"{API_BASE}/export/assets", params={"format": "arrow"})
+        r.raise_for_status()
+        return pa.ipc.open_stream(r.content).read_pandas()
+
+
+@st.cache_data(show_spinner=False)
+def fetch_holdings() -> pd.DataFrame:
+    import httpx
+
+    with httpx.Client() as client:
+        r = client.get(f"{API_BASE}/portfolio/holdings")
         r.raise_for_status()
         return pd.DataFrame(r.json())
 
@@ -33,13 +44,17 @@ def create_asset(symbol: str, name: str, kind: str) -> None:
             fetch_assets.clear()
 
 
-tab1, tab2 = st.tabs(["Assets", "Data Entry"])
+tab1, tab2, tab3 = st.tabs(["Assets", "Holdings", "Data Entry"])
 
 with tab1:
     assets_df = fetch_assets()
     st.dataframe(assets_df, use_container_width=True)
 
 with tab2:
+    holdings_df = fetch_holdings()
+    st.dataframe(holdings_df, use_container_width=True)
+
+with tab3:
     st.subheader("Add Asset")
     c1, c2, c3, c4 = st.columns([2, 3, 2, 1])
     with c1:
@@ -300,20 +300,15 @@ ws_m.set_column(0, 0, 10)
 ws_m.set_column(1, 12, 12, fmt_money)
 
 # ---------------- 7) Dividend Forecast ----------------
+# Static values (symbols x the next 12 months) written by dividends_nav_etf_updater.py,
+# so opening the workbook never recalculates a per-symbol forecast
 ws_f = wb.add_worksheet("Dividend Forecast")
-ws_f.write_row(0, 0, [""] + [None] * 12, fmt_header)
+ws_f.write(0, 0, "", fmt_header)
 for j in range(12):
-    ws_f.write_formula(
-        0, 1 + j, f'=UPPER(TEXT(EDATE(AsOfDate, {j-11}),"MMM YY"))', fmt_header
-    )
+    m = today.month - 1 + j
+    month = dt.date(today.year + m // 12, m % 12 + 1, 1)
+    ws_f.write(0, 1 + j, month.strftime("%b %y").upper(), fmt_header)
 ws_f.write(1, 0, "Symbol", fmt_header)
-ws_f.write_formula(2, 0, "='Holdings & Summary'!$A$3#")
-for j in range(12):
-    ws_f.write_formula(
-        2,
-        1 + j,
-        f'=BYROW($A$3#,LAMBDA(r,LET(sym,INDEX(r,1),mStart,EOMONTH(EDATE(AsOfDate,{j-11}),-1)+1,mEnd,EOMONTH(EDATE(AsOfDate,{j-11}),0),dPay,XLOOKUP(sym,DivCal[Symbol],DivCal[Declared_Next_Pay],""),dAmt,XLOOKUP(sym,DivCal[Symbol],DivCal[Declared_Amount],""),dVal,IF(AND(dAmt<>"", dPay<>"" , dPay>=mStart, dPay<=mEnd), dAmt, 0),iPay,XLOOKUP(sym,DivCal[Symbol],DivCal[Inferred_Next_Pay],""),freq,XLOOKUP(sym,DivCal[Symbol],DivCal[Months_Between],1),iVal,IF(AND(dVal=0, iPay<>"", iPay>=mStart, iPay<=mEnd), MEDIAN(TAKE(FILTER(Tx[CashDividend],Tx[Symbol]=sym),-3)), 0),dVal + iVal)))',
-    )
 ws_f.set_column(0, 0, 10)
 ws_f.set_column(1, 12, 12, fmt_money)
 
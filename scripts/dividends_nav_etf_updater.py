@@ -1,49 +1,141 @@
 #!/usr/bin/env python3
-# pip install pandas openpyxl yfinance numpy
+# pip install pandas openpyxl yfinance numpy sqlmodel
 import datetime as dt
-import numpy as np
+import sys
+from pathlib import Path
+
 import pandas as pd
-import yfinance as yf
 from openpyxl import load_workbook
 
+from ticker_data import TickerFetcher
+from workbook_io import read_table, write_rows, write_table
+
+# The calendar engine is shared with the API (/dividends/calendar)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "divitrek"))
+from app.services.dividend_calendar import (  # noqa: E402
+    dividend_calendar,
+    dividend_forecast,
+)
+
 PATH = "Dividend_Tracker_Skeleton.xlsx"  # change if you rename
 
+# DivCal[Months_Between] feeds EDATE, so weekly payers keep the 1-month step
+MONTHS_BETWEEN = {
+    "weekly": 1,
+    "monthly": 1,
+    "quarterly": 3,
+    "semiannual": 6,
+    "annual": 12,
+}
+
 
-def read_table(ws, header_row=1):
-    headers = [c.value for c in ws[header_row]]
-    rows = []
-    for r in ws.iter_rows(min_row=header_row + 1, values_only=True):
-        if all((v is None or str(v).strip() == "") for v in r):
+def cash_dividends(tx):
+    """Symbol, pay date and cash amount of every DIVIDEND RECEIVED row."""
+    if tx.empty:
+        return pd.DataFrame(columns=["symbol", "date", "amount"])
+    is_div = tx["Action"].astype(str).str.upper().str.contains("DIVIDEND RECEIVED")
+    divs = tx.loc[is_div]
+    return pd.DataFrame(
+        {
+            "symbol": divs["Symbol"],
+            "date": pd.to_datetime(divs["Run_Date"], format="mixed", errors="coerce"),
+            "amount": pd.to_numeric(divs["Amount"], errors="coerce").abs(),
+        }
+    )
+
+
+def ex_dividends(ticker_data):
+    """Per-share dividend history keyed by ex-date, all symbols in one frame."""
+    frames = []
+    for symbol, data in ticker_data.items():
+        if data.dividends is None or data.dividends.empty:
             continue
-        rows.append(dict(zip(headers, r)))
-    return pd.DataFrame(rows)
-
-
-def write_table(ws, df, header_row=1):
-    # simple wipe
-    for r in range(header_row + 1, header_row + 1 + 2000):
-        for c in range(1, 21):
-            ws.cell(r, c).value = None
-    for i, row in enumerate(df.itertuples(index=False), start=header_row + 1):
-        for j, val in enumerate(row, start=1):
-            ws.cell(i, j).value = val
-
-
-def infer_frequency(pay_dates):
-    if len(pay_dates) < 3:
-        return 1
-    diffs = np.diff(sorted(pd.to_datetime(pay_dates)))
-    med = np.median([d.days for d in diffs])
-    if med <= 10:
-        return 0.25  # weekly approx
-    if med <= 45:
-        return 1  # monthly
-    if med <= 110:
-        return 3  # quarterly
-    return 6  # semi-annual default
-
-
-def main():
+        ex_dates = pd.to_datetime(data.dividends.index)
+        if ex_dates.tz is not None:
+            ex_dates = ex_dates.tz_localize(None)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "symbol": symbol,
+                    "date": ex_dates,
+                    "amount": data.dividends.to_numpy(),
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=["symbol", "date", "amount"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def months_between(cadence, median_gap_days):
+    # irregular payers step by their typical gap in whole months
+    typical = (median_gap_days / 30.44).round().clip(lower=1)
+    return cadence.map(MONTHS_BETWEEN).fillna(typical).fillna(1).astype(int)
+
+
+def write_forecast(ws, forecast):
+    """Static forecast grid: month labels in row 1, one symbol per row from 3."""
+    for c, month in enumerate(forecast.columns, start=2):
+        ws.cell(1, c).value = month.strftime("%b %y").upper()
+    ws.cell(2, 1).value = "Symbol"
+    values = forecast.round(2).to_numpy().tolist()
+    rows = [[s, *amounts] for s, amounts in zip(forecast.index, values)]
+    write_rows(ws, rows, 3, len(forecast.columns) + 1)
+
+
+def etf_metric_points(etf_rows, ticker_data):
+    """NAV, AUM and the market price's premium/discount to NAV of each ETF."""
+    points = []
+    for row in etf_rows:
+        info = ticker_data[row["Symbol"]].info
+        nav = row["NAV"]
+        price = info.get("regularMarketPrice") or info.get("previousClose")
+        values = {"nav": nav, "aum_usd": row["AUM_USD"], "price": price}
+        if nav and price:
+            values["premium_pct"] = (price / nav - 1) * 100
+        points += [
+            {
+                "symbol": row["Symbol"],
+                "metric": metric,
+                "as_of": row["NAV_Date"],
+                "value": float(value),
+            }
+            for metric, value in values.items()
+            if value is not None
+        ]
+    return points
+
+
+def store(points, ex_divs):
+    """Bulk upsert ETF metrics and ex-dividend history into the API database."""
+    from app.core.db import get_session, init_db
+    from app.models.models import ExDividendCreate, MetricPointCreate
+    from app.services.asset_metrics import upsert_metrics
+    from app.services.reconciliation import upsert_ex_dividends
+
+    init_db()
+    with get_session() as session:
+        count, unknown = upsert_metrics(
+            session, [MetricPointCreate(**point) for point in points]
+        )
+        ex_count = upsert_ex_dividends(
+            session,
+            [
+                ExDividendCreate(symbol=symbol, ex_date=day, amount=amount)
+                for symbol, day, amount in zip(
+                    ex_divs["symbol"],
+                    pd.to_datetime(ex_divs["date"]).dt.date,
+                    ex_divs["amount"],
+                )
+            ],
+        )
+        session.commit()
+    print(f"Stored {count} ETF metric points and {ex_count} ex-dividends")
+    if unknown:
+        print(f"No asset for {', '.join(unknown)}; their metrics were skipped")
+
+
+def main(fetcher=None, to_db=False):
     wb = load_workbook(PATH)
     ws_tx = wb["Transactions"]
     ws_etf = wb["ETF"]
@@ -56,11 +148,17 @@ def main():
         tx["Symbol"] = tx["Symbol"].astype(str).str.upper().str.strip()
         symbols = sorted(set(tx["Symbol"].tolist()))
 
+    # One concurrent pass for info + dividend history of every symbol
+    fetcher = fetcher or TickerFetcher()
+    ticker_data = fetcher.fetch(symbols)
+    for data in ticker_data.values():
+        if data.error:
+            print(f"{data.symbol}: fetch failed ({data.error})")
+
     # ETF
     etf_rows = []
     for s in symbols:
-        t = yf.Ticker(s)
-        info = t.info or {}
+        info = ticker_data[s].info
         is_etf = (
             (info.get("quoteType") == "ETF")
             or ("ETF" in (info.get("shortName") or ""))
@@ -83,74 +181,39 @@ def main():
             )
     write_table(ws_etf, pd.DataFrame(etf_rows))
 
-    # DivCal (last ex-div via yfinance dividends index; last pay via Tx cash dividends)
-    if not tx.empty:
-        tx["Run_Date"] = pd.to_datetime(tx["Run_Date"]).dt.date
-        cash_tx = tx[(tx.get("IsDivIncome", 0) == 1) & (tx.get("Amount", 0))]
-        last_pay = cash_tx.groupby("Symbol")["Run_Date"].max().to_dict()
-    else:
-        last_pay = {}
-
-    dc_rows = []
-    for s in symbols:
-        t = yf.Ticker(s)
-        div = t.dividends
-        last_ex = (
-            None if div is None or div.empty else pd.to_datetime(div.index.max()).date()
-        )
-
-        pays = []
-        if not tx.empty:
-            pays = (
-                pd.to_datetime(
-                    tx.loc[
-                        (tx["Symbol"] == s) & (tx.get("IsDivIncome", 0) == 1),
-                        "Run_Date",
-                    ]
-                )
-                .dropna()
-                .tolist()
-            )
-        mb = infer_frequency(pays)
-        lp = last_pay.get(s)
-        if lp:
-            inferred_next = (
-                pd.Timestamp(lp)
-                + (
-                    pd.DateOffset(months=int(round(mb)))
-                    if mb >= 1
-                    else pd.Timedelta(days=7)
-                )
-            ).date()
-        else:
-            inferred_next = None
-
-        dc_rows.append(
-            {
-                "Symbol": s,
-                "Frequency": (
-                    "Weekly"
-                    if mb < 1
-                    else (
-                        "Monthly"
-                        if mb == 1
-                        else ("Quarterly" if mb == 3 else f"{mb} mo")
-                    )
-                ),
-                "Months_Between": mb if mb >= 1 else 1,
-                "Last_ExDiv": last_ex,
-                "Last_Pay": lp,
-                "Declared_Next_ExDiv": None,
-                "Declared_Next_Pay": None,
-                "Declared_Amount": None,
-                "Inferred_Next_Pay": inferred_next,
-            }
-        )
+    # DivCal: cadence and next dates for every symbol in one vectorized pass
+    ex_divs = ex_dividends(ticker_data)
+    calendar = dividend_calendar(cash_dividends(tx), ex_divs)
+    cal = calendar.set_index("symbol").reindex(symbols)
+    cadence = cal["cadence"].map(lambda c: c.value, na_action="ignore")
+    dc = pd.DataFrame(
+        {
+            "Symbol": symbols,
+            "Frequency": cadence.str.capitalize().to_numpy(),
+            "Months_Between": months_between(
+                cadence, cal["median_gap_days"]
+            ).to_numpy(),
+            "Last_ExDiv": cal["last_ex_date"].dt.date.to_numpy(),
+            "Last_Pay": cal["last_pay_date"].dt.date.to_numpy(),
+            "Declared_Next_ExDiv": None,
+            "Declared_Next_Pay": None,
+            "Declared_Amount": None,
+            "Inferred_Next_Pay": cal["next_pay_date"].dt.date.to_numpy(),
+        }
+    )
+    write_table(ws_dc, dc)
+
+    # Dividend Forecast: next 12 months from the same calendar
+    forecast = dividend_forecast(calendar).reindex(symbols, fill_value=0.0)
+    write_forecast(wb["Dividend Forecast"], forecast)
 
-    write_table(ws_dc, pd.DataFrame(dc_rows))
     wb.save(PATH)
-    print(f"ETF & DivCal updated for {len(symbols)} symbols")
+    print(f"ETF, DivCal & Dividend Forecast updated for {len(symbols)} symbols")
+    if to_db:
+        store(etf_metric_points(etf_rows, ticker_data), ex_divs)
 
 
 if __name__ == "__main__":
-    main()
+    # --store also keeps NAV/AUM history and per-share dividends (for
+    # /dividends/reconciliation) in the API database
+    main(to_db="--store" in sys.argv[1:])
@@ -1,5 +1,6 @@
 import pandas as pd
 import datetime as dt
+import sys
 from pathlib import Path
 
 # Use repository data directory for input files
@@ -7,81 +8,78 @@ project_root = Path(__file__).resolve().parents[1]
 data_dir = project_root / "data"
 positions_file = data_dir / "current_positions.xlsx"
 history_file = data_dir / "Fidelity_Full_History_20240701_20251001.csv"
+output_file = data_dir / "Dividend_Tracker_Complete.xlsx"
 
-# Load data
-positions = pd.read_excel(positions_file)
-history = pd.read_csv(history_file)
-history["Run Date"] = pd.to_datetime(history["Run Date"], errors="coerce")
-
-# Extract different transaction types
-div_received = history[
-    history["Action"].str.contains("DIVIDEND RECEIVED", na=False)
-].copy()
-purchases = history[history["Action"].str.contains("BOUGHT", na=False)].copy()
-reinvestments = history[history["Action"].str.contains("REINVESTMENT", na=False)].copy()
+# Forecasting is shared with the API (/dividends/forecast)
+sys.path.insert(0, str(project_root / "divitrek"))
+from app.services.dividend_calendar import (  # noqa: E402
+    dividend_calendar,
+    dividend_forecast,
+)
+from app.services.fidelity import DATE_FORMATS  # noqa: E402
+
+
+def parse_run_dates(values):
+    # each format the importer accepts, vectorized, instead of a per-row guess
+    dates = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        missing = dates.isna()
+        dates[missing] = pd.to_datetime(values[missing], format=fmt, errors="coerce")
+    return dates
+
+
+def load_history(path):
+    history = pd.read_csv(path)
+    raw = history["Run Date"].astype("string").str.strip()
+    history["Run Date"] = parse_run_dates(raw)
+    unreadable = history["Run Date"].isna() & raw.fillna("").ne("")
+    if unreadable.any():
+        examples = ", ".join(raw[unreadable].head(3))
+        count = int(unreadable.sum())
+        print(f"Skipped {count} history rows with unreadable dates: {examples}")
+    return history
+
+
+def select_actions(history, pattern):
+    return history[history["Action"].str.contains(pattern, na=False)].copy()
+
+
+def build_position_series(trades):
+    # Cumulative shares per symbol after each trading day; sells reduce the position
+    sold = trades["Action"].str.contains("SOLD", na=False)
+    quantity = trades["Quantity"].abs()
+    trades = trades.assign(Delta=quantity.where(~sold, -quantity))
+    daily = (
+        trades.dropna(subset=["Run Date"])
+        .groupby(["Symbol", "Run Date"], as_index=False)["Delta"]
+        .sum()
+        .sort_values(["Symbol", "Run Date"])
+    )
+    daily["Shares Owned"] = daily.groupby("Symbol")["Delta"].cumsum()
+    return daily[["Symbol", "Run Date", "Shares Owned"]]
 
 
 # Calculate dividends per payment date with shares owned
-def calculate_dividends_by_date(divs, purchases):
-    purchases = purchases.sort_values(by="Run Date")
-    divs = divs.sort_values(by="Run Date")
-    results = []
-    for _, div in divs.iterrows():
-        symbol = div["Symbol"]
-        pay_date = div["Run Date"]
-        amount_received = div["Amount ($)"]
-        # Shares owned before dividend date (assumed day before payout)
-        shares_bought = purchases[
-            (purchases["Symbol"] == symbol) & (purchases["Run Date"] < pay_date)
-        ]
-        total_shares = shares_bought["Quantity"].sum()
-        results.append(
-            {
-                "Symbol": symbol,
-                "Dividend Date": pay_date,
-                "Shares Owned": total_shares,
-                "Amount Received": amount_received,
-            }
-        )
-    return pd.DataFrame(results)
-
-
-dividend_details = calculate_dividends_by_date(div_received, purchases)
-
-# Calculate trailing 12 months dividend totals
-one_year_ago = dt.datetime.now() - pd.DateOffset(years=1)
-recent_dividends = dividend_details[dividend_details["Dividend Date"] >= one_year_ago]
-total_dividends = (
-    recent_dividends.groupby("Symbol")["Amount Received"].sum().reset_index()
-)
-
-# Merge trailing 12M dividends to positions
-positions = positions.merge(
-    total_dividends.rename(
-        columns={"Amount Received": "Trailing 12M Dividend Received"}
-    ),
-    how="left",
-    left_on="Symbol",
-    right_on="Symbol",
-)
-positions["Trailing 12M Dividend Received"] = positions[
-    "Trailing 12M Dividend Received"
-].fillna(0)
-
-# Add last dividend amount per ticker
-last_dividend = (
-    div_received.sort_values("Run Date")
-    .groupby("Symbol")
-    .tail(1)[["Symbol", "Amount ($)"]]
-)
-positions = positions.merge(
-    last_dividend.rename(columns={"Amount ($)": "Last Dividend Paid"}),
-    how="left",
-    on="Symbol",
-)
-positions["Last Dividend Paid"] = positions["Last Dividend Paid"].fillna(0)
+def calculate_dividends_by_date(divs, trades):
+    # Shares owned before dividend date (assumed day before payout)
+    divs = divs.dropna(subset=["Run Date"]).sort_values(by="Run Date")
+    positions = build_position_series(trades).sort_values(by="Run Date")
+    merged = pd.merge_asof(
+        divs[["Symbol", "Run Date", "Amount ($)"]],
+        positions,
+        on="Run Date",
+        by="Symbol",
+        allow_exact_matches=False,
+    )
+    return pd.DataFrame(
+        {
+            "Symbol": merged["Symbol"],
+            "Dividend Date": merged["Run Date"],
+            "Shares Owned": merged["Shares Owned"].fillna(0),
+            "Amount Received": merged["Amount ($)"],
+        }
+    )
 
-positions.fillna(0, inplace=True)
 
 # Sample price history data for price changes - replace with real data source if available
 price_data_examples = {
@@ -93,6 +91,13 @@ price_data_examples = {
     "ULTY": pd.Series([5.5, 5.52, 5.53, 5.48, 5.5, 5.52, 5.47]),
 }
 
+# Add NAV and AUM data (update as you get real-time data)
+additional_data = {
+    "Symbol": ["BITO", "BTCI", "HOOW", "HOOY", "HPE", "MSTY", "QQQI", "SCHD", "ULTY"],
+    "NAV": [19.67, 60.62, 64.29, 0, 0, 0, 0, 27.52, 5.47],
+    "AUM": [2.75e9, 8.34e8, 1.0048e8, 0, 0, 0, 0, 7.111e10, 3.38e9],
+}
+
 
 def calculate_price_changes(price_history, days):
     if len(price_history) < days + 1:
@@ -104,87 +109,114 @@ def calculate_price_changes(price_history, days):
     return price_change, pct_change
 
 
-price_change_data = []
-for ticker, prices in price_data_examples.items():
-    change_5d, pct_5d = calculate_price_changes(prices, 5)
-    change_1m, pct_1m = calculate_price_changes(prices, 22)
-    change_3m, pct_3m = calculate_price_changes(prices, 66)
-    change_6m, pct_6m = calculate_price_changes(prices, 132)
-    price_change_data.append(
-        {
-            "Symbol": ticker,
-            "Price Change 5D": change_5d or 0,
-            "Price Change % 5D": pct_5d or 0,
-            "Price Change 1M": change_1m or 0,
-            "Price Change % 1M": pct_1m or 0,
-            "Price Change 3M": change_3m or 0,
-            "Price Change % 3M": pct_3m or 0,
-            "Price Change 6M": change_6m or 0,
-            "Price Change % 6M": pct_6m or 0,
-        }
+def main(
+    positions_path=positions_file, history_path=history_file, output_path=output_file
+):
+    # Load data
+    positions = pd.read_excel(positions_path)
+    history = load_history(history_path)
+    div_received = select_actions(history, "DIVIDEND RECEIVED")
+    trades = select_actions(history, "BOUGHT|SOLD|REINVESTMENT")
+
+    dividend_details = calculate_dividends_by_date(div_received, trades)
+
+    # Calculate trailing 12 months dividend totals
+    one_year_ago = dt.datetime.now() - pd.DateOffset(years=1)
+    recent_dividends = dividend_details[
+        dividend_details["Dividend Date"] >= one_year_ago
+    ]
+    total_dividends = (
+        recent_dividends.groupby("Symbol")["Amount Received"].sum().reset_index()
     )
 
-price_change_df = pd.DataFrame(price_change_data)
+    # Merge trailing 12M dividends to positions
+    positions = positions.merge(
+        total_dividends.rename(
+            columns={"Amount Received": "Trailing 12M Dividend Received"}
+        ),
+        how="left",
+        left_on="Symbol",
+        right_on="Symbol",
+    )
+    positions["Trailing 12M Dividend Received"] = positions[
+        "Trailing 12M Dividend Received"
+    ].fillna(0)
+
+    # Add last dividend amount per ticker
+    last_dividend = (
+        div_received.sort_values("Run Date")
+        .groupby("Symbol")
+        .tail(1)[["Symbol", "Amount ($)"]]
+    )
+    positions = positions.merge(
+        last_dividend.rename(columns={"Amount ($)": "Last Dividend Paid"}),
+        how="left",
+        on="Symbol",
+    )
+    positions["Last Dividend Paid"] = positions["Last Dividend Paid"].fillna(0)
 
-# Add NAV and AUM data (update as you get real-time data)
-additional_data = {
-    "Symbol": ["BITO", "BTCI", "HOOW", "HOOY", "HPE", "MSTY", "QQQI", "SCHD", "ULTY"],
-    "NAV": [19.67, 60.62, 64.29, 0, 0, 0, 0, 27.52, 5.47],
-    "AUM": [2.75e9, 8.34e8, 1.0048e8, 0, 0, 0, 0, 7.111e10, 3.38e9],
-}
-additional_df = pd.DataFrame(additional_data)
+    positions.fillna(0, inplace=True)
 
-# Merge price changes, NAV, AUM with positions
-positions = positions.merge(price_change_df, how="left", on="Symbol")
-positions = positions.merge(additional_df, how="left", on="Symbol")
+    price_change_data = []
+    for ticker, prices in price_data_examples.items():
+        change_5d, pct_5d = calculate_price_changes(prices, 5)
+        change_1m, pct_1m = calculate_price_changes(prices, 22)
+        change_3m, pct_3m = calculate_price_changes(prices, 66)
+        change_6m, pct_6m = calculate_price_changes(prices, 132)
+        price_change_data.append(
+            {
+                "Symbol": ticker,
+                "Price Change 5D": change_5d or 0,
+                "Price Change % 5D": pct_5d or 0,
+                "Price Change 1M": change_1m or 0,
+                "Price Change % 1M": pct_1m or 0,
+                "Price Change 3M": change_3m or 0,
+                "Price Change % 3M": pct_3m or 0,
+                "Price Change 6M": change_6m or 0,
+                "Price Change % 6M": pct_6m or 0,
+            }
+        )
 
-positions.fillna(0, inplace=True)
+    price_change_df = pd.DataFrame(price_change_data)
 
-# Prepare Monthly Dividend History tab
-dividend_details["Month"] = (
-    dividend_details["Dividend Date"].dt.to_period("M").astype(str)
-)
-monthly_dividends = (
-    dividend_details.groupby(["Symbol", "Month"])["Amount Received"].sum().reset_index()
-)
+    additional_df = pd.DataFrame(additional_data)
 
-# Prepare Dividend Forecast (assuming last dividend repeated monthly - adjust as needed)
-forecast_months = pd.date_range(
-    start=pd.Timestamp(dt.datetime.today()).to_period("M").to_timestamp(),
-    periods=12,
-    freq="M",
-)
+    # Merge price changes, NAV, AUM with positions
+    positions = positions.merge(price_change_df, how="left", on="Symbol")
+    positions = positions.merge(additional_df, how="left", on="Symbol")
 
+    positions.fillna(0, inplace=True)
 
-def generate_forecast(symbol, last_dividend):
-    if last_dividend == 0:
-        return pd.DataFrame()
-    return pd.DataFrame(
-        [
-            {
-                "Symbol": symbol,
-                "Month": month.strftime("%Y-%m"),
-                "Projected Dividend": last_dividend,
-            }
-            for month in forecast_months
-        ]
+    # Prepare Monthly Dividend History tab
+    dividend_details["Month"] = (
+        dividend_details["Dividend Date"].dt.to_period("M").astype(str)
+    )
+    monthly_dividends = (
+        dividend_details.groupby(["Symbol", "Month"])["Amount Received"]
+        .sum()
+        .reset_index()
     )
 
+    # Prepare Dividend Forecast: inferred cadence x recent median payment, 12 months
+    payments = div_received.rename(
+        columns={"Symbol": "symbol", "Run Date": "date", "Amount ($)": "amount"}
+    )[["symbol", "date", "amount"]]
+    forecast = dividend_forecast(dividend_calendar(payments), months=12)
+    forecast = forecast.reindex(positions["Symbol"].unique(), fill_value=0.0).round(2)
+    forecast.columns = forecast.columns.strftime("%Y-%m")
+    forecast_df = forecast.rename_axis("Symbol").reset_index()
+
+    # Export all data to an Excel file with multiple tabs
+    with pd.ExcelWriter(output_path) as writer:
+        positions.to_excel(writer, index=False, sheet_name="Holdings & Summary")
+        monthly_dividends.to_excel(
+            writer, index=False, sheet_name="Monthly Dividend History"
+        )
+        forecast_df.to_excel(writer, index=False, sheet_name="Dividend Forecast")
+        dividend_details.to_excel(writer, index=False, sheet_name="Dividend Details")
 
-forecast_list = []
-for _, row in positions.iterrows():
-    forecast_list.append(generate_forecast(row["Symbol"], row["Last Dividend Paid"]))
-
-forecast_df = pd.concat(forecast_list) if forecast_list else pd.DataFrame()
+    print(f"Wrote {Path(output_path).resolve()}")
 
-# Export all data to an Excel file with multiple tabs
-output_file = data_dir / "Dividend_Tracker_Complete.xlsx"
-with pd.ExcelWriter(output_file) as writer:
-    positions.to_excel(writer, index=False, sheet_name="Holdings & Summary")
-    monthly_dividends.to_excel(
-        writer, index=False, sheet_name="Monthly Dividend History"
-    )
-    forecast_df.to_excel(writer, index=False, sheet_name="Dividend Forecast")
-    dividend_details.to_excel(writer, index=False, sheet_name="Dividend Details")
 
-print(f"Wrote {output_file.resolve()}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# pip install pandas yfinance
+"""On-disk daily price history used by prices_updater.py.
+
+Bars live in a SQLite file (table ``price_bar``) together with the date each
+symbol was last fetched through, so a run only downloads the days that are not
+cached yet, plus the last cached bar to tell whether the provider has
+re-adjusted the history since. The fetcher is injectable: any callable taking
+``(symbols, start, end)`` and returning a long frame with ``symbol``, ``date``,
+``close`` and ``adj_close`` columns works, which keeps the cache usable offline.
+"""
+import datetime as dt
+import math
+import sqlite3
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+BAR_COLUMNS = ["symbol", "date", "close", "adj_close"]
+
+Fetcher = Callable[[List[str], dt.date, dt.date], pd.DataFrame]
+
+
+def yfinance_fetcher(symbols: List[str], start: dt.date, end: dt.date) -> pd.DataFrame:
+    import yfinance as yf
+
+    hist = yf.download(
+        symbols,
+        start=start,
+        end=end + dt.timedelta(days=1),  # yfinance end is exclusive
+        interval="1d",
+        auto_adjust=False,
+        progress=False,
+    )
+    if hist is None or hist.empty:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+    close = hist["Close"]
+    adj = hist["Adj Close"] if "Adj Close" in hist else close
+    if isinstance(close, pd.Series):
+        close, adj = close.to_frame(symbols[0]), adj.to_frame(symbols[0])
+    close.index = pd.DatetimeIndex(close.index).tz_localize(None)
+    adj.index = close.index
+    bars = pd.DataFrame({"close": close.stack(), "adj_close": adj.stack()})
+    bars = bars.reset_index()
+    bars.columns = ["date", "symbol", "close", "adj_close"]
+    return bars[BAR_COLUMNS]
+
+
+class PriceCache:
+    def __init__(
+        self,
+        path: str,
+        fetcher: Fetcher = yfinance_fetcher,
+        history_days: int = 400,
+    ):
+        self.fetcher = fetcher
+        self.history_days = history_days
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS price_bar (
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                close REAL,
+                adj_close REAL,
+                PRIMARY KEY (symbol, date)
+            );
+            CREATE TABLE IF NOT EXISTS price_fetch (
+                symbol TEXT PRIMARY KEY,
+                fetched_through TEXT NOT NULL
+            );
+            """
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def fetched_through(self) -> Dict[str, dt.date]:
+        rows = self.conn.execute("SELECT symbol, fetched_through FROM price_fetch")
+        return {s: dt.date.fromisoformat(d) for s, d in rows}
+
+    def first_bar_dates(self, symbols: Iterable[str]) -> Dict[str, dt.date]:
+        symbols = list(symbols)
+        marks = ",".join("?" * len(symbols))
+        rows = self.conn.execute(
+            f"SELECT symbol, MIN(date) FROM price_bar WHERE symbol IN ({marks}) "
+            "GROUP BY symbol",
+            symbols,
+        )
+        return {s: dt.date.fromisoformat(d) for s, d in rows}
+
+    def update(self, symbols: Iterable[str], asof: dt.date) -> int:
+        """Fetch only the missing range per symbol; return the number of new bars.
+
+        Symbols that share a start date are requested together, so a daily run
+        over an up-to-date cache is a single request for one or two days. A
+        symbol counts as fetched through its latest bar returned, so a day the
+        provider has not published yet is asked for again on the next run.
+
+        Each request starts at the symbol's last cached bar. Providers
+        back-adjust every earlier close at each distribution or split, so when
+        that bar comes back with a different adjusted-to-raw ratio, the
+        symbol's whole history is fetched again and the cache stays on one
+        adjustment basis.
+        """
+        fetched = self.fetched_through()
+        default_start = asof - dt.timedelta(days=self.history_days)
+        by_start: Dict[dt.date, List[str]] = defaultdict(list)
+        for s in symbols:
+            if s not in fetched:
+                by_start[default_start].append(s)
+            elif fetched[s] < asof:
+                by_start[fetched[s]].append(s)
+
+        added, rebased = self._fetch(by_start, asof, fetched)
+        if rebased:
+            by_start = defaultdict(list)
+            for s, first in self.first_bar_dates(rebased).items():
+                by_start[first].append(s)
+            more, _ = self._fetch(by_start, asof, self.fetched_through())
+            added += more
+        return added
+
+    def _fetch(
+        self,
+        by_start: Dict[dt.date, List[str]],
+        asof: dt.date,
+        fetched: Dict[str, dt.date],
+    ) -> Tuple[int, List[str]]:
+        """Store bars for each start date's symbols.
+
+        Returns the number of bars after each symbol's ``fetched`` date and
+        the symbols whose stored start bar was adjusted differently.
+        """
+        added, rebased = 0, []
+        for start, group in sorted(by_start.items()):
+            bars = self.fetcher(group, start, asof)
+            bars = bars.dropna(subset=["close", "adj_close"], how="all")
+            rows = [
+                (s, pd.Timestamp(d).date().isoformat(), _float(c), _float(a))
+                for s, d, c, a in bars[BAR_COLUMNS].itertuples(index=False)
+            ]
+            stored = self._bars_on(group, start)
+            latest: Dict[str, str] = {}
+            for s, d, c, a in rows:
+                latest[s] = max(d, latest.get(s, d))  # ISO dates sort as text
+                if (s, d) in stored and not _same_basis(stored[s, d], (c, a)):
+                    rebased.append(s)
+                if s not in fetched or d > fetched[s].isoformat():
+                    added += 1
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO price_bar VALUES (?, ?, ?, ?)", rows
+                )
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO price_fetch VALUES (?, ?)",
+                    [(s, latest[s]) for s in group if s in latest],
+                )
+        return added, sorted(set(rebased))
+
+    def _bars_on(
+        self, symbols: List[str], day: dt.date
+    ) -> Dict[Tuple[str, str], Tuple[Optional[float], Optional[float]]]:
+        marks = ",".join("?" * len(symbols))
+        rows = self.conn.execute(
+            "SELECT symbol, date, close, adj_close FROM price_bar "
+            f"WHERE date = ? AND symbol IN ({marks})",
+            [day.isoformat(), *symbols],
+        )
+        return {(s, d): (c, a) for s, d, c, a in rows}
+
+    def prices(self, symbols: Iterable[str]) -> pd.DataFrame:
+        """Wide frame of adjusted closes (close when unadjusted) indexed by date."""
+        symbols = list(symbols)
+        if not symbols:
+            return pd.DataFrame()
+        marks = ",".join("?" * len(symbols))
+        bars = pd.read_sql_query(
+            "SELECT symbol, date, COALESCE(adj_close, close) AS price "
+            f"FROM price_bar WHERE symbol IN ({marks})",
+            self.conn,
+            params=symbols,
+            parse_dates=["date"],
+        )
+        return bars.pivot(index="date", columns="symbol", values="price").sort_index()
+
+
+def _float(value):
+    return None if pd.isna(value) else float(value)
+
+
+def _adjustment(close, adj_close):
+    return adj_close / close if close and adj_close is not None else 1.0
+
+
+def _same_basis(old, new) -> bool:
+    """Whether two copies of one bar share the adjusted-to-raw close ratio."""
+    return math.isclose(_adjustment(*old), _adjustment(*new), rel_tol=1e-5)
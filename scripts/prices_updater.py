@@ -2,10 +2,14 @@
 # pip install pandas openpyxl yfinance
 import datetime as dt
 import pandas as pd
-import yfinance as yf
 from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+
+from price_cache import PriceCache
+from workbook_io import header_names, write_rows
 
 PATH = "Dividend_Tracker_Skeleton.xlsx"  # change if you rename
+CACHE_PATH = "price_cache.sqlite"  # local price history, fetched incrementally
 
 
 def last_trading_on_or_before(series: pd.Series, target_date: pd.Timestamp):
@@ -17,7 +21,7 @@ def last_trading_on_or_before(series: pd.Series, target_date: pd.Timestamp):
     return idx, float(s.loc[idx])
 
 
-def main():
+def main(cache=None):
     wb = load_workbook(PATH)
     ws_tx = wb["Transactions"]
     ws_px = wb["Prices"]
@@ -36,39 +40,34 @@ def main():
     asof = dt.date.today()
     ws_px["B1"].value = asof
 
-    # Clear existing rows (first 3000 rows)
-    for r in range(3, 3003):
-        for c in "ABCDEFGHIJKLMNOPQRST":
-            ws_px[f"{c}{r}"].value = None
-
-    # Write symbols & date pulled
-    for i, s in enumerate(symbols, start=3):
-        ws_px[f"A{i}"].value = s
-        ws_px[f"B{i}"].value = asof
-
-    # Fetch quotes
+    # Fetch only bars missing from the local cache, then read lookbacks from it
+    cache = cache or PriceCache(CACHE_PATH)
+    px = pd.DataFrame()
     if symbols:
-        hist = yf.download(
-            symbols, period="400d", interval="1d", auto_adjust=False, progress=False
-        )
-        px = hist["Adj Close"] if "Adj Close" in hist else hist["Close"]
-        if isinstance(px, pd.Series):
-            px = px.to_frame()
-        px = px.tz_localize(None)
+        added = cache.update(symbols, asof)
+        print(f"Fetched {added} new price bars")
+        px = cache.prices(symbols)
 
-        for i, s in enumerate(symbols, start=3):
-            series = px[s].dropna() if s in px.columns else pd.Series(dtype=float)
-            if series.empty:
-                continue
+    # One row per symbol, written over the previous run's rows
+    rows = []
+    for s in symbols:
+        row = {"A": s, "B": asof}
+        series = px[s].dropna() if s in px.columns else pd.Series(dtype=float)
+        if not series.empty:
             cur_date = series.index.max()
-            ws_px[f"C{i}"].value = float(series.loc[cur_date])
+            row["C"] = float(series.loc[cur_date])
 
             for col, days in {"D": 5, "H": 30, "L": 182, "P": 365}.items():
                 d, p = last_trading_on_or_before(
                     series, pd.Timestamp(asof) - pd.Timedelta(days=days)
                 )
-                ws_px[f"{col}{i}"].value = None if d is None else d.to_pydatetime()
-                ws_px[f"{chr(ord(col)+1)}{i}"].value = None if p is None else float(p)
+                row[col] = None if d is None else d.to_pydatetime()
+                row[chr(ord(col) + 1)] = None if p is None else float(p)
+        rows.append(row)
+
+    n_cols = len(header_names(ws_px, header_row=2))
+    letters = [get_column_letter(c) for c in range(1, n_cols + 1)]
+    write_rows(ws_px, ([row.get(c) for c in letters] for row in rows), 3, n_cols)
 
     wb.save(PATH)
     print(f"Prices updated for {len(symbols)} symbols on {asof}")
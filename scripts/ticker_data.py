@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# pip install pandas yfinance
+"""Concurrent per-symbol metadata fetch for the workbook updaters.
+
+Each symbol's ``info`` and dividend history are requested once per run through
+a bounded thread pool with retry/backoff. The provider is any callable mapping a
+symbol to ``(info, dividends)``, so a local fake can stand in for yfinance.
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Tuple
+
+import pandas as pd
+
+Provider = Callable[[str], Tuple[dict, pd.Series]]
+
+
+@dataclass
+class TickerData:
+    symbol: str
+    info: dict = field(default_factory=dict)
+    dividends: pd.Series = field(default_factory=lambda: pd.Series(dtype=float))
+    error: str = ""
+
+
+def yfinance_provider(symbol: str) -> Tuple[dict, pd.Series]:
+    import yfinance as yf
+
+    t = yf.Ticker(symbol)
+    return t.info or {}, t.dividends
+
+
+class TickerFetcher:
+    def __init__(
+        self,
+        provider: Provider = yfinance_provider,
+        max_workers: int = 8,
+        retries: int = 3,
+        backoff: float = 0.5,
+    ):
+        self.provider = provider
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self._memo: Dict[str, TickerData] = {}
+
+    def _fetch_one(self, symbol: str) -> TickerData:
+        attempt = 0
+        while True:
+            try:
+                info, dividends = self.provider(symbol)
+            except Exception as exc:  # provider errors are not typed
+                if attempt >= self.retries:
+                    return TickerData(symbol, error=f"{type(exc).__name__}: {exc}")
+                # exponential backoff with jitter to spread out rate-limit retries
+                time.sleep(self.backoff * 2**attempt * (1 + random.random()))
+                attempt += 1
+                continue
+            if dividends is None:
+                dividends = pd.Series(dtype=float)
+            return TickerData(symbol, info or {}, dividends)
+
+    def fetch(self, symbols: Iterable[str]) -> Dict[str, TickerData]:
+        """Return data for every symbol, fetching only those not seen this run."""
+        symbols = list(dict.fromkeys(symbols))
+        missing = [s for s in symbols if s not in self._memo]
+        if missing:
+            workers = max(1, min(self.max_workers, len(missing)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for data in pool.map(self._fetch_one, missing):
+                    self._memo[data.symbol] = data
+        return {s: self._memo[s] for s in symbols}
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# pip install pandas openpyxl
+"""Table read/write helpers shared by the workbook updaters.
+
+Writes overwrite the rows in place and clear only what the previous run left
+below the new data, so the cost follows the size of the portfolio rather than a
+fixed grid, and there is no row ceiling. Excel tables (Tx, Etf, DivCal) whose
+header sits on the written header row are resized to fit.
+"""
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter, range_boundaries
+
+
+def header_names(ws, header_row=1):
+    headers = [c.value for c in ws[header_row]]
+    while headers and headers[-1] in (None, ""):
+        headers.pop()
+    return headers
+
+
+def read_table(ws, header_row=1):
+    headers = [c.value for c in ws[header_row]]
+    rows = []
+    for r in ws.iter_rows(min_row=header_row + 1, values_only=True):
+        if all((v is None or str(v).strip() == "") for v in r):
+            continue
+        rows.append(dict(zip(headers, r)))
+    return pd.DataFrame(rows)
+
+
+def cell_value(value):
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def write_rows(ws, rows, first_row, n_cols):
+    """Write ``rows`` from ``first_row`` and blank leftovers from the last run."""
+    previous_last = ws.max_row
+    r = first_row - 1
+    for r, row in enumerate(rows, start=first_row):
+        row = list(row)[:n_cols]
+        row += [None] * (n_cols - len(row))
+        for c, value in enumerate(row, start=1):
+            ws.cell(r, c).value = cell_value(value)
+    for stale in ws.iter_rows(min_row=r + 1, max_row=previous_last, max_col=n_cols):
+        for cell in stale:
+            cell.value = None
+    return r
+
+
+def resize_table(ws, header_row, n_rows):
+    for table in ws.tables.values():
+        min_col, min_row, max_col, _ = range_boundaries(table.ref)
+        if min_row != header_row:
+            continue
+        # an Excel table needs at least one data row
+        last_row = header_row + max(n_rows, 1)
+        table.ref = (
+            f"{get_column_letter(min_col)}{header_row}:"
+            f"{get_column_letter(max_col)}{last_row}"
+        )
+        if table.autoFilter is not None:
+            table.autoFilter.ref = table.ref
+
+
+def write_table(ws, df, header_row=1):
+    headers = header_names(ws, header_row)
+    if len(df.columns) and set(df.columns) <= set(headers):
+        df = df.reindex(columns=headers)
+    n_cols = max(len(headers), len(df.columns))
+    write_rows(ws, df.itertuples(index=False), header_row + 1, n_cols)
+    resize_table(ws, header_row, len(df))
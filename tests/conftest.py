@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Settings are read when the app is imported, so point it at a scratch SQLite
+# database first; the fixtures drop and recreate every table
+_DB_DIR = tempfile.mkdtemp(prefix="divitrek-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ["DB_ASYNC"] = "false"
+os.environ["CACHE_ENABLED"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "divitrek"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+
+@pytest.fixture
+def engine():
+    from sqlmodel import SQLModel
+
+    from app.core.db import engine
+    from app.services.returns import flow_cache
+
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    flow_cache.clear()
+    return engine
+
+
+@pytest.fixture
+def session(engine):
+    from sqlmodel import Session
+
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def client(engine):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_asset(client):
+    """Create an asset and its transactions through the API; returns its id."""
+
+    def make(symbol, trades=()):
+        asset = client.post("/assets/", json={"symbol": symbol, "name": symbol})
+        asset_id = asset.json()["id"]
+        for day, shares, price in trades:
+            body = {
+                "asset_id": asset_id,
+                "date": day,
+                "shares": shares,
+                "price_per_share": price,
+                "action": "buy" if shares > 0 else "sell",
+            }
+            response = client.post(f"/assets/{asset_id}/transactions", json=body)
+            assert response.status_code == 201, response.text
+        return asset_id
+
+    return make
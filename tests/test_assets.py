@@ -0,0 +1,56 @@
+def positions(client):
+    return {p["symbol"]: p for p in client.get("/portfolio/positions").json()}
+
+
+def test_repeated_create_returns_the_stored_transaction(client, make_asset):
+    asset_id = make_asset("TWIN")
+    url = f"/assets/{asset_id}/transactions"
+    buy = {
+        "asset_id": asset_id,
+        "date": "2024-03-01",
+        "shares": 5,
+        "price_per_share": 10,
+    }
+
+    first = client.post(url, json=buy)
+    assert first.status_code == 201
+    retry = client.post(url, json=buy)
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+    assert positions(client)["TWIN"]["shares"] == 5.0
+
+    # a second real buy with the same values says it is the second one
+    second = client.post(url, params={"repeat": 1}, json=buy)
+    assert second.status_code == 201
+    assert second.json()["id"] != first.json()["id"]
+    assert len(client.get(url).json()) == 2
+    assert positions(client)["TWIN"]["shares"] == 10.0
+
+
+def test_repeated_create_returns_the_stored_dividend(client, make_asset):
+    asset_id = make_asset("TWIN", [("2024-01-02", 10, 10.0)])
+    url = f"/assets/{asset_id}/dividends"
+    div = {"asset_id": asset_id, "date_received": "2024-03-01", "amount_received": 2}
+
+    first = client.post(url, json=div)
+    assert first.status_code == 201
+    assert client.post(url, json=div).status_code == 200
+    assert client.post(url, params={"repeat": 1}, json=div).status_code == 201
+    assert client.post(url, params={"repeat": -1}, json=div).status_code == 422
+    assert [d["amount_received"] for d in client.get(url).json()] == [2.0, 2.0]
+    assert positions(client)["TWIN"]["dividends_received"] == 4.0
+
+
+def test_delete_asset_with_history(client, make_asset):
+    asset_id = make_asset("GONE", [("2024-01-02", 10, 10.0), ("2024-02-01", -4, 11.0)])
+    div = {"asset_id": asset_id, "date_received": "2024-03-01", "amount_received": 2}
+    assert client.post(f"/assets/{asset_id}/dividends", json=div).status_code == 201
+    kept = make_asset("KEPT", [("2024-01-02", 1, 10.0)])
+
+    response = client.delete(f"/assets/{asset_id}")
+    assert response.status_code == 200, response.text
+    assert client.get(f"/assets/{asset_id}").status_code == 404
+    assert client.get(f"/assets/{asset_id}/transactions").json() == []
+    assert client.get(f"/assets/{asset_id}/dividends").json() == []
+    assert list(positions(client)) == ["KEPT"]
+    assert len(client.get(f"/assets/{kept}/transactions").json()) == 1
@@ -0,0 +1,130 @@
+import pandas as pd
+import pytest
+
+from app.models.models import CostBasisMethod
+from app.services.cost_basis import EVENT_COLUMNS, match_lots
+
+
+def events(*trades):
+    """Rows of (asset_id, date, shares, price_per_share), without fees."""
+    rows = [
+        (asset_id, pd.Timestamp(day), *rest, 0.0) for asset_id, day, *rest in trades
+    ]
+    return pd.DataFrame(rows, columns=EVENT_COLUMNS)
+
+
+# two lots, then a sell that empties the first and half of the second
+PARTIAL = events(
+    (1, "2024-01-02", 10, 10.0),
+    (1, "2024-02-01", 10, 20.0),
+    (1, "2024-03-01", -15, 30.0),
+)
+
+
+@pytest.mark.parametrize(
+    "method, realized_cost, open_lots",
+    [
+        (CostBasisMethod.fifo, 200.0, [(0.0, 0.0), (5.0, 100.0)]),
+        (CostBasisMethod.lifo, 250.0, [(5.0, 50.0), (0.0, 0.0)]),
+        # pooled at 15 a share; open lots keep FIFO share counts
+        (CostBasisMethod.average, 225.0, [(0.0, 0.0), (5.0, 75.0)]),
+    ],
+)
+def test_sell_consumes_part_of_a_lot(method, realized_cost, open_lots):
+    result = match_lots(PARTIAL, method)
+    sell = result.iloc[2]
+    assert sell["matched"] == 15.0 and sell["unmatched"] == 0.0
+    assert sell["proceeds"] == pytest.approx(450.0)
+    assert sell["realized_cost"] == pytest.approx(realized_cost)
+    lots = list(zip(result["open_shares"][:2], result["open_cost"][:2]))
+    assert lots == pytest.approx(open_lots)
+
+
+@pytest.mark.parametrize("method", list(CostBasisMethod))
+def test_oversell_is_unmatched_not_short(method):
+    result = match_lots(
+        events(
+            (1, "2024-01-02", 5, 10.0),
+            (1, "2024-02-01", -8, 12.0),
+            (1, "2024-03-01", 4, 20.0),
+        ),
+        method,
+    )
+    sell = result.iloc[1]
+    assert (sell["matched"], sell["unmatched"]) == (5.0, 3.0)
+    # only the matched shares realize: 5 of the 8 sold
+    assert sell["proceeds"] == pytest.approx(60.0)
+    assert sell["realized_cost"] == pytest.approx(50.0)
+    # the later buy opens a full lot instead of covering the short
+    assert result["open_shares"].tolist() == [0.0, 0.0, 4.0]
+    assert result["open_cost"].iloc[2] == pytest.approx(80.0)
+
+
+def test_average_cost_resets_when_a_position_closes():
+    result = match_lots(
+        events(
+            (1, "2024-01-02", 10, 10.0),
+            (1, "2024-02-01", -10, 15.0),
+            (1, "2024-03-01", 10, 30.0),
+            (1, "2024-04-01", -5, 40.0),
+            # another asset in the same frame starts its own pool
+            (2, "2024-01-02", 10, 50.0),
+            (2, "2024-02-01", -5, 60.0),
+        ),
+        CostBasisMethod.average,
+    )
+    assert result["realized_cost"].tolist() == pytest.approx(
+        [0.0, 100.0, 0.0, 150.0, 0.0, 250.0]
+    )
+    assert result.groupby("asset_id")["open_cost"].sum().tolist() == pytest.approx(
+        [150.0, 250.0]
+    )
+
+
+def test_no_events():
+    result = match_lots(events(), CostBasisMethod.fifo)
+    assert result.empty and "open_cost" in result
+
+
+@pytest.fixture
+def traded(client, make_asset):
+    asset_id = make_asset(
+        "LOTS",
+        [("2024-01-02", 10, 10.0), ("2024-02-01", 10, 20.0), ("2024-03-01", -15, 30.0)],
+    )
+    make_asset("OVER", [("2024-01-02", 5, 10.0), ("2024-02-01", -8, 12.0)])
+    # valued at the raw close on or before as_of, not the adjusted one
+    bars = [
+        {"symbol": "LOTS", "date": "2024-06-27", "close": 24.0},
+        {"symbol": "LOTS", "date": "2024-06-28", "close": 25.0, "adj_close": 20.0},
+        {"symbol": "LOTS", "date": "2024-07-01", "close": 30.0},
+    ]
+    assert client.post("/prices/bars", json=bars).status_code == 200
+    return asset_id
+
+
+def test_cost_basis_endpoint(client, traded):
+    params = {"method": "lifo", "as_of": "2024-06-30"}
+    response = client.get("/assets/cost-basis", params=params)
+    assert response.status_code == 200, response.text
+    lots, over = response.json()
+    assert lots["symbol"] == "LOTS" and lots["method"] == "lifo"
+    assert lots["shares"] == 5.0 and lots["cost_basis"] == pytest.approx(50.0)
+    assert lots["realized_gain"] == pytest.approx(450.0 - 250.0)
+    assert lots["price"] == 25.0
+    assert lots["unrealized_gain"] == pytest.approx(5 * 25.0 - 50.0)
+    assert over["symbol"] == "OVER"
+    assert over["shares"] == 0.0 and over["unmatched_shares"] == 3.0
+    assert over["realized_gain"] == pytest.approx(60.0 - 50.0)
+    assert over["price"] is None and over["unrealized_gain"] is None
+
+
+def test_asset_cost_basis_lists_open_lots(client, traded):
+    params = {"method": "fifo", "as_of": "2024-06-30"}
+    response = client.get(f"/assets/{traded}/cost-basis", params=params)
+    assert response.status_code == 200, response.text
+    basis = response.json()
+    assert basis["lots"] == [
+        {"date": "2024-02-01", "shares": 5.0, "cost": 100.0, "cost_per_share": 20.0}
+    ]
+    assert client.get("/assets/999/cost-basis").status_code == 404
@@ -0,0 +1,117 @@
+from sqlalchemy import inspect, select, text
+from sqlmodel import SQLModel
+
+from app.core.db import init_db
+from app.models.models import Asset, Dividend, DividendMonthly, Position
+
+LEGACY_TRANSACTION = """
+CREATE TABLE "transaction" (
+    id INTEGER PRIMARY KEY,
+    date DATE NOT NULL,
+    price_per_share FLOAT NOT NULL,
+    shares FLOAT NOT NULL,
+    fees FLOAT NOT NULL,
+    asset_id INTEGER NOT NULL REFERENCES asset (id)
+)
+"""
+
+
+def legacy_tables(engine):
+    """Every table but ``transaction``, which predates action and dedup_key."""
+    SQLModel.metadata.drop_all(engine)
+    tables = SQLModel.metadata.tables
+    others = [t for name, t in tables.items() if name != "transaction"]
+    SQLModel.metadata.create_all(engine, tables=others)
+    with engine.begin() as connection:
+        connection.execute(text(LEGACY_TRANSACTION))
+        connection.execute(
+            Asset.__table__.insert(), Asset(symbol="ABC", name="ABC").model_dump()
+        )
+        connection.execute(
+            text(
+                'INSERT INTO "transaction" '
+                "(date, price_per_share, shares, fees, asset_id) VALUES "
+                "('2024-01-02', 10.0, 5.0, 0.0, 1), "
+                "('2024-02-01', 12.0, -2.0, 0.0, 1)"
+            )
+        )
+
+
+def test_init_db_adds_action_to_existing_transactions(engine):
+    legacy_tables(engine)
+    init_db()
+    init_db()  # a second start finds the column and leaves it alone
+
+    columns = {c["name"] for c in inspect(engine).get_columns("transaction")}
+    assert {"action", "dedup_key"} <= columns
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text('SELECT action, dedup_key FROM "transaction" ORDER BY id')
+        ).all()
+    assert [action for action, _ in rows] == ["buy", "buy"]
+    assert all(key for _, key in rows)
+
+
+def index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_init_db_adds_indexes_to_existing_tables(engine):
+    legacy_tables(engine)
+    (index,) = [
+        i
+        for i in Dividend.__table__.indexes
+        if i.name == "ix_dividend_asset_id_date_received"
+    ]
+    index.drop(engine)
+    init_db()
+    assert "ix_transaction_asset_id_date" in index_names(engine, "transaction")
+    assert "ix_dividend_asset_id_date_received" in index_names(engine, "dividend")
+
+
+def positions(engine):
+    with engine.connect() as connection:
+        table = Position.__table__
+        rows = connection.execute(select(table.c.asset_id, table.c.shares)).all()
+        return dict(rows)
+
+
+def test_init_db_rebuilds_missing_or_empty_positions(engine, make_asset):
+    asset_id = make_asset("ABC", [("2024-01-02", 5, 10.0), ("2024-02-01", -2, 12.0)])
+    assert positions(engine) == {asset_id: 3.0}
+
+    Position.__table__.drop(engine)
+    init_db()
+    assert positions(engine) == {asset_id: 3.0}
+
+    with engine.begin() as connection:
+        connection.execute(Position.__table__.delete())
+    init_db()
+    assert positions(engine) == {asset_id: 3.0}
+
+
+def monthly_rollup(engine):
+    with engine.connect() as connection:
+        table = DividendMonthly.__table__
+        rows = connection.execute(select(table.c.month, table.c.amount)).all()
+        return {month.isoformat(): amount for month, amount in rows}
+
+
+def test_init_db_rebuilds_missing_or_empty_dividend_months(client, engine, make_asset):
+    asset_id = make_asset("ABC")
+    dividends = [
+        {"asset_id": asset_id, "date_received": day, "amount_received": 2.5}
+        for day in ("2024-01-05", "2024-01-25", "2024-02-05")
+    ]
+    assert client.post("/dividends/batch", json=dividends).status_code == 200
+    expected = {"2024-01-01": 5.0, "2024-02-01": 2.5}
+    assert monthly_rollup(engine) == expected
+
+    DividendMonthly.__table__.drop(engine)
+    init_db()
+    assert monthly_rollup(engine) == expected
+
+    with engine.begin() as connection:
+        connection.execute(DividendMonthly.__table__.delete())
+    init_db()
+    assert monthly_rollup(engine) == expected
@@ -0,0 +1,75 @@
+import pytest
+
+
+@pytest.fixture
+def monthly_payer(client, make_asset):
+    asset_id = make_asset("MPAY", [("2023-12-01", 100, 20.0)])
+    ex_dividends = [
+        {"symbol": "MPAY", "ex_date": f"2024-{month:02d}-15", "amount": 0.1}
+        for month in range(1, 7)
+    ]
+    response = client.post("/dividends/ex-dividends", json=ex_dividends)
+    assert response.json() == {"upserted": 6}
+    # one payment alone has no cadence; the ex-date history gives it one
+    dividends = [
+        {"asset_id": asset_id, "date_received": "2024-06-20", "amount_received": 10.0}
+    ]
+    assert client.post("/dividends/batch", json=dividends).status_code == 200
+    return asset_id
+
+
+def test_calendar_reports_next_ex_date(client, monthly_payer):
+    response = client.get("/dividends/calendar", params={"as_of": "2024-07-01"})
+    assert response.status_code == 200, response.text
+    (entry,) = response.json()
+    assert entry["symbol"] == "MPAY"
+    assert entry["cadence"] == "monthly"
+    assert entry["last_ex_date"] == "2024-06-15"
+    assert entry["next_ex_date"] == "2024-07-15"
+    assert entry["expected_amount_per_share"] == pytest.approx(0.1)
+    assert entry["next_pay_date"] == "2024-07-20"
+
+
+def test_forecast_follows_the_ex_date_cadence(client, monthly_payer):
+    params = {"as_of": "2024-07-01", "months": 3}
+    response = client.get("/dividends/forecast", params=params)
+    assert response.status_code == 200, response.text
+    forecast = response.json()
+    assert forecast["months"] == ["2024-07", "2024-08", "2024-09"]
+    assert forecast["symbols"] == ["MPAY"]
+    assert forecast["amounts"] == [[10.0, 10.0, 10.0]]
+
+
+def monthly_dividends(client, asset_id, months):
+    dividends = [
+        {
+            "asset_id": asset_id,
+            "date_received": f"2024-{m:02d}-10",
+            "amount_received": 5,
+        }
+        for m in months
+    ]
+    assert client.post("/dividends/batch", json=dividends).status_code == 200
+
+
+def forecast_symbols(client, as_of):
+    params = {"as_of": as_of, "months": 3}
+    response = client.get("/dividends/forecast", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()["symbols"]
+
+
+def test_forecast_leaves_out_closed_positions(client, make_asset):
+    held = make_asset("HELD", [("2023-12-01", 10, 20.0)])
+    sold = make_asset("SOLD", [("2023-12-01", 10, 20.0), ("2024-06-12", -10, 21.0)])
+    for asset_id in (held, sold):
+        monthly_dividends(client, asset_id, range(1, 7))
+    assert forecast_symbols(client, "2024-07-01") == ["HELD"]
+
+
+def test_forecast_leaves_out_payers_that_stopped(client, make_asset):
+    asset_id = make_asset("STOP", [("2023-12-01", 10, 20.0)])
+    monthly_dividends(client, asset_id, range(1, 7))
+    # last paid June 10: one missed month is late, two mean it has stopped
+    assert forecast_symbols(client, "2024-08-01") == ["STOP"]
+    assert forecast_symbols(client, "2024-08-15") == []
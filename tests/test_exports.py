@@ -0,0 +1,30 @@
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+def test_exports_leave_out_internal_columns(client, make_asset):
+    asset_id = make_asset("EXP", [("2024-01-02", 10, 10.0)])
+    div = {"asset_id": asset_id, "date_received": "2024-02-01", "amount_received": 1}
+    assert client.post(f"/assets/{asset_id}/dividends", json=div).status_code == 201
+
+    response = client.get("/export/transactions")
+    assert response.status_code == 200, response.text
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names == [
+        "date",
+        "action",
+        "price_per_share",
+        "shares",
+        "fees",
+        "id",
+        "asset_id",
+        "symbol",
+    ]
+    assert table.column("action").to_pylist() == ["buy"]
+
+    response = client.get("/export/dividends", params={"format": "parquet"})
+    table = pq.read_table(io.BytesIO(response.content))
+    assert "dedup_key" not in table.column_names
+    assert table.column("amount_received").to_pylist() == [1.0]
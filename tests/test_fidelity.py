@@ -0,0 +1,36 @@
+import pytest
+
+from app.services.fidelity import DIVIDEND, classify_action
+
+BUYWRITE = "GLOBAL X NASDAQ 100 COVERED CALL ETF BUYWRITE (QYLD) (Cash)"
+
+
+@pytest.mark.parametrize(
+    "action, kind",
+    [
+        (f"YOU SOLD {BUYWRITE}", "sell"),
+        (f"YOU BOUGHT {BUYWRITE}", "buy"),
+        (f"REINVESTMENT {BUYWRITE}", "reinvestment"),
+        (f"DIVIDEND RECEIVED {BUYWRITE}", DIVIDEND),
+        ("  you sold FUND WITH BOUGHT IN ITS NAME", "sell"),
+        # layouts without a leading verb keep the workbook's precedence
+        ("SELL TO CLOSE", "sell"),
+        ("JOURNALED CASH", None),
+    ],
+)
+def test_classify_action(action, kind):
+    assert classify_action(action) == kind
+
+
+HISTORY = f"""Run Date,Action,Symbol,Description,Quantity,Price ($),Amount ($)
+03/04/2024,YOU SOLD {BUYWRITE},QYLD,QYLD,-4,18.5,74
+01/02/2024,YOU BOUGHT {BUYWRITE},QYLD,QYLD,10,17.5,-175
+"""
+
+
+def test_import_sale_of_buywrite_fund(client):
+    files = {"file": ("history.csv", HISTORY, "text/csv")}
+    response = client.post("/imports/fidelity", files=files)
+    assert response.status_code == 200, response.text
+    (position,) = client.get("/portfolio/positions").json()
+    assert position["symbol"] == "QYLD" and position["shares"] == 6.0
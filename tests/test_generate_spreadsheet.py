@@ -0,0 +1,27 @@
+import pandas as pd
+
+from generate_spreadsheet import load_history
+
+HISTORY = """Run Date,Action,Symbol,Amount ($)
+9/30/25,DIVIDEND RECEIVED,HOOW,31.59
+09/29/2025,DIVIDEND RECEIVED,SCHD,15.62
+2025-09-26,DIVIDEND RECEIVED,ULTY,98.10
+someday,DIVIDEND RECEIVED,MSTY,12.00
+,,,
+"""
+
+
+def test_history_dates_in_every_importer_format(tmp_path, capsys):
+    path = tmp_path / "history.csv"
+    path.write_text(HISTORY)
+    history = load_history(path)
+    assert history["Run Date"].head(3).tolist() == [
+        pd.Timestamp("2025-09-30"),
+        pd.Timestamp("2025-09-29"),
+        pd.Timestamp("2025-09-26"),
+    ]
+    # the blank row is not reported, the unreadable one is
+    assert history["Run Date"].isna().sum() == 2
+    assert "Skipped 1 history rows with unreadable dates: someday" in (
+        capsys.readouterr().out
+    )
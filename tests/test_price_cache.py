@@ -0,0 +1,95 @@
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+from price_cache import BAR_COLUMNS, PriceCache
+
+
+class StubFetcher:
+    """Weekday bars up to ``published`` for every symbol except the missing.
+
+    Every close is 10. ``distributions`` maps ex-dates to cash per share;
+    once published, each one back-adjusts the closes before it, as Yahoo's
+    adjusted close does.
+    """
+
+    def __init__(self, published, missing=(), distributions=None):
+        self.published = published
+        self.missing = set(missing)
+        self.distributions = distributions or {}
+        self.calls = []
+
+    def adjustment(self, day):
+        factor = 1.0
+        for ex_date, amount in self.distributions.items():
+            if day.date() < ex_date <= self.published:
+                factor *= 1 - amount / 10.0
+        return factor
+
+    def __call__(self, symbols, start, end):
+        self.calls.append((sorted(symbols), start, end))
+        days = pd.bdate_range(start, min(end, self.published))
+        bars = [
+            (symbol, day, 10.0, 10.0 * self.adjustment(day))
+            for symbol in symbols
+            if symbol not in self.missing
+            for day in days
+        ]
+        return pd.DataFrame(bars, columns=BAR_COLUMNS)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PriceCache(str(tmp_path / "prices.sqlite"), history_days=10)
+    yield cache
+    cache.close()
+
+
+def test_watermark_is_the_latest_bar_returned(cache):
+    friday = dt.date(2024, 3, 8)
+    cache.fetcher = StubFetcher(published=dt.date(2024, 3, 7))
+    assert cache.update(["AAA"], friday) == 8  # Feb 27 to Mar 7
+    assert cache.fetched_through() == {"AAA": dt.date(2024, 3, 7)}
+
+    # Friday's bar is published later in the day; the next run asks for it
+    cache.fetcher = StubFetcher(published=friday)
+    assert cache.update(["AAA"], friday) == 1
+    # from the last cached bar, which shows no re-adjustment here
+    assert cache.fetcher.calls == [(["AAA"], dt.date(2024, 3, 7), friday)]
+    assert cache.fetched_through() == {"AAA": friday}
+
+
+def test_symbol_without_rows_keeps_its_watermark(cache):
+    asof = dt.date(2024, 3, 8)
+    cache.fetcher = StubFetcher(published=asof, missing={"BBB"})
+    cache.update(["AAA", "BBB"], asof)
+    assert cache.fetched_through() == {"AAA": asof}
+
+    cache.fetcher = StubFetcher(published=asof)
+    cache.update(["AAA", "BBB"], asof)
+    assert cache.fetcher.calls == [(["BBB"], dt.date(2024, 2, 27), asof)]
+    assert set(cache.prices(["AAA", "BBB"]).columns) == {"AAA", "BBB"}
+
+
+def test_distribution_between_updates_refetches_the_history(cache):
+    before, ex_date, after = (
+        dt.date(2024, 3, 8),
+        dt.date(2024, 3, 12),
+        dt.date(2024, 3, 13),
+    )
+    cache.fetcher = StubFetcher(published=before, distributions={ex_date: 0.5})
+    cache.update(["AAA"], before)
+    assert set(cache.prices(["AAA"])["AAA"]) == {10.0}
+
+    cache.fetcher.published = after
+    assert cache.update(["AAA"], after) == 3  # Mar 11, 12 and 13
+    first = dt.date(2024, 2, 27)
+    assert cache.fetcher.calls[1:] == [
+        (["AAA"], before, after),
+        (["AAA"], first, after),
+    ]
+    # one adjustment basis: every close before the ex-date is adjusted
+    prices = cache.prices(["AAA"])["AAA"]
+    assert (prices[: pd.Timestamp(ex_date) - pd.Timedelta(days=1)] == 9.5).all()
+    assert (prices[pd.Timestamp(ex_date) :] == 10.0).all()
@@ -0,0 +1,26 @@
+import pytest
+
+
+def test_changes_use_the_raw_close(client):
+    # adjusted closes written by two fetches, before and after a distribution
+    bars = [
+        {"symbol": "WKLY", "date": "2024-05-24", "close": 10.0, "adj_close": 9.0},
+        {"symbol": "WKLY", "date": "2024-06-28", "close": 10.0, "adj_close": 10.0},
+    ]
+    assert client.post("/prices/bars", json=bars).status_code == 200
+    params = {"symbol": "WKLY", "windows": "1m", "as_of": "2024-06-28"}
+    response = client.get("/prices/changes", params=params)
+    assert response.status_code == 200, response.text
+    (wkly,) = response.json()
+    assert wkly["last_price"] == 10.0
+    change = wkly["changes"]["1m"]
+    assert change["start_date"] == "2024-05-24" and change["start_price"] == 10.0
+    assert change["change"] == pytest.approx(0.0)
+
+
+def test_changes_fall_back_to_the_adjusted_close(client):
+    bars = [{"symbol": "ADJ", "date": "2024-06-28", "close": None, "adj_close": 7.0}]
+    assert client.post("/prices/bars", json=bars).status_code == 200
+    params = {"symbol": "ADJ", "windows": "5d", "as_of": "2024-06-28"}
+    (adj,) = client.get("/prices/changes", params=params).json()
+    assert adj["last_price"] == 7.0
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from app.services.returns import xirr
+
+
+def test_xirr_one_year_gain():
+    rate = xirr(np.array([-100.0, 110.0]), np.array([0.0, 1.0]), np.array([0, 0]), 1)
+    assert rate[0] == pytest.approx(0.10)
+
+
+def test_xirr_all_loss_is_negative():
+    amounts = np.array([-100.0, -50.0, 30.0])
+    years = np.array([0.0, 0.5, 1.5])
+    rate = xirr(amounts, years, np.zeros(3, dtype=int), 1)[0]
+    assert np.isfinite(rate) and -1.0 < rate < 0.0
+    npv = (amounts / (1.0 + rate) ** years).sum()
+    assert npv == pytest.approx(0.0, abs=1e-6)
+
+
+def test_xirr_without_a_root_in_range_is_nan():
+    # 10000x in under a day: the root is far beyond the 10000% search range
+    amounts = np.array([-100.0, 1e6])
+    rate = xirr(amounts, np.array([0.0, 0.001]), np.zeros(2, dtype=int), 1)[0]
+    assert np.isnan(rate)
+
+
+def _returns(client, **params):
+    params = {"end": "2025-01-02", **params}
+    response = client.get("/portfolio/returns", params=params)
+    assert response.status_code == 200, response.text
+    return {a["symbol"]: a for a in response.json()["assets"]}
+
+
+@pytest.fixture
+def two_assets(client, make_asset):
+    make_asset("EARLY", [("2005-01-03", 10, 100.0)])
+    make_asset("LATE", [("2024-06-03", 5, 40.0)])
+    bars = [
+        {"symbol": "EARLY", "date": "2025-01-02", "close": 90.0},
+        {"symbol": "LATE", "date": "2025-01-02", "close": 10.0},
+    ]
+    assert client.post("/prices/bars", json=bars).status_code == 200
+
+
+def test_asset_xirr_does_not_depend_on_the_other_assets(client, two_assets):
+    together = _returns(client)
+    for symbol in ("EARLY", "LATE"):
+        alone = _returns(client, symbol=symbol)[symbol]
+        assert alone["xirr"] == pytest.approx(together[symbol]["xirr"], rel=1e-9)
+
+
+def test_losing_asset_has_negative_xirr(client, two_assets):
+    late = _returns(client)["LATE"]
+    assert late["gain"] < 0
+    # 200 in, 50 back out seven months later
+    assert -1.0 < late["xirr"] < -0.8
+    assert _returns(client)["EARLY"]["xirr"] < 0